@@ -0,0 +1,187 @@
+"""Usage analytics kept as Parquet event files plus pre-aggregated tables.
+
+Answering "how many BRDs per day" used to mean pulling all of Sheet1.
+AnalyticsStore takes generation and download events from the app as they
+happen, buffers them, and every flush_every events or flush_interval
+seconds writes the batch as one Parquet file under <directory>/events.
+The same batch is folded into the running aggregates, which are saved
+under <directory>/aggregates:
+
+    brds_per_day          date, brds
+    brds_per_preparer     prepared_by, brds
+    downloads_per_format  format, downloads
+    downloads_per_day     date, format, downloads
+
+Readers only touch the aggregates, which stay a few hundred rows however
+many events there are. If the aggregates are missing they are rebuilt
+from the event files.
+"""
+import atexit
+import glob
+import os
+import threading
+import time
+from datetime import datetime
+
+import pandas as pd
+
+ANALYTICS_DIR = os.environ.get('BRD_ANALYTICS_DIR', 'analytics_data')
+
+# Aggregate table -> (event type, group-by columns, value column)
+AGGREGATES = {
+    'brds_per_day': ('generation', ['date'], 'brds'),
+    'brds_per_preparer': ('generation', ['prepared_by'], 'brds'),
+    'downloads_per_format': ('download', ['format'], 'downloads'),
+    'downloads_per_day': ('download', ['date', 'format'], 'downloads')
+}
+
+EVENT_COLUMNS = ['timestamp', 'date', 'event', 'client_name', 'version', 'prepared_by', 'format']
+
+
+def aggregate_events(events):
+    """Aggregate tables (Series indexed by the group-by columns) for an events frame"""
+    tables = {}
+    for name, (event_type, keys, value) in AGGREGATES.items():
+        selected = events[events['event'] == event_type]
+        tables[name] = selected.groupby(keys).size().rename(value)
+    return tables
+
+
+def merge_aggregates(current, update):
+    """Sum two sets of aggregate tables"""
+    merged = {}
+    for name in AGGREGATES:
+        if name not in current or current[name].empty:
+            merged[name] = update[name]
+        elif update[name].empty:
+            merged[name] = current[name]
+        else:
+            merged[name] = current[name].add(update[name], fill_value=0).astype('int64')
+    return merged
+
+
+class AnalyticsStore:
+    """Buffered event ingestion into Parquet with incremental aggregates"""
+
+    def __init__(self, directory=ANALYTICS_DIR, flush_every=50, flush_interval=30.0):
+        self.directory = directory
+        self.events_dir = os.path.join(directory, 'events')
+        self.aggregates_dir = os.path.join(directory, 'aggregates')
+        os.makedirs(self.events_dir, exist_ok=True)
+        os.makedirs(self.aggregates_dir, exist_ok=True)
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._buffer = []
+        self._sequence = 0
+        self._aggregates = self._load_aggregates()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='analytics-flush', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def _event_files(self):
+        return sorted(glob.glob(os.path.join(self.events_dir, '*.parquet')))
+
+    def _load_aggregates(self):
+        tables = {}
+        for name, (_, keys, value) in AGGREGATES.items():
+            path = os.path.join(self.aggregates_dir, f"{name}.parquet")
+            if not os.path.exists(path):
+                return self.rebuild()
+            tables[name] = pd.read_parquet(path).set_index(keys)[value]
+        return tables
+
+    def rebuild(self):
+        """Recompute every aggregate from the event files"""
+        files = self._event_files()
+        events = (pd.concat([pd.read_parquet(path) for path in files], ignore_index=True)
+                  if files else pd.DataFrame(columns=EVENT_COLUMNS))
+        tables = aggregate_events(events)
+        self._save_aggregates(tables)
+        return tables
+
+    def _save_aggregates(self, tables):
+        for name, table in tables.items():
+            path = os.path.join(self.aggregates_dir, f"{name}.parquet")
+            tmp_path = path + '.tmp'
+            table.reset_index().to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, path)
+
+    def record(self, event, client_name, version, prepared_by='', file_format=''):
+        """Buffer one event; flushed in the background"""
+        now = datetime.now()
+        with self._lock:
+            self._buffer.append({
+                'timestamp': now.strftime('%Y-%m-%d %H:%M:%S'),
+                'date': now.strftime('%Y-%m-%d'),
+                'event': event,
+                'client_name': client_name,
+                'version': version,
+                'prepared_by': prepared_by,
+                'format': file_format.upper()
+            })
+            full = len(self._buffer) >= self.flush_every
+        if full:
+            threading.Thread(target=self.flush, daemon=True).start()
+
+    def record_generation(self, client_name, version, prepared_by):
+        self.record('generation', client_name, version, prepared_by=prepared_by)
+
+    def record_download(self, client_name, version, file_format):
+        self.record('download', client_name, version, file_format=file_format)
+
+    def flush(self):
+        """Write buffered events as a Parquet file and fold them into the aggregates"""
+        with self._flush_lock:
+            with self._lock:
+                if not self._buffer:
+                    return 0
+                batch = self._buffer
+                self._buffer = []
+                self._sequence += 1
+                sequence = self._sequence
+            events = pd.DataFrame(batch, columns=EVENT_COLUMNS)
+            name = f"events-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{sequence}.parquet"
+            events.to_parquet(os.path.join(self.events_dir, name), index=False)
+            merged = merge_aggregates(self._aggregates, aggregate_events(events))
+            self._save_aggregates(merged)
+            with self._lock:
+                self._aggregates = merged
+            return len(batch)
+
+    def aggregates(self, include_pending=True):
+        """Aggregate tables as DataFrames, optionally counting unflushed events"""
+        with self._lock:
+            tables = self._aggregates
+            if include_pending and self._buffer:
+                pending = pd.DataFrame(self._buffer, columns=EVENT_COLUMNS)
+                tables = merge_aggregates(tables, aggregate_events(pending))
+        return {name: table.reset_index() for name, table in tables.items()}
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error flushing analytics events: {str(e)}")
+
+    def close(self):
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._thread.join(5)
+        self.flush()
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_analytics(directory=ANALYTICS_DIR):
+    """Process-wide store for a directory, shared by the app and its pages"""
+    with _stores_lock:
+        if directory not in _stores:
+            _stores[directory] = AnalyticsStore(directory)
+        return _stores[directory]
@@ -0,0 +1,74 @@
+"""Incremental assembly of BRD exports.
+
+Each BRD part is converted into PDF flowables and DOCX body blocks as soon
+as it finishes streaming, instead of converting the concatenated full_brd
+once at the very end. The conversions run as segment jobs in the export
+workers (ExportEngine.submit_segment), so the script thread only queues
+them and carries on streaming the next part. Segments are cached per part
+and keyed on a digest of the part's markdown, so regenerating one part
+only rebuilds that segment. The final export then only prepends a cover
+and lays out pre-built parts.
+"""
+import hashlib
+
+from export_engine import EXPORT_FORMATS, ExportQueueFull
+
+
+def _digest(markdown_content):
+    return hashlib.sha1(markdown_content.encode('utf-8')).hexdigest()
+
+
+class BrdAssembler:
+    """Per-part PDF and DOCX segments of one BRD, built by an ExportEngine"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.parts = {}
+        # (fmt, part key) -> (digest, Future of the segment job, or None)
+        self._segments = {}
+        self.builds = 0
+
+    def add_part(self, key, markdown_content):
+        """Queue a finished part's conversions, skipping them if it is unchanged"""
+        # Re-inserting keeps the original part order for regenerated parts
+        self.parts[key] = markdown_content
+        digest = _digest(markdown_content)
+        for fmt in EXPORT_FORMATS:
+            cached = self._segments.get((fmt, key))
+            if cached is not None and cached[0] == digest:
+                continue
+            try:
+                future = self.engine.submit_segment(fmt, markdown_content)
+            except ExportQueueFull:
+                # The export then converts the full BRD itself
+                future = None
+            self._segments[(fmt, key)] = (digest, future)
+            self.builds += 1
+
+    def segments(self, fmt, timeout=None):
+        """Pickled segments in part order, or None if any part's job failed
+
+        Waits up to timeout seconds for jobs still running; a part that is
+        still converting is work the export would have to do anyway.
+        """
+        segments = []
+        for key in self.parts:
+            _, future = self._segments[(fmt, key)]
+            if future is None:
+                return None
+            try:
+                segment, _ = future.result(timeout=timeout)
+            except Exception as e:
+                print(f"Error building {fmt} segment for {key}: {str(e)}")
+                return None
+            segments.append(segment)
+        return segments
+
+    def matches(self, markdown_content):
+        """True if the assembled parts are exactly the given full BRD"""
+        return join_parts(self.parts.values()) == markdown_content
+
+
+def join_parts(parts):
+    """Combine part markdown into the full BRD, as shown for Markdown download"""
+    return "\n" + "\n\n".join(parts) + "\n"
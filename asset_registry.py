@@ -0,0 +1,93 @@
+"""Process-wide registry of fonts, images and their derived variants.
+
+Fonts are parsed and registered with ReportLab once. Image files are read
+once, and each derived variant is computed once and then shared by every
+session and export in the process: PNGs resampled to a printed size and
+ReportLab ImageReader objects. Every load is timed, and timings() reports
+what was loaded, its size and how long it took; with BRD_DIAGNOSTICS=1
+the Usage Analytics page shows them for the server process. Spawned
+export workers each build their own registry on first use.
+
+ReportLab and Pillow are imported on first use, so importing this module
+costs nothing at app startup.
+"""
+import os
+import threading
+import time
+from io import BytesIO
+
+
+class AssetRegistry:
+    """Loads each asset once and keeps it for the life of the process"""
+
+    def __init__(self):
+        # Reentrant: derived variants load their source through the registry
+        self._lock = threading.RLock()
+        self._assets = {}
+        self._timings = {}
+
+    def _get(self, key, loader, size=None):
+        with self._lock:
+            if key in self._assets:
+                self._timings[key]['hits'] += 1
+                return self._assets[key]
+            started = time.perf_counter()
+            value = loader()
+            seconds = time.perf_counter() - started
+            self._assets[key] = value
+            self._timings[key] = {
+                'seconds': seconds,
+                'bytes': len(value) if size is None and isinstance(value, (bytes, str)) else size,
+                'hits': 0
+            }
+            return value
+
+    def font(self, name, path):
+        """Register a TrueType font with ReportLab under name; returns name"""
+        def load():
+            from reportlab.pdfbase import pdfmetrics
+            from reportlab.pdfbase.ttfonts import TTFont
+
+            pdfmetrics.registerFont(TTFont(name, path))
+            return name
+        return self._get(('font', name, path), load, size=os.path.getsize(path))
+
+    def data(self, path):
+        """Raw bytes of a file"""
+        def load():
+            with open(path, 'rb') as f:
+                return f.read()
+        return self._get(('data', path), load)
+
+    def png(self, path, width, height, dpi):
+        """PNG bytes of an image resampled to fit width x height points at dpi"""
+        def load():
+            from PIL import Image as PILImage
+
+            with PILImage.open(BytesIO(self.data(path))) as image:
+                image = image.copy()
+            image.thumbnail((round(width / 72 * dpi), round(height / 72 * dpi)), PILImage.LANCZOS)
+            buffer = BytesIO()
+            image.save(buffer, format='PNG', optimize=True)
+            return buffer.getvalue()
+        return self._get(('png', path, width, height, dpi), load)
+
+    def image_reader(self, path, width=None, height=None, dpi=None):
+        """Decoded ReportLab ImageReader of an image, resampled when dpi is given"""
+        def load():
+            from reportlab.lib.utils import ImageReader
+
+            if dpi is None:
+                return ImageReader(BytesIO(self.data(path)))
+            return ImageReader(BytesIO(self.png(path, width, height, dpi)))
+        return self._get(('image_reader', path, width, height, dpi), load)
+
+    def timings(self):
+        """One dict per loaded asset (kind, name, seconds, bytes, hits), slowest first"""
+        with self._lock:
+            rows = [dict(timing, kind=key[0], name=' '.join(str(part) for part in key[1:]))
+                    for key, timing in self._timings.items()]
+        return sorted(rows, key=lambda row: -row['seconds'])
+
+
+registry = AssetRegistry()
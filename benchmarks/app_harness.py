@@ -0,0 +1,165 @@
+"""Headless runs of embgpt.py for the rerun and profiling benchmarks.
+
+Importing this module points every file the app writes (storage, Sheets
+spool and replica, analytics, asset cache) at a temporary directory, so
+it has to be imported before the app modules are. app_test() builds a
+Streamlit AppTest for embgpt.py, with the background warm-up off unless
+asked for. Inside stubbed_clients(), the Anthropic and Google Sheets
+clients are replaced by in-process stand-ins. The Sheets stand-in is
+synthetic.MemorySheets, which keeps the worksheets in memory. The Anthropic stand-in streams a synthetic BRD
+and records the time spent in it under perf's "llm" name, so callers
+can subtract it.
+
+replay() applies an interaction and times the rerun that follows. AppTest
+always reruns the whole script: its runner starts every run with empty
+fragment storage, so a single fragment cannot be rerun the way the
+Streamlit runtime does for a widget inside one. The benchmarks therefore
+only estimate a fragment rerun, from the time spent inside the
+fragment's own perf region (perf.timed() in embgpt.py) during whole-script
+reruns; the runtime's own per-rerun work is not included.
+"""
+import os
+import tempfile
+import time
+from contextlib import ExitStack
+from unittest.mock import patch
+
+from synthetic import ROOT, MemorySheets, synthetic_brd
+
+TMPDIR = tempfile.mkdtemp(prefix='embgpt_app_')
+os.environ['BRD_STORAGE_DB'] = os.path.join(TMPDIR, 'store.sqlite3')
+os.environ['BRD_SHEETS_SPOOL'] = os.path.join(TMPDIR, 'sheets_spool.jsonl')
+os.environ['BRD_REPLICA_DB'] = os.path.join(TMPDIR, 'brd_replica.sqlite3')
+os.environ['BRD_ANALYTICS_DIR'] = os.path.join(TMPDIR, 'analytics')
+os.environ['BRD_ASSET_CACHE'] = os.path.join(TMPDIR, 'asset_cache')
+
+import streamlit as st
+from streamlit.runtime.secrets import Secrets
+from streamlit.testing.v1 import AppTest
+
+import perf
+
+# Widget values for a complete form
+FORM_INPUTS = {
+    'client_name': 'Profile Client',
+    'project_description': 'A marketplace connecting vendors and customers',
+    'user_types': 'Customer\nVendor',
+    'deliverables': 'Web app\nMobile app',
+    'prepared_by': 'Benchmark',
+}
+
+
+class StubStream:
+    """messages.stream() context: streams text in chunks, timing itself as "llm" """
+
+    def __init__(self, text, chunk_chars, delay):
+        self.text = text
+        self.chunk_chars = chunk_chars
+        self.delay = delay
+        self.seconds = 0.0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        perf.record('llm', self.seconds)
+        return False
+
+    @property
+    def text_stream(self):
+        for start in range(0, len(self.text), self.chunk_chars):
+            started = time.perf_counter()
+            if self.delay:
+                time.sleep(self.delay)
+            chunk = self.text[start:start + self.chunk_chars]
+            self.seconds += time.perf_counter() - started
+            yield chunk
+
+
+class StubAnthropic:
+    """Anthropic client stand-in whose every stream is the same synthetic BRD part"""
+
+    requirements = 10
+    chunk_chars = 200
+    delay = 0.0
+
+    def __init__(self, api_key=None):
+        self.messages = self
+        self.text = synthetic_brd(self.requirements)
+
+    def stream(self, **kwargs):
+        return StubStream(self.text, self.chunk_chars, self.delay)
+
+    def with_options(self, **kwargs):
+        return self
+
+    def get(self, path, **kwargs):
+        # The warm-up's connection check
+        return None
+
+
+def stubbed_clients():
+    """Context manager patching the Anthropic and Sheets clients the app builds"""
+    stack = ExitStack()
+    stack.enter_context(patch('anthropic.Anthropic', StubAnthropic))
+    stack.enter_context(patch('sheets.SheetsClient', MemorySheets))
+    return stack
+
+
+def app_test(sheets_replica=False, warm_up=False):
+    """AppTest for embgpt.py; sheets_replica mirrors storage to the stub Sheets client"""
+    os.environ['BRD_SHEETS_REPLICA'] = '1' if sheets_replica else '0'
+    os.environ['BRD_WARM_UP'] = '1' if warm_up else '0'
+    at = AppTest.from_file(os.path.join(ROOT, 'embgpt.py'), default_timeout=120)
+    at.secrets['ANTHROPIC_API_KEY'] = 'benchmark'
+    if sheets_replica:
+        at.secrets['GOOGLE_SHEETS'] = {
+            name: 'benchmark' for name in ('project_id', 'private_key_id', 'private_key',
+                                           'client_email', 'client_id', 'client_x509_cert_url')
+        }
+    # AppTest only swaps its secrets in while a run executes; the warm-up
+    # thread reads them later, so they are installed process-wide as well
+    secrets = Secrets()
+    secrets._secrets = dict(at.secrets)
+    st.secrets = secrets
+    return at
+
+
+def seed_store(count=25):
+    """Stored BRDs for the history view, written straight to the app's database"""
+    import storage
+    from blob_store import BlobStore
+
+    db_path = os.environ['BRD_STORAGE_DB']
+    store = storage.SqliteStore(db_path, blob_store=BlobStore(db_path))
+    markdown_content = synthetic_brd(20)
+    for i in range(count):
+        store.save_content(storage.content_record(f"Client {i % 3}", f"v{i}", 'Benchmark',
+                                                  {'part1': markdown_content, 'part2': f"## Extra {i}\n"}))
+    store.close()
+
+
+def fill_form(at):
+    for key, value in FORM_INPUTS.items():
+        if key in ('client_name', 'prepared_by'):
+            at.text_input(key=key).input(value)
+        else:
+            at.text_area(key=key).input(value)
+
+
+def replay(at, action=None, i=0):
+    """Apply an interaction and rerun; returns (seconds, perf delta of the run)"""
+    if action is not None:
+        action(at, i)
+    before = perf.snapshot()
+    started = time.perf_counter()
+    at.run()
+    seconds = time.perf_counter() - started
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    return seconds, perf.delta(before)
+
+
+def describe(regions):
+    """Names that ran in a perf delta, with their counts"""
+    return ', '.join(f"{name}" + (f" x{n}" if n > 1 else '') for name, (n, _) in sorted(regions.items()))
@@ -0,0 +1,59 @@
+"""Bytes stored per BRD version: full compressed copies against BlobStore.
+
+Saves a chain of versions of one synthetic BRD, each editing a few
+sections of the previous one, and reports what each version adds to
+storage and how long rebuilding the latest version takes.
+
+    python benchmarks/bench_blob_store.py [requirements] [versions] [edits]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+import zlib
+
+from synthetic import sentence, split_parts, synthetic_brd
+
+from blob_store import BlobStore, split_sections
+
+
+def edit(parts, edits, rng):
+    """Copy of parts with a sentence added to `edits` random sections"""
+    parts = dict(parts)
+    for _ in range(edits):
+        key = rng.choice(['part2', 'part2', 'part3', 'part4'])
+        sections = split_sections(parts[key])
+        i = rng.randrange(len(sections))
+        sections[i] = sections[i].rstrip('\n') + ' ' + sentence(rng) + '\n\n'
+        parts[key] = ''.join(sections)
+    return parts
+
+
+def main(requirements=200, versions=10, edits=3):
+    rng = random.Random(0)
+    parts = split_parts(synthetic_brd(requirements))
+    with tempfile.TemporaryDirectory() as tmpdir:
+        store = BlobStore(os.path.join(tmpdir, 'blobs.sqlite3'))
+        full_total = 0
+        print(f"{'version':>8} {'raw KB':>8} {'full copy KB':>13} {'blob KB':>8} {'new blobs':>10}")
+        for n in range(1, versions + 1):
+            if n > 1:
+                parts = edit(parts, edits, rng)
+            full = sum(len(zlib.compress(text.encode('utf-8'), 9)) for text in parts.values())
+            full_total += full
+            report = store.put_version('Benchmark Client', f"v{n}", parts)
+            print(f"{'v' + str(n):>8} {report['raw_bytes'] / 1024:>8.1f} {full / 1024:>13.1f} "
+                  f"{report['stored_bytes'] / 1024:>8.1f} {report['new_blobs']:>10}")
+
+        started = time.perf_counter()
+        rebuilt = store.get_version('Benchmark Client', f"v{versions}")
+        rebuild_ms = (time.perf_counter() - started) * 1000
+        assert rebuilt == parts
+        print(f"\ntotal: full copies {full_total / 1024:.1f} KB, blob store "
+              f"{store.stored_bytes() / 1024:.1f} KB; rebuild v{versions} in {rebuild_ms:.1f} ms")
+        store.close()
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,43 @@
+"""Stored against raw size of BRD parts under content_codec.
+
+Encodes synthetic BRDs split into four parts the way the app stores them
+and reports the bytes written to Sheets, the number of chunk rows and
+the encode/decode time.
+
+    python benchmarks/bench_content_codec.py [requirements ...]
+"""
+import sys
+import time
+
+from synthetic import split_parts, synthetic_brd
+
+from content_codec import CELL_LIMIT, encode_parts, decode_part
+
+
+def main(sizes):
+    print(f"{'reqs':>6} {'raw KB':>8} {'stored KB':>10} {'ratio':>6} {'max part':>9} "
+          f"{'chunks':>7} {'enc ms':>7} {'dec ms':>7}")
+    for requirements in sizes:
+        parts = split_parts(synthetic_brd(requirements))
+        started = time.perf_counter()
+        cells, chunk_rows, report = encode_parts(parts)
+        encode_ms = (time.perf_counter() - started) * 1000
+
+        chunks = {}
+        for key, sequence, data in chunk_rows:
+            chunks.setdefault(key, {})[int(sequence)] = data
+        started = time.perf_counter()
+        decoded = {key: decode_part(cell, lambda k, n: [chunks[k][i] for i in range(n)])
+                   for key, cell in cells.items()}
+        decode_ms = (time.perf_counter() - started) * 1000
+        assert decoded == parts
+
+        largest = max(len(text) for text in parts.values())
+        print(f"{requirements:>6} {report['raw_bytes'] / 1024:>8.1f} "
+              f"{report['stored_bytes'] / 1024:>10.1f} {report['ratio']:>6.2f} "
+              f"{'over' if largest > CELL_LIMIT else 'fits':>9} {report['chunk_rows']:>7} "
+              f"{encode_ms:>7.1f} {decode_ms:>7.1f}")
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [10, 100, 500, 2000])
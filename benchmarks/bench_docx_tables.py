@@ -0,0 +1,80 @@
+"""DOCX table build time for long annexure tables.
+
+Compares filling a doc.add_table grid through table.cell(i, j), with a
+parse_xml shading element per header cell, against
+exporters.bulk_docx_table, which generates the w:tbl XML in one pass.
+
+    python benchmarks/bench_docx_tables.py [rows ...]
+
+The cell() path grows roughly quadratically, so it is skipped above
+LEGACY_MAX_ROWS rows.
+"""
+import sys
+import time
+from io import BytesIO
+
+from synthetic import annexure_table
+
+from bs4 import BeautifulSoup
+import markdown2
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls
+from docx.shared import Pt, RGBColor
+
+import exporters
+
+LEGACY_MAX_ROWS = 500
+
+
+def rows_for(count):
+    html = markdown2.markdown(annexure_table(count), extras=["tables"])
+    return exporters.table_rows(BeautifulSoup(html, 'html.parser').find('table'))
+
+
+def legacy_table(doc, table_data):
+    """The per-cell table fill the DOCX exporter used before"""
+    table = doc.add_table(rows=len(table_data), cols=len(table_data[0]))
+    table.style = 'Table Grid'
+    for i, row in enumerate(table_data):
+        for j, cell in enumerate(row):
+            table.cell(i, j).text = cell
+            paragraph = table.cell(i, j).paragraphs[0]
+            run = paragraph.runs[0]
+            run.font.name = 'Poppins'
+            if i == 0:
+                run.font.bold = True
+                run.font.size = Pt(10)
+                paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
+                shading_elm = parse_xml(r'<w:shd {} w:fill="11A64A"/>'.format(nsdecls('w')))
+                table.cell(i, j)._element.get_or_add_tcPr().append(shading_elm)
+                run.font.color.rgb = RGBColor(255, 255, 255)
+            else:
+                run.font.size = Pt(9)
+
+
+def time_build(build, rows):
+    doc = exporters.new_docx_document()
+    started = time.perf_counter()
+    build(doc, rows)
+    built = time.perf_counter() - started
+    buffer = BytesIO()
+    doc.save(buffer)
+    return built, time.perf_counter() - started
+
+
+def main(row_counts):
+    print(f"{'rows':>6} {'cell() s':>9} {'+save s':>8} {'bulk s':>7} {'+save s':>8} {'speedup':>8}")
+    for count in row_counts:
+        rows = rows_for(count)
+        after, after_total = time_build(exporters.bulk_docx_table, rows)
+        if count > LEGACY_MAX_ROWS:
+            print(f"{count:>6} {'-':>9} {'-':>8} {after:>7.3f} {after_total:>8.3f} {'-':>8}")
+            continue
+        before, before_total = time_build(legacy_table, rows)
+        print(f"{count:>6} {before:>9.3f} {before_total:>8.3f} {after:>7.3f} {after_total:>8.3f}"
+              f" {before / after:>7.0f}x")
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [100, 500, 2000])
@@ -0,0 +1,71 @@
+"""HTML walk cost for BRDs with long lists.
+
+Compares the previous traversal (recursive find_all over every block tag,
+numbering items with find_previous_siblings) with exporters.walk_blocks and
+iter_list_items, and reports how many blocks each emits. The old walk
+emits nested lists and list paragraphs twice.
+
+    python benchmarks/bench_html_walker.py [items ...]
+"""
+import sys
+import time
+
+from synthetic import long_list
+
+from bs4 import BeautifulSoup
+import markdown2
+
+import exporters
+
+LEGACY_TAGS = ['h1', 'h2', 'h3', 'h4', 'p', 'pre', 'table', 'ul', 'ol']
+
+
+def legacy_walk(soup):
+    emitted = 0
+    for element in soup.find_all(LEGACY_TAGS):
+        if element.name in ['ul', 'ol']:
+            for li in element.find_all('li'):
+                bullet = '•' if element.name == 'ul' else f"{li.find_previous_siblings('li').__len__() + 1}."
+                f"{bullet} {li.text}"
+                emitted += 1
+        else:
+            element.text
+            emitted += 1
+    return emitted
+
+
+def walker(soup):
+    emitted = 0
+    for element in exporters.walk_blocks(soup):
+        if element.name in ['ul', 'ol']:
+            for _ in exporters.iter_list_items(element):
+                emitted += 1
+        else:
+            element.text
+            emitted += 1
+    return emitted
+
+
+def best_of(func, soup, repeat=3):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        emitted = func(soup)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, emitted
+
+
+def main(item_counts):
+    print(f"{'items':>6} {'legacy ms':>10} {'blocks':>7} {'walker ms':>10} {'blocks':>7}")
+    for items in item_counts:
+        markdown = "## Requirements\n\n" + long_list(items, ordered=True, nested_every=5)
+        soup = BeautifulSoup(markdown2.markdown(markdown, extras=["tables", "fenced-code-blocks"]),
+                             'html.parser')
+        before, before_blocks = best_of(legacy_walk, soup)
+        after, after_blocks = best_of(walker, soup)
+        print(f"{items:>6} {before * 1000:>10.1f} {before_blocks:>7} {after * 1000:>10.1f} {after_blocks:>7}")
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [100, 500, 2000])
@@ -0,0 +1,77 @@
+"""PDF layout time for long annexure tables.
+
+Compares three layouts of the same annexure, best of REPEATS runs each:
+
+    Table       plain Table(data) of cell Paragraphs, sized by ReportLab
+    Paragraphs  LongTable of cell Paragraphs with planned column widths
+    large mode  exporters.build_pdf_table: planned widths, body cells
+                pre-wrapped from cached font metrics and drawn as text
+
+    python benchmarks/bench_large_tables.py [rows ...]
+"""
+import sys
+import time
+
+from synthetic import annexure_table
+
+from bs4 import BeautifulSoup
+import markdown2
+from reportlab.platypus import LongTable, Paragraph, Table
+
+import exporters
+
+REPEATS = 3
+
+
+def table_rows(rows):
+    html = markdown2.markdown(annexure_table(rows), extras=["tables"])
+    soup = BeautifulSoup(html, 'html.parser')
+    return [[cell.get_text(separator='\n', strip=True) for cell in tr.find_all(['td', 'th'])]
+            for tr in soup.find_all('tr')]
+
+
+def plain_table(rows):
+    style = exporters.get_pdf_styles()['CustomBodyText']
+    table = Table([[Paragraph(text, style) for text in row] for row in rows])
+    table.setStyle(exporters.PDF_TABLE_STYLE)
+    return table
+
+
+def paragraph_long_table(rows):
+    style = exporters.get_pdf_styles()['CustomBodyText']
+    col_widths = exporters.plan_column_widths(rows, style.fontName, style.fontSize)
+    table = LongTable([[Paragraph(text, style) for text in row] for row in rows],
+                      colWidths=col_widths, repeatRows=1, splitByRow=1)
+    table.setStyle(exporters.PDF_TABLE_STYLE)
+    return table
+
+
+def time_layout(build, rows):
+    """Best wall time of REPEATS builds and layouts, and the page count"""
+    best = None
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        pdf = exporters.render_pdf([build(rows)]).getvalue()
+        seconds = time.perf_counter() - started
+        best = seconds if best is None else min(best, seconds)
+    return best, pdf.count(b'/Type /Page\n')
+
+
+def main(row_counts):
+    print(f"{'rows':>6} {'Table s':>9} {'Paragraphs s':>13} {'large mode s':>13} {'speedup':>8} {'pages':>12}")
+    for count in row_counts:
+        rows = table_rows(count)
+        try:
+            before, _ = time_layout(plain_table, rows)
+            before_text = f"{before:>9.2f}"
+        except Exception as e:
+            before, before_text = None, f"{type(e).__name__:>9}"
+        paragraphs, paragraph_pages = time_layout(paragraph_long_table, rows)
+        after, pages = time_layout(exporters.build_pdf_table, rows)
+        speedup = f"{before / after:>7.1f}x" if before else f"{'-':>8}"
+        print(f"{count:>6} {before_text} {paragraphs:>13.2f} {after:>13.2f} {speedup} "
+              f"{f'{paragraph_pages} -> {pages}':>12}")
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [100, 500, 2000])
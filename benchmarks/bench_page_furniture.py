@@ -0,0 +1,76 @@
+"""Per-page cost of the PDF page furniture (border, page number, watermark).
+
+Renders a body of N plain pages and compares the current Form XObject
+callback against the previous one, which built a new ImageReader and
+re-decoded watermark.png on every page.
+
+    python benchmarks/bench_page_furniture.py [pages ...]
+"""
+import sys
+import time
+
+import synthetic  # noqa: F401  (puts the repo root on sys.path)
+
+from reportlab.lib.utils import ImageReader
+from reportlab.lib.units import cm
+from reportlab.platypus import PageBreak, Paragraph
+
+import exporters
+
+
+def legacy_page_furniture(canvas, doc):
+    """The callback as it was before the watermark form was cached"""
+    canvas.saveState()
+    if canvas.getPageNumber() == 1:
+        canvas.setStrokeColor(exporters.BORDER_COLOR)
+        canvas.setLineWidth(2)
+        margin = 30
+        canvas.rect(margin, margin, doc.pagesize[0] - 2*margin, doc.pagesize[1] - 2*margin,
+                    stroke=1, fill=0)
+    else:
+        canvas.setFont('Poppins', 9)
+        canvas.drawRightString(doc.width + doc.rightMargin, doc.bottomMargin,
+                               f"Page {canvas.getPageNumber() - 1}")
+        watermark = ImageReader('watermark.png')
+        canvas.drawImage(watermark, doc.width + doc.rightMargin - 2*cm,
+                         doc.height + doc.topMargin - 1*cm, width=2*cm, height=2*cm,
+                         mask='auto', preserveAspectRatio=True)
+    canvas.restoreState()
+
+
+def body(pages):
+    style = exporters.get_pdf_styles()['CustomBodyText']
+    flowables = []
+    for i in range(pages):
+        flowables.append(Paragraph(f"Page body {i}", style))
+        flowables.append(PageBreak())
+    return flowables
+
+
+def time_render(pages, callback, repeat=3):
+    best = None
+    for _ in range(repeat):
+        original = exporters.draw_page_furniture
+        exporters.draw_page_furniture = callback
+        try:
+            started = time.perf_counter()
+            size = len(exporters.render_pdf(body(pages)).getvalue())
+            elapsed = time.perf_counter() - started
+        finally:
+            exporters.draw_page_furniture = original
+        best = elapsed if best is None else min(best, elapsed)
+    return best, size
+
+
+def main(page_counts):
+    current = exporters.draw_page_furniture
+    print(f"{'pages':>6} {'before ms/page':>15} {'after ms/page':>14} {'before KB':>10} {'after KB':>9}")
+    for pages in page_counts:
+        before, before_size = time_render(pages, legacy_page_furniture)
+        after, after_size = time_render(pages, current)
+        print(f"{pages:>6} {before / pages * 1000:>15.2f} {after / pages * 1000:>14.2f}"
+              f" {before_size / 1024:>10.0f} {after_size / 1024:>9.0f}")
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [10, 60])
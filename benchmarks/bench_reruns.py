@@ -0,0 +1,72 @@
+"""Work done per interaction: whole-script reruns, and the fragment's share.
+
+Runs embgpt.py under Streamlit's AppTest with a stored BRD open in the
+history view, and replays form and history interactions as whole-script
+reruns, which is how every interaction ran before the page was split
+into fragments. For each interaction it reports the median rerun time
+and the regions that executed, read from the perf counters.
+
+The Streamlit runtime now reruns only the fragment that owns the widget,
+but AppTest cannot (see app_harness.py), so no fragment rerun is
+measured here. The "fragment region est." column is the time spent
+inside that fragment's perf region during the whole-script reruns: an
+in-script estimate that leaves out the runtime's own per-rerun work.
+
+    python benchmarks/bench_reruns.py [repeats]
+"""
+import os
+import statistics
+import sys
+import time
+
+from app_harness import ROOT, app_test, describe, replay, seed_store
+
+import perf
+
+# (label, perf region of the fragment owning the widget, action on the AppTest)
+INTERACTIONS = [
+    ('type client name', 'brd_form', lambda at, i: at.text_input(key='client_name').input(f"Client {i}")),
+    ('type description', 'brd_form',
+     lambda at, i: at.text_area(key='project_description').input(f"A marketplace, take {i}")),
+    ('change version', 'brd_form', lambda at, i: at.text_input(key='version_number').input(f"v{i}")),
+    ('history page', 'brd_history', lambda at, i: at.number_input(key='history_page').set_value(i % 3 + 1)),
+]
+
+
+def rerun_ms(runs, fragment):
+    """Median ms of replayed reruns, and of the fragment's region within them
+
+    The region time is an in-script estimate of a fragment rerun, not a
+    measured one.
+    """
+    full_ms = statistics.median(seconds for seconds, _ in runs) * 1000
+    region_ms = statistics.median(regions.get(fragment, (0, 0.0))[1] for _, regions in runs) * 1000
+    return full_ms, region_ms
+
+
+def main(repeats=5):
+    seed_store()
+    at = app_test()
+
+    before = perf.snapshot()
+    started = time.perf_counter()
+    at.run()
+    print(f"first run: {(time.perf_counter() - started) * 1000:.0f} ms, regions: {describe(perf.delta(before))}")
+    # Open a stored BRD so its downloads are on the page, as they would
+    # be for a user working through the history
+    at.button(key='history_load').click().run()
+
+    print(f"\n{'interaction':<20} {'whole script ms':>16} {'fragment region est. ms':>24}  "
+          "regions of a whole-script rerun")
+    for label, fragment, action in INTERACTIONS:
+        runs = [replay(at, action, i) for i in range(repeats)]
+        full_ms, region_ms = rerun_ms(runs, fragment)
+        print(f"{label:<20} {full_ms:>16.1f} {region_ms:>24.1f}  {describe(runs[-1][1])}")
+    print("\nfragment region est.: time inside the fragment during whole-script reruns, "
+          "not a measured fragment rerun")
+
+
+if __name__ == '__main__':
+    os.chdir(ROOT)
+    sys.path.insert(0, ROOT)
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,95 @@
+"""Save and lookup throughput per storage backend.
+
+Runs the same workload against MemoryStore, SqliteStore and a SqliteStore
+replicated to Sheets through SheetsReplica. The replica talks to an
+in-memory Sheets client (synthetic.MemorySheets), so the numbers show the
+cost the app pays on the request path (queueing and spooling), not Sheets
+latency.
+
+    python benchmarks/bench_storage.py [brds ...]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+from synthetic import MemorySheets, synthetic_brd
+
+import storage
+from download_counters import DownloadCounters
+from write_behind import WriteBehindQueue
+
+
+def make_backends(tmpdir):
+    sheets = MemorySheets()
+    queue = WriteBehindQueue(sheets, os.path.join(tmpdir, 'spool.jsonl'),
+                             writes_per_minute=10 ** 9)
+    counters = DownloadCounters(sheets, queue)
+    backends = {
+        'memory': storage.MemoryStore(),
+        'sqlite': storage.SqliteStore(os.path.join(tmpdir, 'store.sqlite3')),
+        'sqlite+sheets': storage.ReplicatedStore(
+            storage.SqliteStore(os.path.join(tmpdir, 'replicated.sqlite3')),
+            storage.SheetsReplica(queue, counters)
+        )
+    }
+    return backends, [counters.close, queue.close]
+
+
+def form_data(i):
+    return {
+        'client_name': f"Client {i}",
+        'project_description': 'Benchmark project',
+        'user_types': 'Customer\nAdmin',
+        'deliverables': 'Web app',
+        'prepared_by': 'Benchmark',
+        'document_date': '2024-01-01',
+        'version_number': 'v1'
+    }
+
+
+def run(store, brds, parts):
+    started = time.perf_counter()
+    for i in range(brds):
+        store.save_form(storage.form_record(form_data(i)))
+        store.save_content(storage.content_record(f"Client {i}", 'v1', 'Benchmark', parts))
+    save_seconds = time.perf_counter() - started
+
+    rng = random.Random(0)
+    lookups = [rng.randrange(brds) for _ in range(brds * 5)]
+    started = time.perf_counter()
+    for i in lookups:
+        store.get_content(f"Client {i}", 'v1')
+    lookup_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for i in lookups:
+        store.increment_download(f"Client {i}", 'v1', 'PDF')
+    count_seconds = time.perf_counter() - started
+    return brds / save_seconds, len(lookups) / lookup_seconds, len(lookups) / count_seconds
+
+
+def main(sizes):
+    markdown_content = synthetic_brd(20)
+    quarter = len(markdown_content) // 4
+    parts = {f"part{i + 1}": markdown_content[i * quarter:(i + 1) * quarter] for i in range(4)}
+
+    print(f"{'backend':>14} {'brds':>6} {'saves/s':>10} {'lookups/s':>10} {'counts/s':>10}")
+    for brds in sizes:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            backends, closers = make_backends(tmpdir)
+            for name, store in backends.items():
+                saves, lookups, counts = run(store, brds, parts)
+                print(f"{name:>14} {brds:>6} {saves:>10.0f} {lookups:>10.0f} {counts:>10.0f}")
+                if isinstance(store, storage.ReplicatedStore):
+                    report = store.replica.storage_report()
+                    print(f"{'':>14} Sheets cells: {report['stored_bytes']} bytes for "
+                          f"{report['raw_bytes']} raw ({report['ratio']:.0%})")
+                store.close()
+            for close in closers:
+                close()
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [100, 1000])
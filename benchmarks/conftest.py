@@ -0,0 +1,51 @@
+"""pytest setup for the export benchmark suite.
+
+    python -m pytest benchmarks -q
+
+Fonts and images are loaded from paths relative to the repo root, so the
+suite always runs from there. Every benchmark appends a record to the
+session's results, which are written out as JSON when the run ends.
+"""
+import json
+import os
+import platform
+import sys
+from datetime import datetime
+
+import pytest
+
+import synthetic
+
+os.chdir(synthetic.ROOT)
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BUDGETS = os.path.join(BENCHMARKS_DIR, 'budgets.json')
+RESULTS_DIR = os.path.join(BENCHMARKS_DIR, 'results')
+
+
+@pytest.fixture(scope='session')
+def budgets():
+    """Budgets keyed by case name then format, from BRD_BENCH_BUDGETS or budgets.json"""
+    with open(os.environ.get('BRD_BENCH_BUDGETS', DEFAULT_BUDGETS)) as f:
+        return json.load(f)
+
+
+@pytest.fixture(scope='session')
+def bench_results():
+    """Collects benchmark records and writes them to BRD_BENCH_RESULTS at the end"""
+    records = []
+    yield records
+    if not records:
+        return
+    path = os.environ.get('BRD_BENCH_RESULTS')
+    if not path:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, datetime.now().strftime('%Y%m%d-%H%M%S') + '.json')
+    with open(path, 'w') as f:
+        json.dump({
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'results': records
+        }, f, indent=2)
+    print(f"\nBenchmark results written to {path}")
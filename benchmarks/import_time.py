@@ -0,0 +1,124 @@
+"""Cold-start import cost of embgpt.py.
+
+Runs the module-level import statements of embgpt.py in a fresh
+interpreter under `python -X importtime` and reports the cumulative
+time per import and for the heavy export, persistence and analytics
+stacks. With --against, the same is measured on a git revision (checked
+out into a temporary directory) and shown side by side.
+
+    python benchmarks/import_time.py [--against REV] [--runs N]
+"""
+import argparse
+import ast
+import os
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+from io import BytesIO
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Packages the app only needs once a BRD is exported, saved or analysed
+HEAVY = ('reportlab', 'docx', 'bs4', 'markdown2', 'lxml', 'gspread', 'google.auth',
+         'google.oauth2', 'pandas', 'pyarrow', 'anthropic')
+
+
+def import_code(source):
+    """The top-level import statements of a module, as one script"""
+    nodes = [node for node in ast.parse(source).body
+             if isinstance(node, (ast.Import, ast.ImportFrom))]
+    return '\n'.join(ast.unparse(node) for node in nodes)
+
+
+def importtime(directory, code):
+    """(name, self us, cumulative us, nested) per module imported by code"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=directory,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        entries.append((name.strip(), int(own), int(cumulative), name[1:].startswith(' ')))
+    return entries
+
+
+def measure(directory, code, startup):
+    """Top-level cumulative us per import, and self us per heavy package"""
+    top = {}
+    heavy = {}
+    for name, own, cumulative, nested in importtime(directory, code):
+        if name in startup:
+            continue
+        if not nested:
+            top[name] = cumulative
+        for package in HEAVY:
+            if name == package or name.startswith(package + '.'):
+                heavy[package] = heavy.get(package, 0) + own
+    return top, heavy
+
+
+def profile(directory, runs):
+    """Median cold-start numbers over several interpreters"""
+    with open(os.path.join(directory, 'embgpt.py'), encoding='utf-8') as f:
+        code = import_code(f.read())
+    # Modules the interpreter loads before running any code
+    startup = {entry[0] for entry in importtime(directory, 'pass')}
+    samples = [measure(directory, code, startup) for _ in range(runs)]
+    totals = [sum(top.values()) for top, _ in samples]
+    top, heavy = samples[totals.index(sorted(totals)[len(totals) // 2])]
+    return {
+        'total_ms': statistics.median(totals) / 1000,
+        'top': {name: us / 1000 for name, us in top.items()},
+        'heavy': {name: us / 1000 for name, us in heavy.items()}
+    }
+
+
+def checkout(rev, directory):
+    archive = subprocess.run(['git', 'archive', rev], cwd=ROOT, capture_output=True, check=True)
+    with tarfile.open(fileobj=BytesIO(archive.stdout)) as tar:
+        tar.extractall(directory)
+
+
+def print_table(title, rows, columns):
+    width = max(12, max(len(column) for column in columns) + 2)
+    name_width = max([28] + [len(name) + 2 for name, _ in rows])
+    print(f"\n{title}")
+    print(f"{'':<{name_width}}" + ''.join(f"{column:>{width}}" for column in columns))
+    for name, values in rows:
+        print(f"{name:<{name_width}}" + ''.join(f"{'-' if v is None else f'{v:.1f}':>{width}}" for v in values))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--against', help='git revision to compare with')
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    results = {'working tree': profile(ROOT, args.runs)}
+    if args.against:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            checkout(args.against, tmpdir)
+            results = {args.against: profile(tmpdir, args.runs), **results}
+
+    columns = list(results)
+    names = sorted({name for r in results.values() for name in r['top']},
+                   key=lambda name: -max(r['top'].get(name, 0) for r in results.values()))
+    rows = [(name, [r['top'].get(name) for r in results.values()]) for name in names[:15]]
+    rows.append(('total (ms)', [r['total_ms'] for r in results.values()]))
+    print_table('Cumulative import time of embgpt.py imports (ms)', rows, columns)
+
+    rows = [(name, [r['heavy'].get(name) for r in results.values()]) for name in HEAVY]
+    print_table('Heavy stacks loaded at startup (ms, - = not imported)', rows, columns)
+
+    if args.against:
+        before, after = (r['total_ms'] for r in results.values())
+        print(f"\ncold start: {before:.0f} ms -> {after:.0f} ms ({(before - after) / before:.0%} less)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,201 @@
+"""Startup and rerun profile of embgpt.py, with a history to catch regressions.
+
+Measures, with the Anthropic and Google Sheets clients stubbed out (see
+app_harness.py):
+
+  cold import     the app's imports in a fresh interpreter (import_time.py)
+  first render    the first run of the script in this process
+  warm-up         the background warm-up started by the first render
+                  (get_warm_up() in embgpt.py), waited for before the
+                  measurements below
+  rerun           a full rerun with nothing changed
+  interactions    each form and history interaction as a whole-script
+                  rerun, plus *_fragment_region_ms: the time inside the
+                  fragment that owns the widget during those reruns, an
+                  in-script estimate rather than a measured fragment rerun
+  generate        clicking Generate BRD on a filled form, minus the time
+                  spent inside the stubbed LLM stream
+
+and prints the time of each top-level block of the script (perf.block()
+in embgpt.py) for the first render, a rerun and the generate click, and
+of each warm-up step. Each run is appended to a JSON lines history file.
+Every metric is compared with the median of the last few runs in that
+file recorded on the same machine, and a metric is flagged when it is
+both more than --tolerance slower and more than --min-ms slower. With
+--check, a flagged metric makes the exit status 1.
+
+The default history, benchmarks/profile_history.jsonl, is committed and
+is the baseline for regressions: commit the appended run together with
+a change that moves the numbers. Pass --no-record for exploratory runs,
+or --history with a path under benchmarks/results (ignored by git) to
+keep a private one.
+
+    python benchmarks/profile_app.py [--repeats N] [--history PATH] [--check] [--no-record]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+from app_harness import ROOT, app_test, describe, fill_form, replay, seed_store, stubbed_clients
+from bench_reruns import INTERACTIONS, rerun_ms
+from import_time import print_table, profile
+
+import perf
+
+
+DEFAULT_HISTORY = os.path.join(ROOT, 'benchmarks', 'profile_history.jsonl')
+# Previous runs the current one is compared with
+BASELINE_RUNS = 5
+WARM_UP_TIMEOUT = 120
+
+
+def blocks_ms(regions):
+    """{name: ms} from a perf delta, dropping names that are only counted"""
+    return {name: seconds * 1000 for name, (_, seconds) in regions.items() if seconds}
+
+
+def wait_for_warm_up(timeout=WARM_UP_TIMEOUT):
+    """{step: ms} of the app's warm-up once it has finished"""
+    deadline = time.monotonic() + timeout
+    while 'warm_up' not in perf.snapshot():
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"Warm-up did not finish within {timeout} s")
+        time.sleep(0.05)
+    return {name: seconds * 1000 for name, (_, seconds) in perf.snapshot().items()
+            if name.startswith('warm_up')}
+
+
+def profile_app(repeats):
+    """(metrics, blocks): {name: ms} and {phase: {block: ms}}"""
+    metrics = {}
+    blocks = {}
+    with stubbed_clients():
+        at = app_test(sheets_replica=True, warm_up=True)
+        seconds, regions = replay(at)
+        metrics['first_render_ms'] = seconds * 1000
+        blocks['first render'] = blocks_ms(regions)
+        blocks['warm-up'] = wait_for_warm_up()
+        metrics['warm_up_ms'] = blocks['warm-up']['warm_up']
+
+        seed_store()
+        runs = [replay(at) for _ in range(repeats + 1)][1:]
+        seconds, regions = sorted(runs, key=lambda run: run[0])[len(runs) // 2]
+        metrics['rerun_ms'] = seconds * 1000
+        blocks['rerun'] = blocks_ms(regions)
+
+        at.button(key='history_load').click().run()
+        for label, fragment, action in INTERACTIONS:
+            runs = [replay(at, action, i) for i in range(repeats)]
+            name = label.replace(' ', '_')
+            metrics[f"{name}_ms"], metrics[f"{name}_fragment_region_ms"] = rerun_ms(runs, fragment)
+            print(f"{label}: {describe(runs[-1][1])}")
+
+        at.run()
+        fill_form(at)
+        at.run()
+        at.button(key='generate_brd').click()
+        seconds, regions = replay(at)
+        llm_seconds = regions.get('llm', (0, 0.0))[1]
+        metrics['generate_overhead_ms'] = (seconds - llm_seconds) * 1000
+        blocks['generate'] = blocks_ms(regions)
+        if not regions.get('llm'):
+            raise RuntimeError('Generate BRD did not reach the LLM; check the form inputs')
+    return metrics, blocks
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT,
+                               capture_output=True, text=True, check=True).stdout.strip()
+        return commit + ('-dirty' if dirty else '')
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def baselines(history, machine=None):
+    """{metric: median ms} over the last BASELINE_RUNS records from machine"""
+    if machine is not None:
+        history = [record for record in history if record.get('machine') == machine]
+    values = {}
+    for record in history[-BASELINE_RUNS:]:
+        for name, value in record['metrics'].items():
+            values.setdefault(name, []).append(value)
+    return {name: statistics.median(previous) for name, previous in values.items()}
+
+
+def regressions(metrics, baseline, tolerance, min_ms):
+    """(name, baseline ms, current ms) for metrics slower than their baseline"""
+    found = []
+    for name, value in metrics.items():
+        before = baseline.get(name)
+        if before is not None and value > before * (1 + tolerance) and value - before > min_ms:
+            found.append((name, before, value))
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--repeats', type=int, default=5, help='runs per measurement, the median is kept')
+    parser.add_argument('--history', default=DEFAULT_HISTORY, help='JSON lines file of previous runs')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed slowdown as a fraction')
+    parser.add_argument('--min-ms', type=float, default=5.0, help='ignore slowdowns smaller than this')
+    parser.add_argument('--check', action='store_true', help='exit 1 when a metric regressed')
+    parser.add_argument('--no-record', action='store_true', help='do not append this run to the history')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    metrics = {'cold_import_ms': profile(ROOT, args.repeats)['total_ms']}
+    app_metrics, blocks = profile_app(args.repeats)
+    metrics.update(app_metrics)
+
+    phases = list(blocks)
+    names = sorted({name for phase in blocks.values() for name in phase},
+                   key=lambda name: -max(phase.get(name, 0) for phase in blocks.values()))
+    print_table('Time per block (ms, - = did not run)',
+                [(name, [blocks[phase].get(name) for phase in phases]) for name in names], phases)
+
+    baseline = baselines(load_history(args.history), platform.node())
+    found = regressions(metrics, baseline, args.tolerance, args.min_ms)
+    print_table(f"Metrics (ms; baseline = median of last {BASELINE_RUNS} runs on this machine)",
+                [(name, [baseline.get(name), value]) for name, value in metrics.items()],
+                ['baseline', 'this run'])
+
+    if not args.no_record:
+        os.makedirs(os.path.dirname(os.path.abspath(args.history)), exist_ok=True)
+        record = {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'machine': platform.node(),
+            'metrics': metrics,
+            'blocks': blocks
+        }
+        with open(args.history, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record) + '\n')
+
+    print(f"\nprofiled in {time.perf_counter() - started:.0f} s")
+    for name, before, after in found:
+        print(f"REGRESSION {name}: {before:.1f} ms -> {after:.1f} ms (+{(after - before) / before:.0%})")
+    if found and args.check:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    os.chdir(ROOT)
+    sys.path.insert(0, ROOT)
+    main()
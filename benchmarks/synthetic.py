@@ -0,0 +1,140 @@
+"""Synthetic BRD markdown and an in-memory Sheets client for the benchmarks.
+
+The generated documents mimic what the four prompts produce: numbered
+headings, body paragraphs, bullet and numbered lists, and the annexure
+requirement tables, with sizes controlled by the number of requirements.
+"""
+import os
+import random
+import re
+import sys
+
+# Benchmarks run from a checkout, import the app modules from the repo root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+WORDS = (
+    "user admin panel dashboard order payment booking profile notification "
+    "search filter report export vendor catalogue inventory approval workflow "
+    "secure login session audit analytics invoice refund rating review support "
+    "ticket schedule calendar reminder integration gateway sync mobile web"
+).split()
+
+
+SHEET1_HEADERS = ['Timestamp', 'Client_Name', 'Project_Description', 'User_Types', 'Deliverables',
+                  'Prepared_By', 'Document_Date', 'Version_Number', 'Download_Count_MD',
+                  'Download_Count_PDF', 'Download_Count_DOCX']
+
+
+class MemorySheets:
+    """sheets.SheetsClient stand-in holding each worksheet as a list of rows"""
+
+    def __init__(self, credentials_info=None, spreadsheet_name=None, worksheet_headers=None):
+        self.rows = {'Sheet1': [list(SHEET1_HEADERS)]}
+        for title, headers in (worksheet_headers or {}).items():
+            self.rows[title] = [list(headers)]
+
+    def spreadsheet(self):
+        # Authorizing is what the app's warm-up pays for; nothing to do here
+        return None
+
+    def call(self, title, method, *args, **kwargs):
+        rows = self.rows.setdefault(title, [])
+        if method == 'get_all_values':
+            return [list(row) for row in rows]
+        if method == 'row_values':
+            return list(rows[args[0] - 1]) if args[0] <= len(rows) else []
+        if method == 'get_values':
+            start = int(re.match(r'[A-Z]+(\d+)', args[0]).group(1))
+            return [list(row) for row in rows[start - 1:]]
+        if method == 'append_rows':
+            rows.extend(list(row) for row in args[0])
+        elif method == 'append_row':
+            rows.append(list(args[0]))
+        # batch_update and anything else is accepted and dropped
+        return None
+
+
+def sentence(rng, words=14):
+    text = " ".join(rng.choice(WORDS) for _ in range(words))
+    return text.capitalize() + "."
+
+
+def paragraph(rng, sentences=3):
+    return " ".join(sentence(rng) for _ in range(sentences))
+
+
+def annexure_table(rows, seed=0, prefix="UP"):
+    """Markdown requirements table with the annexure's three columns"""
+    rng = random.Random(seed)
+    lines = [
+        "| Requirement ID | Module/Feature | Description |",
+        "|----------------|----------------|-------------|",
+    ]
+    for i in range(1, rows + 1):
+        module = " ".join(rng.choice(WORDS) for _ in range(2)).title()
+        lines.append(f"| REQ-{prefix}-{i:03d} | {module} | {paragraph(rng, 2)} |")
+    return "\n".join(lines) + "\n"
+
+
+def long_list(items, seed=0, ordered=False, nested_every=0):
+    """Markdown list, optionally with a nested sub-list every nested_every items"""
+    rng = random.Random(seed)
+    lines = []
+    for i in range(1, items + 1):
+        marker = f"{i}." if ordered else "-"
+        lines.append(f"{marker} {sentence(rng, 10)}")
+        if nested_every and i % nested_every == 0:
+            for _ in range(2):
+                lines.append(f"    - {sentence(rng, 6)}")
+    return "\n".join(lines) + "\n"
+
+
+def synthetic_brd(requirements, table_density=1.0, list_density=1.0, seed=0):
+    """Synthetic BRD markdown with roughly `requirements` functional requirements
+
+    table_density scales how many requirements also appear as annexure table
+    rows, list_density how many bullet points each module carries.
+    """
+    rng = random.Random(seed)
+    out = ["## 1. Executive Summary\n", paragraph(rng, 5) + "\n",
+           "## 2. Project Approach\n", paragraph(rng, 4) + "\n",
+           "| Phase | Milestone | Duration |", "|-------|-----------|----------|"]
+    for i in range(1, 7):
+        out.append(f"| Phase {i} | {sentence(rng, 4)} | {rng.randint(1, 6)} weeks |")
+    out.append("")
+    out.append("## 3. Functional Requirements\n")
+    bullets = max(0, int(round(3 * list_density)))
+    for i in range(1, requirements + 1):
+        out.append(f"### 3.{i} {' '.join(rng.choice(WORDS) for _ in range(3)).title()}\n")
+        out.append(paragraph(rng, 3) + "\n")
+        if bullets:
+            out.append(long_list(bullets, seed=seed + i))
+    out.append("## 4. Non-Functional Requirements\n")
+    out.append(long_list(10, seed=seed, ordered=True))
+    out.append("```\nGET /api/v1/health\nHTTP/1.1 200 OK\n```\n")
+    table_rows = int(requirements * table_density)
+    if table_rows:
+        out.append("## Annexure\n")
+        out.append("### a. Functional Requirements\n")
+        out.append(annexure_table(table_rows, seed=seed))
+    return "\n".join(out)
+
+
+def split_parts(markdown_content):
+    """Four parts with Part 2 the largest, as the prompts produce"""
+    size = len(markdown_content)
+    bounds = [0, size // 10, size * 7 // 10, size * 9 // 10, size]
+    return {f"part{i + 1}": markdown_content[bounds[i]:bounds[i + 1]] for i in range(4)}
+
+
+def cover_metadata():
+    """Cover details in the shape the exporters expect"""
+    from datetime import date
+    return {
+        'client_name': 'Benchmark Client',
+        'prepared_by': 'Benchmark',
+        'document_date': date(2024, 1, 1),
+        'version_number': 'v1'
+    }
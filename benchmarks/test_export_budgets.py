@@ -0,0 +1,103 @@
+"""Export benchmarks with performance budgets.
+
+Times convert_markdown_to_pdf and convert_markdown_to_docx on synthetic
+BRDs from 10 to 2000 requirements, and records peak Python memory and
+output size. A case fails when any measurement exceeds its entry in
+budgets.json (or the file named by BRD_BENCH_BUDGETS). Results go to
+benchmarks/results/<timestamp>.json, or BRD_BENCH_RESULTS.
+
+    python -m pytest benchmarks -q              # all but the slow cases
+    python -m pytest benchmarks -q -m slow      # list-heavy and large only
+    python -m pytest benchmarks -q -m ""        # every case
+    BRD_BENCH_CASES=small,medium python -m pytest benchmarks -q
+
+The slow cases are deselected by default through addopts in pytest.ini.
+"""
+import os
+import time
+import tracemalloc
+
+import pytest
+
+from synthetic import synthetic_brd, cover_metadata
+
+import exporters
+
+# name: (requirements, table_density, list_density)
+CASES = {
+    'small': (10, 1.0, 1.0),
+    'medium': (100, 1.0, 1.0),
+    'table-heavy': (200, 3.0, 0.5),
+    'list-heavy': (500, 0.5, 2.0),
+    'large': (2000, 0.25, 0.5)
+}
+SLOW_CASES = {'list-heavy', 'large'}
+
+CONVERTERS = {
+    'pdf': exporters.convert_markdown_to_pdf,
+    'docx': exporters.convert_markdown_to_docx
+}
+
+
+def selected_cases():
+    names = os.environ.get('BRD_BENCH_CASES')
+    names = [n.strip() for n in names.split(',')] if names else list(CASES)
+    return [pytest.param(name, marks=pytest.mark.slow) if name in SLOW_CASES else name
+            for name in names]
+
+
+def measure(convert, markdown_content, cover):
+    """Wall time of one untraced run, then peak memory of a traced run"""
+    started = time.perf_counter()
+    output = convert(markdown_content, cover).getvalue()
+    seconds = time.perf_counter() - started
+
+    # tracemalloc slows allocation-heavy code several times over, so it
+    # gets a run of its own instead of skewing the timing
+    tracemalloc.start()
+    try:
+        convert(markdown_content, cover)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {
+        'seconds': round(seconds, 3),
+        'peak_mb': round(peak / (1024 * 1024), 1),
+        'output_kb': round(len(output) / 1024, 1)
+    }
+
+
+@pytest.fixture(scope='module')
+def documents():
+    """Synthetic markdown per case, generated on first use"""
+    cache = {}
+
+    def get(name):
+        if name not in cache:
+            cache[name] = synthetic_brd(*CASES[name])
+        return cache[name]
+    return get
+
+
+@pytest.mark.parametrize('fmt', list(CONVERTERS))
+@pytest.mark.parametrize('case', selected_cases())
+def test_export_budget(case, fmt, documents, budgets, bench_results):
+    requirements, table_density, list_density = CASES[case]
+    markdown_content = documents(case)
+    result = measure(CONVERTERS[fmt], markdown_content, cover_metadata())
+
+    budget = budgets.get(case, {}).get(fmt, {})
+    over = {key: (result[key], limit) for key, limit in budget.items()
+            if key in result and result[key] > limit}
+    bench_results.append({
+        'case': case,
+        'format': fmt,
+        'requirements': requirements,
+        'table_density': table_density,
+        'list_density': list_density,
+        'input_chars': len(markdown_content),
+        **result,
+        'budget': budget,
+        'within_budget': not over
+    })
+    assert not over, ', '.join(f"{key} {value} > {limit}" for key, (value, limit) in over.items())
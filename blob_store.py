@@ -0,0 +1,222 @@
+"""Content-addressed, delta-encoded storage of BRD versions.
+
+Successive versions of a client's BRD mostly repeat each other. BlobStore
+splits every part into sections at markdown headings and stores each
+section once, keyed by its SHA-256. A version is a manifest listing the
+section hashes of its four parts. A section that changed since the
+client's previous version is stored as a line delta against the matching
+section there (same heading, else same position). A delta is only kept
+when it is clearly smaller than the compressed section, and delta chains
+are capped at MAX_CHAIN so a read never replays a long history. Writing
+a new version therefore costs roughly the size of the edits, and
+get_version() rebuilds any version in one call.
+
+Every save gets its own manifest. A client/version saved twice keeps
+both, and content_id (the row id of the saved record in the caller's
+table) tells them apart.
+"""
+import difflib
+import hashlib
+import json
+import re
+import threading
+import zlib
+
+from brd_replica import connect
+
+PART_KEYS = ('part1', 'part2', 'part3', 'part4')
+# Longest run of deltas before a section is stored in full again
+MAX_CHAIN = 8
+# Keep a delta only if it is at most this fraction of the full blob
+DELTA_RATIO = 0.6
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    hash TEXT PRIMARY KEY,
+    base TEXT,
+    depth INTEGER NOT NULL,
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS manifests (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    client_name TEXT NOT NULL,
+    version TEXT NOT NULL,
+    manifest TEXT NOT NULL,
+    content_id INTEGER
+);
+CREATE INDEX IF NOT EXISTS manifests_client_version
+    ON manifests (client_name, version);
+CREATE INDEX IF NOT EXISTS manifests_content_id
+    ON manifests (content_id);
+"""
+
+SECTION_SPLIT = re.compile(r'(?m)^(?=#)')
+
+
+def split_sections(text):
+    """Sections starting at each markdown heading; ''.join() gives text back"""
+    return [section for section in SECTION_SPLIT.split(text) if section]
+
+
+def section_key(section):
+    """Heading line of a section, used to pair it with its previous version"""
+    return section.split('\n', 1)[0].strip()
+
+
+def blob_hash(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def make_delta(base, text):
+    """Line delta turning base into text: [start, end] copies base lines, a string inserts"""
+    base_lines = base.splitlines(keepends=True)
+    lines = text.splitlines(keepends=True)
+    ops = []
+    matcher = difflib.SequenceMatcher(None, base_lines, lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            ops.append([i1, i2])
+        elif tag in ('replace', 'insert'):
+            ops.append(''.join(lines[j1:j2]))
+    return ops
+
+
+def apply_delta(base, ops):
+    base_lines = base.splitlines(keepends=True)
+    return ''.join(''.join(base_lines[op[0]:op[1]]) if isinstance(op, list) else op
+                   for op in ops)
+
+
+class BlobStore:
+    """Sections and version manifests in a SQLite database"""
+
+    def __init__(self, db_path):
+        self._lock = threading.Lock()
+        self._conn = connect(db_path)
+        self._conn.executescript(SCHEMA)
+
+    def _blob_row(self, blob):
+        return self._conn.execute(
+            'SELECT base, depth, data FROM blobs WHERE hash = ?', (blob,)
+        ).fetchone()
+
+    def _read(self, blob, cache):
+        """Text of a blob, resolving its delta chain; caller holds the lock"""
+        if blob in cache:
+            return cache[blob]
+        row = self._blob_row(blob)
+        if row is None:
+            raise KeyError(f"Missing blob {blob}")
+        data = zlib.decompress(row['data']).decode('utf-8')
+        if row['base'] is not None:
+            data = apply_delta(self._read(row['base'], cache), json.loads(data))
+        cache[blob] = data
+        return data
+
+    def _write(self, text, base_hash, base_text, base_depth):
+        """Store a section unless present; returns bytes written"""
+        blob = blob_hash(text)
+        if self._blob_row(blob) is not None:
+            return 0
+        full = zlib.compress(text.encode('utf-8'), 9)
+        row = (blob, None, 0, full)
+        if base_hash is not None and base_depth < MAX_CHAIN:
+            delta = zlib.compress(json.dumps(make_delta(base_text, text)).encode('utf-8'), 9)
+            if len(delta) <= len(full) * DELTA_RATIO:
+                row = (blob, base_hash, base_depth + 1, delta)
+        self._conn.execute('INSERT INTO blobs (hash, base, depth, data) VALUES (?, ?, ?, ?)', row)
+        return len(row[3])
+
+    def _latest_manifest(self, client_name):
+        row = self._conn.execute(
+            'SELECT manifest FROM manifests WHERE client_name = ? ORDER BY id DESC LIMIT 1',
+            (client_name,)
+        ).fetchone()
+        return json.loads(row['manifest']) if row is not None else None
+
+    def put_version(self, client_name, version, content_parts, content_id=None):
+        """Store a version's parts; returns raw and newly stored byte counts"""
+        raw_bytes = 0
+        stored_bytes = 0
+        new_blobs = 0
+        manifest = {}
+        with self._lock, self._conn:
+            previous = self._latest_manifest(client_name) or {}
+            cache = {}
+            for key in PART_KEYS:
+                text = content_parts.get(key, '') or ''
+                raw_bytes += len(text.encode('utf-8'))
+
+                # Sections of the same part in the previous version, by heading
+                # and by position, to delta against
+                base_hashes = previous.get(key, [])
+                by_heading = {}
+                for base_hash in base_hashes:
+                    by_heading.setdefault(section_key(self._read(base_hash, cache)), base_hash)
+
+                hashes = []
+                for position, section in enumerate(split_sections(text)):
+                    base_hash = by_heading.get(section_key(section))
+                    if base_hash is None and position < len(base_hashes):
+                        base_hash = base_hashes[position]
+                    base_text = base_depth = None
+                    if base_hash is not None:
+                        base_text = self._read(base_hash, cache)
+                        base_depth = self._blob_row(base_hash)['depth']
+                    written = self._write(section, base_hash, base_text, base_depth)
+                    stored_bytes += written
+                    new_blobs += 1 if written else 0
+                    hashes.append(blob_hash(section))
+                manifest[key] = hashes
+
+            self._conn.execute(
+                'INSERT INTO manifests (client_name, version, manifest, content_id) VALUES (?, ?, ?, ?)',
+                (client_name, version, json.dumps(manifest), content_id)
+            )
+        return {
+            'raw_bytes': raw_bytes,
+            'stored_bytes': stored_bytes,
+            'new_blobs': new_blobs,
+            'sections': sum(len(hashes) for hashes in manifest.values())
+        }
+
+    def get_version(self, client_name, version, content_id=None):
+        """Parts of a stored version, or None if it was never stored
+
+        With content_id, the parts of that save; otherwise the first save
+        of the client/version.
+        """
+        with self._lock:
+            if content_id is not None:
+                row = self._conn.execute(
+                    'SELECT manifest FROM manifests WHERE content_id = ? ORDER BY id LIMIT 1',
+                    (content_id,)
+                ).fetchone()
+            else:
+                row = self._conn.execute(
+                    'SELECT manifest FROM manifests WHERE client_name = ? AND version = ? '
+                    'ORDER BY id LIMIT 1',
+                    (client_name, version)
+                ).fetchone()
+            if row is None:
+                return None
+            cache = {}
+            manifest = json.loads(row['manifest'])
+            return {key: ''.join(self._read(blob, cache) for blob in manifest.get(key, []))
+                    for key in PART_KEYS}
+
+    def has_version(self, client_name, version):
+        with self._lock:
+            return self._conn.execute(
+                'SELECT 1 FROM manifests WHERE client_name = ? AND version = ? LIMIT 1',
+                (client_name, version)
+            ).fetchone() is not None
+
+    def stored_bytes(self):
+        """Total size of all blobs on disk"""
+        with self._lock:
+            return self._conn.execute('SELECT COALESCE(SUM(LENGTH(data)), 0) FROM blobs').fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
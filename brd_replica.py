@@ -0,0 +1,200 @@
+"""Local SQLite mirror of the BRD_Content worksheet.
+
+get_brd_content used to pull every row of BRD_Content with get_all_records
+and scan it in Python. BrdReplica keeps a copy of the worksheet in SQLite
+with an index on (client_name, version). Sheets remains the source of
+truth, and the mirror only ever appends: each sync reads the rows below
+the last one it has seen, which is how BRD_Content grows (append_rows).
+A background thread syncs periodically. A lookup that misses does one
+incremental sync before giving up, so a BRD saved a moment ago is found.
+Parts too large for one cell live in BRD_Chunks (see content_codec.py),
+which is mirrored the same way.
+"""
+import atexit
+import sqlite3
+import threading
+
+# Worksheet header -> replica column
+COLUMNS = {
+    'Timestamp': 'timestamp',
+    'Client_Name': 'client_name',
+    'Version': 'version',
+    'Generated_By': 'generated_by',
+    'Part_1_Content': 'part1',
+    'Part_2_Content': 'part2',
+    'Part_3_Content': 'part3',
+    'Part_4_Content': 'part4'
+}
+
+CHUNK_COLUMNS = {
+    'Chunk_Key': 'chunk_key',
+    'Sequence': 'sequence',
+    'Data': 'data'
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS brd_content (
+    row_number INTEGER PRIMARY KEY,
+    timestamp TEXT,
+    client_name TEXT,
+    version TEXT,
+    generated_by TEXT,
+    part1 TEXT,
+    part2 TEXT,
+    part3 TEXT,
+    part4 TEXT
+);
+CREATE INDEX IF NOT EXISTS brd_content_client_version
+    ON brd_content (client_name, version);
+CREATE TABLE IF NOT EXISTS brd_chunks (
+    row_number INTEGER PRIMARY KEY,
+    chunk_key TEXT,
+    sequence TEXT,
+    data TEXT
+);
+CREATE INDEX IF NOT EXISTS brd_chunks_key
+    ON brd_chunks (chunk_key);
+"""
+
+
+def connect(db_path):
+    """SQLite connection shared between threads behind the caller's lock"""
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    if db_path != ':memory:':
+        conn.execute('PRAGMA journal_mode=WAL')
+    return conn
+
+
+class BrdReplica:
+    """SQLite copy of BRD_Content, synced incrementally from Sheets"""
+
+    def __init__(self, sheets, db_path, worksheet='BRD_Content', chunk_worksheet='BRD_Chunks',
+                 refresh_interval=60.0):
+        self.sheets = sheets
+        self.worksheet = worksheet
+        self.chunk_worksheet = chunk_worksheet
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._conn = connect(db_path)
+        self._conn.executescript(SCHEMA)
+        self._headers = {}
+        self.syncs = 0
+        self.last_error = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='brd-replica', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def last_row(self, table='brd_content'):
+        """Highest worksheet row mirrored so far (1 is the header row)"""
+        with self._lock:
+            found = self._conn.execute(f"SELECT MAX(row_number) FROM {table}").fetchone()[0]
+        return found or 1
+
+    def _read_headers(self, worksheet, columns):
+        if worksheet not in self._headers:
+            header_row = self.sheets.call(worksheet, 'row_values', 1)
+            self._headers[worksheet] = [columns.get(name) for name in header_row]
+        return self._headers[worksheet]
+
+    def _sync_worksheet(self, worksheet, table, columns):
+        # Deferred so that storage.py, which only needs connect(), does not
+        # load gspread
+        from gspread.utils import rowcol_to_a1
+
+        with self._sync_lock:
+            headers = self._read_headers(worksheet, columns)
+            if not headers:
+                return 0
+            start = self.last_row(table) + 1
+            end = rowcol_to_a1(start, len(headers)).rstrip('0123456789')
+            values = self.sheets.call(worksheet, 'get_values', f"A{start}:{end}")
+            self.syncs += 1
+
+            records = []
+            for row_number, row in enumerate(values, start=start):
+                record = {'row_number': row_number}
+                for column, value in zip(headers, row):
+                    if column:
+                        record[column] = value
+                records.append(record)
+            if not records:
+                return 0
+
+            names = ['row_number'] + list(columns.values())
+            with self._lock, self._conn:
+                self._conn.executemany(
+                    f"INSERT OR REPLACE INTO {table} ({', '.join(names)}) "
+                    f"VALUES ({', '.join('?' * len(names))})",
+                    [[record.get(name, '') for name in names] for record in records]
+                )
+            return len(records)
+
+    def sync(self):
+        """Copy BRD_Content rows below the last mirrored one; returns rows added"""
+        return self._sync_worksheet(self.worksheet, 'brd_content', COLUMNS)
+
+    def sync_chunks(self):
+        """Copy new BRD_Chunks rows; returns rows added"""
+        return self._sync_worksheet(self.chunk_worksheet, 'brd_chunks', CHUNK_COLUMNS)
+
+    def _find_chunks(self, chunk_key):
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT sequence, data FROM brd_chunks WHERE chunk_key = ?', (chunk_key,)
+            ).fetchall()
+        # A chunk appended twice (retried write) has the same data both times
+        return {int(row['sequence']): row['data'] for row in rows}
+
+    def chunks(self, chunk_key, count):
+        """Ordered chunk data for a key, or None if some are still missing"""
+        found = self._find_chunks(chunk_key)
+        if len(found) < count and self.sync_chunks():
+            found = self._find_chunks(chunk_key)
+        if any(sequence not in found for sequence in range(count)):
+            return None
+        return [found[sequence] for sequence in range(count)]
+
+    def _find(self, client_name, version):
+        with self._lock:
+            return self._conn.execute(
+                'SELECT * FROM brd_content WHERE client_name = ? AND version = ? '
+                'ORDER BY row_number LIMIT 1',
+                (client_name, version)
+            ).fetchone()
+
+    def lookup(self, client_name, version):
+        """Row for a client/version as a dict, or None; syncs once on a miss"""
+        row = self._find(client_name, version)
+        if row is None and self.sync():
+            row = self._find(client_name, version)
+        return dict(row) if row is not None else None
+
+    def rows(self):
+        """Every mirrored BRD_Content row as a dict, in worksheet order"""
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(
+                'SELECT * FROM brd_content ORDER BY row_number'
+            ).fetchall()]
+
+    def _run(self):
+        while True:
+            try:
+                self.sync()
+                self.sync_chunks()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"Error syncing BRD replica: {str(e)}")
+            if self._stop.wait(self.refresh_interval):
+                break
+
+    def close(self):
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._thread.join(5)
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,159 @@
+"""BRD generation settings and prompt templates, reloaded when files change.
+
+brd_config.yaml names the model, max_tokens, the confidentiality
+agreement file and, per part, a prompt template file and temperature.
+ConfigRegistry parses all of them once and compiles each template into
+a list of literal and placeholder pieces. Values that are fixed for the
+whole config, such as the confidentiality agreement, are substituted at
+compile time. Rendering a prompt is then a single join with no parsing.
+
+On access, the registry stats the files it loaded, at most once per
+check_interval, and reloads them all when any mtime has changed. A
+broken edit (bad YAML, a missing file, an unknown placeholder) is
+printed and the previous settings stay in use.
+"""
+import os
+import threading
+import time
+from string import Formatter
+
+import yaml
+
+CONFIG_PATH = os.environ.get('BRD_CONFIG', 'brd_config.yaml')
+
+# Placeholders filled per generation from the form and earlier parts
+PROMPT_FIELDS = {
+    'client_name', 'project_description', 'user_types', 'deliverables',
+    'response_part1', 'response_part2', 'response_part3'
+}
+
+AGREEMENT_FALLBACK = "Confidentiality agreement not found or invalid."
+
+
+def compile_template(text, constants, fields=PROMPT_FIELDS):
+    """Render function for a {field} template; constants are filled in now"""
+    pieces = []
+    literal_parts = []
+    for literal, field, spec, conversion in Formatter().parse(text):
+        literal_parts.append(literal)
+        if field is None:
+            continue
+        if spec or conversion:
+            raise ValueError(f"Unsupported placeholder {{{field}}}")
+        if field in constants:
+            literal_parts.append(str(constants[field]))
+        elif field in fields:
+            pieces.append((''.join(literal_parts), field))
+            literal_parts = []
+        else:
+            raise ValueError(f"Unknown placeholder {{{field}}}")
+    tail = ''.join(literal_parts)
+
+    def render(values):
+        return ''.join([literal + str(values[field]) for literal, field in pieces]) + tail
+
+    return render
+
+
+def load_agreement(path):
+    """Confidentiality agreement text from its YAML file"""
+    try:
+        with open(path, 'r') as file:
+            agreement = yaml.safe_load(file)
+        return agreement.get('Confidentiality Agreement', {}).get('content', '')
+    except Exception:
+        return AGREEMENT_FALLBACK
+
+
+class ConfigRegistry:
+    """Parsed settings and compiled prompts, reloaded when their files change"""
+
+    def __init__(self, config_path=CONFIG_PATH, check_interval=1.0):
+        self.config_path = config_path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._config = None
+        self._mtimes = {}
+        self._checked = 0.0
+        self._stats = {'loads': 0, 'errors': 0, 'load_seconds': 0.0}
+        self._load()
+
+    def _mtime(self, path):
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _resolve(self, path):
+        # Paths in the config are relative to the config file
+        return os.path.join(os.path.dirname(self.config_path), path)
+
+    def _read(self):
+        """Parse every file; returns (config, {path: mtime})"""
+        paths = [self.config_path]
+        with open(self.config_path, 'r') as file:
+            raw = yaml.safe_load(file)
+
+        agreement_path = self._resolve(raw['confidentiality_agreement'])
+        paths.append(agreement_path)
+        constants = {'confidentiality_agreement': load_agreement(agreement_path)}
+
+        parts = {}
+        for key, settings in raw['parts'].items():
+            template_path = self._resolve(settings['template'])
+            paths.append(template_path)
+            with open(template_path, 'r', encoding='utf-8') as file:
+                render = compile_template(file.read(), constants)
+            parts[key] = {
+                'model': settings.get('model', raw['model']),
+                'temperature': float(settings['temperature']),
+                'render': render
+            }
+        config = {
+            'max_tokens': int(raw['max_tokens']),
+            'parts': parts,
+            'confidentiality_agreement': constants['confidentiality_agreement']
+        }
+        return config, {path: self._mtime(path) for path in paths}
+
+    def _load(self):
+        started = time.perf_counter()
+        try:
+            config, mtimes = self._read()
+        except Exception as e:
+            self._stats['errors'] += 1
+            if self._config is None:
+                raise
+            print(f"Error reloading {self.config_path}, keeping previous settings: {str(e)}")
+            # Do not retry until a file changes again
+            self._mtimes = {path: self._mtime(path) for path in self._mtimes}
+            return
+        self._config = config
+        self._mtimes = mtimes
+        self._stats['loads'] += 1
+        self._stats['load_seconds'] = time.perf_counter() - started
+
+    def _changed(self):
+        return any(self._mtime(path) != mtime for path, mtime in self._mtimes.items())
+
+    def get(self):
+        """Current settings, reloading first if a file has changed"""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._checked >= self.check_interval:
+                self._checked = now
+                if self._changed():
+                    self._load()
+            return self._config
+
+    def part(self, key):
+        """model, temperature and render for one BRD part"""
+        return self.get()['parts'][key]
+
+    def render(self, key, values):
+        """Prompt for a part from the form fields and earlier responses"""
+        return self.part(key)['render'](values)
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, files=len(self._mtimes))
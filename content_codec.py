@@ -0,0 +1,95 @@
+"""Compressed, chunked encoding of BRD parts for Google Sheets cells.
+
+Sheets rejects cells over 50,000 characters, and Part 2 of a large BRD
+goes well past that. Each part is stored zlib-compressed and base64
+encoded behind a 'z1:' prefix, which typically shrinks markdown to a
+third of its size. A part that still does not fit in one cell is split
+into chunk rows for the BRD_Chunks worksheet; its cell then only holds
+a 'z1c:<key>:<count>' reference. Cells without either prefix are read
+as plain text, so rows saved before this format still load.
+"""
+import base64
+import hashlib
+import zlib
+
+# Sheets cell limit, and the largest chunk written (leaves headroom)
+CELL_LIMIT = 50000
+CHUNK_SIZE = 49000
+
+PREFIX = 'z1:'
+CHUNK_PREFIX = 'z1c:'
+
+CHUNK_HEADERS = ["Chunk_Key", "Sequence", "Data"]
+
+
+def compress_text(text):
+    """Inline cell value for text: prefix plus base64 of the zlib stream"""
+    return PREFIX + base64.b64encode(zlib.compress(text.encode('utf-8'), 9)).decode('ascii')
+
+
+def decompress_text(value):
+    """Text back from compress_text output, or value itself if it is plain"""
+    if not value.startswith(PREFIX):
+        return value
+    return zlib.decompress(base64.b64decode(value[len(PREFIX):])).decode('utf-8')
+
+
+def chunk_reference(value):
+    """(key, count) if a cell value points at chunk rows, else None"""
+    if not value.startswith(CHUNK_PREFIX):
+        return None
+    key, count = value[len(CHUNK_PREFIX):].rsplit(':', 1)
+    return key, int(count)
+
+
+def encode_part(text):
+    """Cell value for a part plus any chunk rows ([key, sequence, data]) it needs"""
+    if not text:
+        return '', []
+    encoded = compress_text(text)
+    if len(encoded) <= CELL_LIMIT:
+        return encoded, []
+    key = hashlib.sha1(encoded.encode('ascii')).hexdigest()[:20]
+    pieces = [encoded[i:i + CHUNK_SIZE] for i in range(0, len(encoded), CHUNK_SIZE)]
+    rows = [[key, str(sequence), piece] for sequence, piece in enumerate(pieces)]
+    return f"{CHUNK_PREFIX}{key}:{len(pieces)}", rows
+
+
+def decode_part(value, load_chunks=None):
+    """Text of a stored part
+
+    load_chunks(key, count) returns the chunk data in order, or None when
+    it is not available; a missing chunk raises ValueError.
+    """
+    if value is None:
+        return ''
+    value = str(value)
+    reference = chunk_reference(value)
+    if reference is None:
+        return decompress_text(value)
+    chunks = load_chunks(*reference) if load_chunks else None
+    if chunks is None:
+        raise ValueError(f"Chunks for {reference[0]} are missing")
+    return decompress_text(''.join(chunks))
+
+
+def encode_parts(content_parts):
+    """Encode part1..part4; returns (cells, chunk rows, size report)"""
+    cells = {}
+    chunk_rows = []
+    raw_bytes = 0
+    stored_bytes = 0
+    for key in ('part1', 'part2', 'part3', 'part4'):
+        text = content_parts.get(key, '')
+        cell, rows = encode_part(text)
+        cells[key] = cell
+        chunk_rows.extend(rows)
+        raw_bytes += len(text.encode('utf-8'))
+        stored_bytes += len(cell) + sum(len(row[2]) for row in rows)
+    report = {
+        'raw_bytes': raw_bytes,
+        'stored_bytes': stored_bytes,
+        'ratio': stored_bytes / raw_bytes if raw_bytes else 1.0,
+        'chunk_rows': len(chunk_rows)
+    }
+    return cells, chunk_rows, report
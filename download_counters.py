@@ -0,0 +1,173 @@
+"""In-memory download counters for the BRD sheet.
+
+update_download_count used to read the whole of Sheet1 and scan it for the
+(Client_Name, Version_Number) row on every download click. DownloadCounters
+keeps an index of row positions and current counts, built from one sheet
+read in the background. A click only bumps an in-memory counter. A flusher
+thread periodically turns the accumulated increments into cell updates
+that go out through the write-behind queue as one batch_update.
+
+The index is refreshed only when an increment names a BRD that is not in
+it yet, typically one saved since the last read, and at most once per
+min_reload_interval. Rows this process appends are announced with
+row_appended(): until they show up in the index, or min_reload_interval
+after the append, a download of one reloads the index on every flush, so
+a download right after a save is not held back by the interval. The
+counts assume this process is the only writer of the download columns.
+"""
+import atexit
+import threading
+import time
+from collections import Counter
+
+from gspread.utils import rowcol_to_a1
+
+FILE_TYPES = ('MD', 'PDF', 'DOCX')
+
+
+def count_value(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+class DownloadCounters:
+    """Row index and download counts for a worksheet, flushed in batches
+
+    sheets is a sheets.SheetsClient used for index reads, write_queue a
+    write_behind.WriteBehindQueue that carries the count updates.
+    """
+
+    def __init__(self, sheets, write_queue, worksheet='Sheet1', flush_interval=10.0,
+                 min_reload_interval=60.0):
+        self.sheets = sheets
+        self.write_queue = write_queue
+        self.worksheet = worksheet
+        self.flush_interval = flush_interval
+        self.min_reload_interval = min_reload_interval
+        self._lock = threading.Lock()
+        self._rows = {}
+        self._counts = {}
+        self._columns = {}
+        self._increments = Counter()
+        # (client, version) -> monotonic time this process appended its row
+        self._appended = {}
+        self._loaded_at = None
+        self._stop = threading.Event()
+        self.index_reads = 0
+        self._thread = threading.Thread(target=self._run, name='download-counters', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def load_index(self):
+        """Read the sheet once and rebuild the row index and counts"""
+        all_data = self.sheets.call(self.worksheet, 'get_all_values')
+        self.index_reads += 1
+        self._loaded_at = time.monotonic()
+        if not all_data:
+            return
+        headers = all_data[0]
+        client_idx = headers.index('Client_Name')
+        version_idx = headers.index('Version_Number')
+        columns = {file_type: headers.index(f"Download_Count_{file_type}")
+                   for file_type in FILE_TYPES if f"Download_Count_{file_type}" in headers}
+
+        rows = {}
+        counts = {}
+        for row_number, row in enumerate(all_data[1:], start=2):
+            row = row + [''] * (len(headers) - len(row))
+            key = (row[client_idx], row[version_idx])
+            # Like the old linear scan, the first matching row wins
+            if key in rows:
+                continue
+            rows[key] = row_number
+            counts[key] = {file_type: count_value(row[idx]) for file_type, idx in columns.items()}
+
+        with self._lock:
+            # Counts already known here may include updates still waiting in
+            # the write queue, so they win over what the sheet says
+            for key, known in self._counts.items():
+                if key in counts:
+                    counts[key] = known
+            self._rows = rows
+            self._columns = columns
+            self._counts = counts
+            for key in rows:
+                self._appended.pop(key, None)
+
+    def row_appended(self, client_name, version):
+        """Note a Sheet1 row queued by this process, so its downloads reload the index"""
+        with self._lock:
+            if (client_name, version) not in self._rows:
+                self._appended[(client_name, version)] = time.monotonic()
+
+    def increment(self, client_name, version, file_type):
+        """Count one download; never touches the sheet"""
+        with self._lock:
+            self._increments[(client_name, version, file_type.upper())] += 1
+
+    def pending(self):
+        with self._lock:
+            return sum(self._increments.values())
+
+    def flush(self):
+        """Queue cell updates for all accumulated increments"""
+        now = time.monotonic()
+        with self._lock:
+            increments = self._increments
+            self._increments = Counter()
+            missing = {(client, version) for client, version, _ in increments
+                       if (client, version) not in self._rows}
+            # A row this process appended is known to be on its way
+            expected = any(now - self._appended.get(key, float('-inf')) < self.min_reload_interval
+                           for key in missing)
+
+        # Rows saved since the last read need a fresh index, but a BRD that
+        # never reaches the sheet must not cause a full read every flush
+        stale = (self._loaded_at is None or
+                 now - self._loaded_at >= self.min_reload_interval)
+        if missing and (stale or expected):
+            try:
+                self.load_index()
+            except Exception as e:
+                print(f"Error loading download count index: {str(e)}")
+
+        updates = []
+        with self._lock:
+            for (client_name, version, file_type), amount in increments.items():
+                key = (client_name, version)
+                if file_type not in self._columns:
+                    print(f"Column Download_Count_{file_type} not found")
+                    continue
+                if key not in self._rows:
+                    # Not in the sheet yet, probably still in the write queue
+                    self._increments[(client_name, version, file_type)] += amount
+                    continue
+                self._counts[key][file_type] += amount
+                updates.append({
+                    'range': rowcol_to_a1(self._rows[key], self._columns[file_type] + 1),
+                    'values': [[self._counts[key][file_type]]]
+                })
+        if updates:
+            self.write_queue.update(self.worksheet, updates)
+        return len(updates)
+
+    def _run(self):
+        try:
+            self.load_index()
+        except Exception as e:
+            print(f"Error loading download count index: {str(e)}")
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error flushing download counts: {str(e)}")
+
+    def close(self):
+        """Stop the flusher and hand any remaining increments to the queue"""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._thread.join(5)
+        self.flush()
@@ -1,48 +1,41 @@
 import streamlit as st
-from streamlit_lottie import st_lottie
-import requests
-import time
-from anthropic import Anthropic
-import yaml
-import markdown2
-from io import BytesIO
 from datetime import datetime, date
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak, Image
-from reportlab.lib.styles import ParagraphStyle
-from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY
-from reportlab.lib.units import cm
-from reportlab.lib import colors
-from reportlab.pdfgen import canvas
-from reportlab.lib.utils import ImageReader
-from bs4 import BeautifulSoup
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from docx import Document
-from docx.shared import Inches, Pt, Cm, RGBColor
-from docx.enum.text import WD_ALIGN_PARAGRAPH
-from docx.enum.style import WD_STYLE_TYPE
-from docx.oxml.shared import OxmlElement, qn
-from docx.oxml.ns import nsdecls
-from docx.oxml import parse_xml
-import re
+from concurrent.futures import TimeoutError as ExportTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from export_engine import ExportQueueFull, get_shared_engine
+from assembly import BrdAssembler, join_parts
 from typing import Optional
-import base64
-from google.oauth2.service_account import Credentials
-import gspread
-
-# Set up the Anthropic client
-client = Anthropic(api_key=st.secrets["ANTHROPIC_API_KEY"])
+from content_codec import CHUNK_HEADERS
+from blob_store import BlobStore
+from remote_assets import RemoteAssets
+from config_registry import ConfigRegistry
+import perf
+from storage import (
+    MemoryStore, SqliteStore, SheetsReplica, ReplicatedStore, form_record, content_record
+)
+import os
+import importlib
+import threading
+
+# The Anthropic SDK, the export stack (reportlab, python-docx, bs4,
+# markdown2), the Sheets stack (gspread, google-auth) and pandas are
+# imported where they are first used rather than here, so a cold start
+# only pays for what the form needs. get_warm_up() loads the export and
+# generation stacks in the background once the page has rendered.
+
+@st.cache_resource
+def get_anthropic_client():
+    """Anthropic client shared by all sessions in this server process"""
+    from anthropic import Anthropic
+    return Anthropic(api_key=st.secrets["ANTHROPIC_API_KEY"])
 
 # Force light theme and set page config
 st.set_page_config(page_title="EMB-AI BRD Generator", layout="wide", initial_sidebar_state="collapsed")
 
+# Each top-level block is timed with perf.block(), see perf.py
+perf.block("page")
 st.header("EMB-AI BRD Studio")
 
-# Register Poppins fonts
-pdfmetrics.registerFont(TTFont('Poppins', 'assets/Poppins-Regular.ttf'))
-pdfmetrics.registerFont(TTFont('Poppins-SemiBold', 'assets/Poppins-SemiBold.ttf'))
-
 # Initialize session state for form fields
 if 'form_fields' not in st.session_state:
     st.session_state.form_fields = {
@@ -56,13 +49,21 @@ if 'form_fields' not in st.session_state:
     }
 
 # Google Sheets Setup Functions
+BRD_CONTENT_HEADERS = [
+    "Timestamp",
+    "Client_Name",
+    "Version",
+    "Generated_By",
+    "Part_1_Content",
+    "Part_2_Content",
+    "Part_3_Content",
+    "Part_4_Content"
+]
+
+@st.cache_resource
 def setup_google_sheets():
-    """Initialize Google Sheets connection"""
-    scope = [
-        'https://www.googleapis.com/auth/spreadsheets',
-        'https://www.googleapis.com/auth/drive'
-    ]
-    
+    """Google Sheets connection shared by all sessions in this server process"""
+    from sheets import SheetsClient
     credentials = {
         "type": "service_account",
         "project_id": st.secrets["GOOGLE_SHEETS"]["project_id"],
@@ -76,137 +77,127 @@ def setup_google_sheets():
         "client_x509_cert_url": st.secrets["GOOGLE_SHEETS"]["client_x509_cert_url"]
     }
     
-    creds = Credentials.from_service_account_info(credentials, scopes=scope)
-    client = gspread.authorize(creds)
-    return client
+    return SheetsClient(credentials, worksheet_headers={
+        "BRD_Content": BRD_CONTENT_HEADERS,
+        "BRD_Chunks": CHUNK_HEADERS
+    })
+
+# Unsent Sheets writes are spooled here and resent after a restart
+SHEETS_SPOOL_PATH = os.environ.get("BRD_SHEETS_SPOOL", "sheets_spool.jsonl")
+
+@st.cache_resource
+def get_write_queue():
+    """Background writer that batches Sheets appends for all sessions"""
+    from write_behind import WriteBehindQueue
+    return WriteBehindQueue(setup_google_sheets(), SHEETS_SPOOL_PATH)
+
+@st.cache_resource
+def get_download_counters():
+    """Download counts for Sheet1, flushed to the sheet in batches"""
+    from download_counters import DownloadCounters
+    return DownloadCounters(setup_google_sheets(), get_write_queue())
+
+# Local SQLite copy of BRD_Content for lookups
+BRD_REPLICA_PATH = os.environ.get("BRD_REPLICA_DB", "brd_replica.sqlite3")
+
+@st.cache_resource
+def get_brd_replica():
+    """BRD_Content mirror shared by all sessions, refreshed in the background"""
+    from brd_replica import BrdReplica
+    return BrdReplica(setup_google_sheets(), BRD_REPLICA_PATH)
+
+# Storage backend: "sqlite" (default) or "memory"; BRD_SHEETS_REPLICA=0
+# turns off mirroring to Google Sheets
+STORAGE_BACKEND = os.environ.get("BRD_STORAGE", "sqlite")
+STORAGE_DB_PATH = os.environ.get("BRD_STORAGE_DB", "brd_store.sqlite3")
+
+@st.cache_resource
+def get_storage():
+    """BRD store shared by all sessions in this server process"""
+    if STORAGE_BACKEND == "memory":
+        store = MemoryStore()
+    else:
+        # Parts are deduplicated and delta-encoded in the same database
+        store = SqliteStore(STORAGE_DB_PATH, blob_store=BlobStore(STORAGE_DB_PATH))
+    if os.environ.get("BRD_SHEETS_REPLICA", "1") != "0" and "GOOGLE_SHEETS" in st.secrets:
+        # Built on first write or replica read, not on first render
+        store = ReplicatedStore(store, lambda: SheetsReplica(
+            get_write_queue(), get_download_counters(), get_brd_replica()))
+        # BRDs already in Google Sheets join the history in the background,
+        # so it survives a redeploy onto an empty disk
+        threading.Thread(target=backfill_history, args=(store,), name="brd-backfill",
+                         daemon=True).start()
+    return store
+
+def backfill_history(store):
+    try:
+        copied = store.backfill()
+        if copied:
+            print(f"Copied {copied} stored BRDs from Google Sheets")
+    except Exception as e:
+        print(f"Error copying stored BRDs from Google Sheets: {str(e)}")
+
+def record_analytics(method: str, *args):
+    """Feed a usage event to the analytics page; never fails the caller"""
+    try:
+        from analytics import get_analytics
+        getattr(get_analytics(), method)(*args)
+    except Exception as e:
+        print(f"Error recording analytics event: {str(e)}")
 
 def save_brd_data(form_data):
-    """Save BRD form data to Google Sheets"""
+    """Save BRD form data"""
     try:
-        client = setup_google_sheets()
-        worksheet = client.open("EMBGPT").worksheet("Sheet1")
-        
-        # Prepare row data
-        row_data = [
-            datetime.now().strftime('%Y-%m-%d %H:%M:%S'),    # Timestamp
-            form_data['client_name'],                        # Client Name
-            form_data['project_description'],                # Project Description
-            form_data['user_types'],                        # User Types
-            form_data['deliverables'],                      # Deliverables
-            form_data['prepared_by'],                       # Prepared By
-            form_data['document_date'].strftime('%Y-%m-%d'), # Document Date
-            form_data['version_number'],                    # Version Number
-            "0",                                            # Download Count MD
-            "0",                                            # Download Count PDF
-            "0"                                             # Download Count DOCX
-        ]
-        
-        worksheet.append_row(row_data)
+        get_storage().save_form(form_record(form_data))
         return True
         
     except Exception as e:
-        print(f"Error saving to Google Sheets: {str(e)}")
+        print(f"Error saving BRD data: {str(e)}")
         return False
 
 def save_brd_content(client_name: str, version: str, content_parts: dict):
-    """Save all BRD parts in a single row"""
+    """Save all BRD parts as a single record"""
     try:
-        client = setup_google_sheets()
-        
-        # Try to open the "BRD_Content" worksheet, create if it doesn't exist
-        try:
-            worksheet = client.open("EMBGPT").worksheet("BRD_Content")
-        except gspread.WorksheetNotFound:
-            workbook = client.open("EMBGPT")
-            worksheet = workbook.add_worksheet(title="BRD_Content", rows=1000, cols=8)
-            # Set up headers
-            headers = [
-                "Timestamp",
-                "Client_Name",
-                "Version",
-                "Generated_By",
-                "Part_1_Content",
-                "Part_2_Content",
-                "Part_3_Content",
-                "Part_4_Content"
-            ]
-            worksheet.append_row(headers)
-        
-        # Prepare row data
-        row_data = [
-            datetime.now().strftime('%Y-%m-%d %H:%M:%S'),    # Timestamp
-            client_name,                                      # Client Name
-            version,                                          # Version
-            st.session_state.form_fields['prepared_by'],     # Generated By
-            content_parts.get('part1', ''),                  # Part 1 Content
-            content_parts.get('part2', ''),                  # Part 2 Content
-            content_parts.get('part3', ''),                  # Part 3 Content
-            content_parts.get('part4', '')                   # Part 4 Content
-        ]
-        
-        worksheet.append_row(row_data)
+        record = content_record(client_name, version, st.session_state.form_fields['prepared_by'],
+                                content_parts)
+        get_storage().save_content(record)
+        record_analytics('record_generation', client_name, version, record['generated_by'])
         return True
         
     except Exception as e:
-        print(f"Error saving BRD content to Google Sheets: {str(e)}")
+        print(f"Error saving BRD content: {str(e)}")
         return False
+
 def update_download_count(client_name: str, version: str, file_type: str):
     """Update download count for specific BRD and file type"""
     try:
-        client = setup_google_sheets()
-        worksheet = client.open("EMBGPT").worksheet("Sheet1")
-        
-        # Get all data
-        all_data = worksheet.get_all_values()
-        headers = all_data[0]
-        
-        # Find the column index for download count
-        count_column = f"Download_Count_{file_type.upper()}"
-        try:
-            count_col_idx = headers.index(count_column) + 1
-        except ValueError:
-            print(f"Column {count_column} not found")
-            return
-            
-        # Find the row for this client and version
-        client_col_idx = headers.index("Client_Name") + 1
-        version_col_idx = headers.index("Version_Number") + 1
-        
-        for row_idx, row in enumerate(all_data[1:], start=2):
-            if (row[client_col_idx-1] == client_name and 
-                row[version_col_idx-1] == version):
-                current_count = int(row[count_col_idx-1])
-                worksheet.update_cell(row_idx, count_col_idx, current_count + 1)
-                break
-    
+        get_storage().increment_download(client_name, version, file_type)
     except Exception as e:
         print(f"Error updating download count: {str(e)}")
+    record_analytics('record_download', client_name, version, file_type)
 
-def get_brd_content(client_name: str, version: str):
-    """Retrieve BRD content from Google Sheets"""
+def get_brd_content(client_name: str, version: str, content_id: Optional[int] = None):
+    """Retrieve BRD content from storage, by the id of one save when given"""
     try:
-        client = setup_google_sheets()
-        worksheet = client.open("EMBGPT").worksheet("BRD_Content")
-        
-        # Get all data
-        data = worksheet.get_all_records()
+        if content_id is not None:
+            row = get_storage().get_content_by_id(content_id)
+        else:
+            row = get_storage().get_content(client_name, version)
         
-        # Find the matching row
-        for row in data:
-            if row['Client_Name'] == client_name and row['Version'] == version:
-                return {
-                    'success': True,
-                    'content': {
-                        'part1': row['Part_1_Content'],
-                        'part2': row['Part_2_Content'],
-                        'part3': row['Part_3_Content'],
-                        'part4': row['Part_4_Content'],
-                    },
-                    'metadata': {
-                        'timestamp': row['Timestamp'],
-                        'generated_by': row['Generated_By']
-                    }
+        if row is not None:
+            return {
+                'success': True,
+                'content': {
+                    'part1': row['part1'],
+                    'part2': row['part2'],
+                    'part3': row['part3'],
+                    'part4': row['part4'],
+                },
+                'metadata': {
+                    'timestamp': row['timestamp'],
+                    'generated_by': row['generated_by']
                 }
+            }
         
         return {
             'success': False,
@@ -219,70 +210,31 @@ def get_brd_content(client_name: str, version: str):
             'message': f"Error retrieving BRD content: {str(e)}"
         }
 
-# Function to load and encode the local image
-def get_base64_of_bin_file(bin_file):
-    with open(bin_file, 'rb') as f:
-        data = f.read()
-    return base64.b64encode(data).decode()
+# Lottie animations are bundled locally; the originals are re-fetched in
+# the background so a rerun never waits on LottieFiles
+@st.cache_resource
+def get_remote_assets():
+    return RemoteAssets()
 
-# Load the local watermark image
-watermark_base64 = get_base64_of_bin_file('watermark.png')
-
-# Load Lottie animations
-def load_lottieurl(url: str):
-    try:
-        r = requests.get(url)
-        if r.status_code != 200:
-            return None
-        return r.json()
-    except:
-        return None
-
-lottie_writing = load_lottieurl("https://assets5.lottiefiles.com/packages/lf20_41X1Rp.json")
-lottie_completed = load_lottieurl("https://assets4.lottiefiles.com/packages/lf20_j3yeurta.json")
+lottie_writing = get_remote_assets().get("writing")
+lottie_completed = get_remote_assets().get("completed")
 
 def display_lottie_or_text(lottie_data, fallback_text, height=200):
     if lottie_data is not None:
+        from streamlit_lottie import st_lottie
         st_lottie(lottie_data, height=height)
     else:
         st.info(fallback_text)
 
-# Load confidentiality agreement
-def load_confidentiality_agreement():
-    try:
-        with open('confidentiality_agreement.yaml', 'r') as file:
-            agreement = yaml.safe_load(file)
-        return agreement.get('Confidentiality Agreement', {}).get('content', '')
-    except:
-        return "Confidentiality agreement not found or invalid."
-
-confidentiality_agreement = load_confidentiality_agreement()
-
-# Version number handling functions
-def format_version_number(version_input):
-    """Format the version number to ensure it starts with 'v'"""
-    if not version_input:
-        return 'v1'
-    version = version_input.lower().strip().replace('v', '')
-    return f'v{version}' if version else 'v1'
-
-def validate_version_number(version_input):
-    """Validate the version number format"""
-    try:
-        formatted_version = format_version_number(version_input)
-        version_num = formatted_version[1:]
-        if not version_num:
-            return 'v1'
-        float(version_num)
-        return formatted_version
-    except ValueError:
-        return 'v1'
+# Model, temperatures, prompt templates and the confidentiality agreement
+# (brd_config.yaml), parsed once and reloaded when the files change
+@st.cache_resource
+def get_config():
+    return ConfigRegistry()
 
-# Function to update session state
-def update_form_field():
-    for field in st.session_state.form_fields.keys():
-        if field in st.session_state:
-            st.session_state.form_fields[field] = st.session_state[field]
+# Copy an edited widget into the form fields
+def update_form_field(field):
+    st.session_state.form_fields[field] = st.session_state[field]
 
 # Custom CSS
 st.markdown("""
@@ -324,151 +276,134 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Main content
+perf.block("form")
 st.markdown("""
 This app generates a comprehensive Business Requirements Document (BRD) based on your inputs.
 Fill in the fields below and click 'Generate BRD' to create your document.
 """)
 
-# Progress bar
-total_fields = len(st.session_state.form_fields)
-filled_fields = sum(1 for value in st.session_state.form_fields.values() if value)
-progress = filled_fields / total_fields
-st.progress(progress)
-st.write(f"Form Completion: {filled_fields}/{total_fields} fields")
-# Create first page content
-def create_first_page_content(client_name, prepared_by, input_date, version_number):
-    formatted_date = input_date.strftime("%B %d, %Y") if isinstance(input_date, (date, datetime)) else date.today().strftime("%B %d, %Y")
-    formatted_version = validate_version_number(version_number)
-    
-    return f"""
-# Business Requirements Document
-
-## {client_name}
-
-**Date:** {formatted_date}
-**Prepared By:** {prepared_by}
-**Document Version:** {formatted_version}
-
----
-
-**CONFIDENTIAL**
-
-This document contains confidential and proprietary information. It is shared under the terms of the confidentiality agreement included within this document. Unauthorized distribution or copying is prohibited.
-
----
-
-**EMB-AI**
+# Form inputs and completion progress. Editing a field reruns only this
+# fragment; the Generate button below still reruns the whole page.
+@st.fragment
+@perf.timed("brd_form")
+def brd_form():
+    # Progress bar
+    total_fields = len(st.session_state.form_fields)
+    filled_fields = sum(1 for value in st.session_state.form_fields.values() if value)
+    progress = filled_fields / total_fields
+    st.progress(progress)
+    st.write(f"Form Completion: {filled_fields}/{total_fields} fields")
+
+    # Document Information expander
+    with st.expander("Document Information", expanded=True):
+        col1, col2, col3 = st.columns(3)
+
+        with col1:
+            st.text_input(
+                "Prepared By",
+                placeholder="Enter name of preparer",
+                value=st.session_state.form_fields['prepared_by'],
+                key='prepared_by',
+                help="Enter the name of the person preparing this document",
+                on_change=update_form_field,
+                args=('prepared_by',)
+            )
 
-**Address:** Plot No. 17, Phase-4, Maruti Udyog, Sector 18, Gurugram, HR
-**Phone:** +91-8882102246
-**Email:** contact@exmyb.com
-**Website:** www.emb.global
-"""
+        with col2:
+            selected_date = st.date_input(
+                "Document Date",
+                value=date.today(),
+                min_value=date(2000, 1, 1),
+                max_value=date(2100, 12, 31),
+                key='document_date',
+                help="Select the document date",
+                on_change=update_form_field,
+                args=('document_date',)
+            )
+            st.session_state.form_fields['document_date'] = selected_date
+
+        with col3:
+            st.text_input(
+                "Version Number",
+                placeholder="Enter version (default: v1)",
+                value=st.session_state.form_fields['version_number'],
+                key='version_number',
+                help="Enter version number (e.g., v1, v2, etc.)",
+                on_change=update_form_field,
+                args=('version_number',)
+            )
 
-# Document Information expander
-with st.expander("Document Information", expanded=True):
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        prepared_by = st.text_input(
-            "Prepared By",
-            placeholder="Enter name of preparer",
-            value=st.session_state.form_fields['prepared_by'],
-            key='prepared_by',
-            help="Enter the name of the person preparing this document",
-            on_change=update_form_field
+    # Client and Project Information expander
+    with st.expander("Client and Project Information", expanded=True):
+        st.text_input(
+            "Client Name",
+            placeholder="Enter the client's name",
+            value=st.session_state.form_fields['client_name'],
+            key='client_name',
+            help="Enter the name of the client",
+            on_change=update_form_field,
+            args=('client_name',)
         )
 
-    with col2:
-        selected_date = st.date_input(
-            "Document Date",
-            value=date.today(),
-            min_value=date(2000, 1, 1),
-            max_value=date(2100, 12, 31),
-            key='document_date',
-            help="Select the document date",
-            on_change=update_form_field
+        st.text_area(
+            "Project Description and Requirements",
+            placeholder="Provide a detailed description of the project and list the main requirements.",
+            height=200,
+            value=st.session_state.form_fields['project_description'],
+            key='project_description',
+            help="Describe the project and its requirements in detail",
+            on_change=update_form_field,
+            args=('project_description',)
         )
-        st.session_state.form_fields['document_date'] = selected_date
 
-    with col3:
-        version_input = st.text_input(
-            "Version Number",
-            placeholder="Enter version (default: v1)",
-            value=st.session_state.form_fields['version_number'],
-            key='version_number',
-            help="Enter version number (e.g., v1, v2, etc.)",
-            on_change=update_form_field
-        )
+    # Project Details expander
+    with st.expander("Project Details", expanded=True):
+        col1, col2 = st.columns(2)
+        with col1:
+            st.text_area(
+                "Types of Users",
+                placeholder="List the different types of users who will interact with the system, one per line",
+                height=150,
+                value=st.session_state.form_fields['user_types'],
+                key='user_types',
+                help="Enter each user type on a new line (Admin will be automatically added)",
+                on_change=update_form_field,
+                args=('user_types',)
+            )
+            st.caption("Note: Admin user type will be automatically added")
+
+        with col2:
+            st.text_area(
+                "Project Deliverables",
+                placeholder="List the main deliverables or components of the project, one per line",
+                height=150,
+                value=st.session_state.form_fields['deliverables'],
+                key='deliverables',
+                help="Enter each deliverable on a new line (Admin Panel will be automatically added)",
+                on_change=update_form_field,
+                args=('deliverables',)
+            )
+            st.caption("Note: Admin Panel will be automatically added")
 
-# Client and Project Information expander
-with st.expander("Client and Project Information", expanded=True):
-    client_name = st.text_input(
-        "Client Name",
-        placeholder="Enter the client's name",
-        value=st.session_state.form_fields['client_name'],
-        key='client_name',
-        help="Enter the name of the client",
-        on_change=update_form_field
-    )
-    
-    project_description = st.text_area(
-        "Project Description and Requirements",
-        placeholder="Provide a detailed description of the project and list the main requirements.",
-        height=200,
-        value=st.session_state.form_fields['project_description'],
-        key='project_description',
-        help="Describe the project and its requirements in detail",
-        on_change=update_form_field
-    )
-
-# Project Details expander
-with st.expander("Project Details", expanded=True):
-    col1, col2 = st.columns(2)
-    with col1:
-        user_types = st.text_area(
-            "Types of Users",
-            placeholder="List the different types of users who will interact with the system, one per line",
-            height=150,
-            value=st.session_state.form_fields['user_types'],
-            key='user_types',
-            help="Enter each user type on a new line (Admin will be automatically added)",
-            on_change=update_form_field
-        )
-        st.caption("Note: Admin user type will be automatically added")
-    
-    with col2:
-        deliverables = st.text_area(
-            "Project Deliverables",
-            placeholder="List the main deliverables or components of the project, one per line",
-            height=150,
-            value=st.session_state.form_fields['deliverables'],
-            key='deliverables',
-            help="Enter each deliverable on a new line (Admin Panel will be automatically added)",
-            on_change=update_form_field
-        )
-        st.caption("Note: Admin Panel will be automatically added")
+brd_form()
 
 # Add some spacing after the inputs
 st.markdown("<br>", unsafe_allow_html=True)
 
-# Set fixed temperatures for each part
-temp_part1 = 0.2
-temp_part2 = 0.5
-temp_part3 = 0.3
-temp_part4 = 0.0
-
 # Function to determine model
 def get_model(part):
-    return "claude-3-5-sonnet-20240620"
+    return get_config().part(f"part{part}")['model']
+
+def get_temperature(part):
+    return get_config().part(f"part{part}")['temperature']
 
 # Function to generate BRD part
 @st.fragment
 def generate_brd_part(prompt, placeholder, model, temperature):
     response = ""
-    with client.messages.stream(
+    with get_anthropic_client().messages.stream(
         model=model,
-        max_tokens=8192,
+        max_tokens=get_config().get()['max_tokens'],
         temperature=temperature,
         messages=[{"role": "user", "content": prompt}]
     ) as stream:
@@ -478,656 +413,130 @@ def generate_brd_part(prompt, placeholder, model, temperature):
     return response
 
 # Prompt generation functions - Place these BEFORE the generate button
-def get_prompt_part1():
-    return f"""
-    Create the first part of a detailed Business Requirements Document (BRD) for the following project: (Numbering, heading, sub headings and paragraph should be properly formatted and don't write keyword like description or module while writing description, text sizes should be appropriate.)
-
-    Client Name: {st.session_state.form_fields['client_name']}
-    Project Description and Requirements:
-    {st.session_state.form_fields['project_description']}
-    Types of Users:
-    {st.session_state.form_fields['user_types']}
-    Project Deliverables:
-    {st.session_state.form_fields['deliverables']}
-
-    Include the following sections:
-    1. Confidentiality Agreement: Use the following agreement:
-    {confidentiality_agreement}
-
-    2. Executive Summary: 
-    - Provide a brief overview of the project, its objectives, key stakeholders & deliverables.
-
-    3. Project Approach: 
-    - Describe the methodology, timeline, and key milestones based on the deliverables of the project in a table.
-    - Add a note mentioning that they are just for references only, final milestones will be provided in further discussions.
+def prompt_values(**responses):
+    """Template values from the form fields plus earlier part responses"""
+    fields = st.session_state.form_fields
+    values = {key: fields[key] for key in ('client_name', 'project_description', 'user_types', 'deliverables')}
+    values.update(responses)
+    return values
 
-    Provide detailed and professional content for each section, incorporating all the provided information.
-    Use Markdown formatting for proper structure.
-    Do not include a title for the BRD itself, as it will be added separately.
-    """
+def get_prompt_part1():
+    return get_config().render('part1', prompt_values())
 
 def get_prompt_part2(response_part1):
-    return f"""
-    Create the second part of a detailed Business Requirements Document (BRD) for the following project: (Numbering, heading, sub headings and paragraph should be properly formatted and don't write keyword like description or module while writing description, text sizes should be appropriate.)
-
-    Client Name: {st.session_state.form_fields['client_name']}
-    Project Description and Requirements:
-    {st.session_state.form_fields['project_description']}
-    Types of Users:
-    {st.session_state.form_fields['user_types']}
-    Project Deliverables:
-    {st.session_state.form_fields['deliverables']}
-
-    Previously generated content:
-    {response_part1}
-
-    Now, include the following sections:
-    1. Functional Requirements:
-    - For each deliverable, create at least 48 detailed modules as per requirement.
-    - Structure each requirement as: Module, Sub - Module (Optional), Description.
-    - Ensure the requirements are comprehensive and cover all aspects of the project.
-    - Write description of each module in 3 or more lines respectively.
-    - Descripton must be present against each module.
-    - For each user-side module, include a corresponding management module in the admin panel.
-    - Don't use any keywords like Module & Description in output.
-
-    2. 3rd Party Integrations and API Suggestions:
-    - Based on the functional requirements, suggest potential 3rd party integrations or APIs that could be used.
-    - For each suggestion, provide:
-      a. Name of the 3rd party service or API
-      b. Brief description of its functionality or requirement it can address
-      c. Try to suggest API or services specifically for Indian region & Mention their international alternatives too.
-
-    Provide detailed and professional content, incorporating all the provided information.
-    Use Markdown formatting for proper structure.
-    """
+    return get_config().render('part2', prompt_values(response_part1=response_part1))
 
 def get_prompt_part3(response_part1, response_part2):
-    return f"""
-    Create the third part of a detailed Business Requirements Document (BRD) for the following project: (Numbering, heading, sub headings and paragraph should be properly formatted and don't write keyword like description or module while writing description, text sizes should be appropriate.)
-
-    Client Name: {st.session_state.form_fields['client_name']}
-    Project Description and Requirements:
-    {st.session_state.form_fields['project_description']}
-    Types of Users:
-    {st.session_state.form_fields['user_types']}
-    Project Deliverables:
-    {st.session_state.form_fields['deliverables']}
-
-    Previously generated content:
-    {response_part1}
-    {response_part2}
-
-    Now, include the following sections:
-    1. Continue the functional requirements if it's absolute necessary or continue to non functional requirements.
-
-    2. Non-Functional Requirements: 
-    Specify performance, security, scalability, and other non-functional aspects of the system.
-    Include:
-    - Performance Requirements
-    - Security Requirements
-    - Scalability and Availability
-    - Usability Requirements
-    - Browser Compatibility
-    - Mobile Responsiveness
-    - Data Backup and Recovery
-    - Monitoring and Logging
-    - Compliance Requirements
-    - Integration Standards
-
-    Provide detailed and professional content for each section, incorporating all the provided information.
-    Use Markdown formatting for proper structure, including tables where specified.
-    """
+    return get_config().render('part3', prompt_values(response_part1=response_part1,
+                                                      response_part2=response_part2))
 
 def get_prompt_part4(response_part1, response_part2, response_part3):
-    return f"""
-    Create the fourth part of a detailed Business Requirements Document (BRD) for the following project: (Numbering, heading, sub headings and paragraph should be properly formatted and don't write keyword like description or module while writing description, text sizes should be appropriate.)
-
-    Client Name: {st.session_state.form_fields['client_name']}
-    Project Description and Requirements:
-    {st.session_state.form_fields['project_description']}
-    Types of Users:
-    {st.session_state.form_fields['user_types']}
-    Project Deliverables:
-    {st.session_state.form_fields['deliverables']}
-
-    Previously generated content:
-    {response_part1}
-    {response_part2}
-    {response_part3}
-
-    Now, include the following section:
-    Annexure: 
-    a. Functional Requirements: Create a separate table for each deliverable in the Functional Requirements. Each table should have the following columns:
-    - Requirement ID (Format: REQ-[Deliverable Initial]-[Number], e.g., REQ-UP-001 for User Panel requirement 1)
-    - Module/Feature
-    - Description (Detailed 3-4 line description)
-
-    b. 3rd Party Services and APIs: Create a table summarizing all suggested 3rd party services and APIs. This table should have the following columns:
-    - Service/API Name
-    - Functional Area
-    - Description
-    - Region (Indian/International)
-
-    Ensure all tables are properly formatted in Markdown and contain comprehensive information from the previous sections.
-    Each requirement should have a unique ID and detailed description.
-    """
+    return get_config().render('part4', prompt_values(response_part1=response_part1,
+                                                      response_part2=response_part2,
+                                                      response_part3=response_part3))
+
+# Output profile for PDF downloads, see PDF_PROFILES in exporters.py
+PDF_EXPORT_PROFILE = 'compact'
+
+# Export engine shared by all sessions in this server process; the
+# analytics page reads its job metrics
+@st.cache_resource
+def get_export_engine():
+    # Workers lay out a tiny PDF and DOCX as they start, see warm_up_steps()
+    return get_shared_engine(warm_workers=True, warm_profile=PDF_EXPORT_PROFILE)
+
+def get_cover_metadata():
+    """Picklable cover details for the exporters"""
+    return {
+        'client_name': st.session_state.form_fields['client_name'],
+        'prepared_by': st.session_state.form_fields['prepared_by'],
+        'document_date': st.session_state.form_fields['document_date'],
+        'version_number': st.session_state.form_fields['version_number']
+    }
+
+def export_document(fmt: str, content: str, cover: Optional[dict] = None):
+    """Convert the BRD in a worker process, returning None if the export failed"""
+    engine = get_export_engine()
+    # Reuse the per-part segments built while the BRD was streaming; only
+    # fetched when the export is neither cached nor already running
+    segments = None
+    assembler = st.session_state.get('brd_assembler')
+    if assembler is not None and assembler.matches(content):
+        segments = lambda: assembler.segments(fmt, timeout=engine.timeout)
+    try:
+        profile = PDF_EXPORT_PROFILE if fmt == 'pdf' else None
+        with perf.region(f"export_{fmt}"):
+            return engine.export(fmt, content, cover or get_cover_metadata(),
+                                 segments=segments, profile=profile)
+    except ExportQueueFull:
+        st.warning(f"The {fmt.upper()} exporter is busy right now. Please try again in a moment.")
+    except ExportTimeoutError:
+        # The conversion carries on in its worker and is cached when it finishes
+        st.warning(f"{fmt.upper()} export is taking longer than usual. "
+                   "It is still being prepared, please try again in a minute.")
+    except BrokenProcessPool:
+        st.warning(f"The {fmt.upper()} exporter stopped unexpectedly and has been restarted. "
+                   "Please try again.")
+    return None
+
+def format_file_size(size):
+    """Human readable size of an export"""
+    if size < 1024 * 1024:
+        return f"{size / 1024:.0f} KB"
+    return f"{size / (1024 * 1024):.1f} MB"
 
 # Download button fragments
 @st.fragment
-def markdown_download(content: str, client_name: str, version: str):
+def markdown_download(content: str, client_name: str, version: str, key_prefix: str = ""):
     """Fragment for Markdown download with tracking"""
     if st.download_button(
         label="📄 Download as Markdown",
         data=content,
         file_name=f"BRD_{client_name}_{version}.md",
         mime="text/markdown",
-        help="Download the BRD in Markdown format"
+        help="Download the BRD in Markdown format",
+        key=f"{key_prefix}download_md"
     ):
         update_download_count(client_name, version, 'MD')
 
 @st.fragment
-def pdf_download(content: str, client_name: str, version: str):
+def pdf_download(content: str, client_name: str, version: str,
+                 cover: Optional[dict] = None, key_prefix: str = ""):
     """Fragment for PDF download with tracking"""
-    pdf_buffer = convert_markdown_to_pdf(content)
+    pdf_buffer = export_document('pdf', content, cover)
+    if pdf_buffer is None:
+        return
     if st.download_button(
         label="📑 Download as PDF",
         data=pdf_buffer,
         file_name=f"BRD_{client_name}_{version}.pdf",
         mime="application/pdf",
-        help="Download the BRD in PDF format"
+        help="Download the BRD in PDF format",
+        key=f"{key_prefix}download_pdf"
     ):
         update_download_count(client_name, version, 'PDF')
+    st.caption(f"PDF size: {format_file_size(len(pdf_buffer))}")
 
 @st.fragment
-def docx_download(content: str, client_name: str, version: str):
+def docx_download(content: str, client_name: str, version: str,
+                  cover: Optional[dict] = None, key_prefix: str = ""):
     """Fragment for DOCX download with tracking"""
-    docx_buffer = convert_markdown_to_docx(content)
+    docx_buffer = export_document('docx', content, cover)
+    if docx_buffer is None:
+        return
     if st.download_button(
         label="📝 Download as DOCX",
         data=docx_buffer,
         file_name=f"BRD_{client_name}_{version}.docx",
         mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-        help="Download the BRD in DOCX format"
+        help="Download the BRD in DOCX format",
+        key=f"{key_prefix}download_docx"
     ):
         update_download_count(client_name, version, 'DOCX')
+    st.caption(f"DOCX size: {format_file_size(len(docx_buffer))}")
 
-def convert_markdown_to_pdf(markdown_content):
-    # First, explicitly process markdown headers
-    def process_markdown_headers(content):
-        # Replace markdown headers with HTML headers
-        content = re.sub(r'^# (.*?)$', r'<h1>\1</h1>', content, flags=re.MULTILINE)
-        content = re.sub(r'^## (.*?)$', r'<h2>\1</h2>', content, flags=re.MULTILINE)
-        content = re.sub(r'^### (.*?)$', r'<h3>\1</h3>', content, flags=re.MULTILINE)
-        content = re.sub(r'^#### (.*?)$', r'<h4>\1</h4>', content, flags=re.MULTILINE)
-        return content
-
-    # Process headers before converting to HTML
-    processed_content = process_markdown_headers(markdown_content)
-    content_html = markdown2.markdown(processed_content, extras=["tables", "fenced-code-blocks"])
-    
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter, 
-                          topMargin=2.5 * cm, bottomMargin=1.5 * cm, 
-                          leftMargin=2 * cm, rightMargin=2 * cm)
-
-    # Define styles
-    custom_styles = {
-        'CoverTitle': ParagraphStyle(
-            name='CoverTitle',
-            fontName='Poppins-SemiBold',
-            fontSize=28,
-            leading=34,
-            alignment=TA_CENTER,
-            spaceAfter=30
-        ),
-        'CoverSubTitle': ParagraphStyle(
-            name='CoverSubTitle',
-            fontName='Poppins-SemiBold',
-            fontSize=24,
-            leading=28,
-            alignment=TA_CENTER,
-            spaceAfter=40
-        ),
-        'CoverInfo': ParagraphStyle(
-            name='CoverInfo',
-            fontName='Poppins',
-            fontSize=12,
-            leading=16,
-            alignment=TA_CENTER,
-            spaceAfter=12
-        ),
-        'CustomHeading1': ParagraphStyle(
-            name='CustomHeading1',
-            fontName='Poppins-SemiBold',
-            fontSize=18,
-            leading=22,
-            spaceBefore=16,
-            spaceAfter=10,
-            textColor=colors.HexColor('#000000')
-        ),
-        'CustomHeading2': ParagraphStyle(
-            name='CustomHeading2',
-            fontName='Poppins-SemiBold',
-            fontSize=16,
-            leading=20,
-            spaceBefore=14,
-            spaceAfter=8,
-            textColor=colors.HexColor('#000000')
-        ),
-        'CustomHeading3': ParagraphStyle(
-            name='CustomHeading3',
-            fontName='Poppins-SemiBold',
-            fontSize=14,
-            leading=18,
-            spaceBefore=12,
-            spaceAfter=6,
-            textColor=colors.HexColor('#000000')
-        ),
-        'CustomHeading4': ParagraphStyle(
-            name='CustomHeading4',
-            fontName='Poppins-SemiBold',
-            fontSize=12,
-            leading=16,
-            spaceBefore=10,
-            spaceAfter=6,
-            textColor=colors.HexColor('#000000')
-        ),
-        'CustomBodyText': ParagraphStyle(
-            name='CustomBodyText',
-            fontName='Poppins',
-            fontSize=10,
-            leading=14,
-            alignment=TA_JUSTIFY,
-            spaceAfter=8
-        ),
-        'ContactInfo': ParagraphStyle(
-            name='ContactInfo',
-            fontName='Poppins',
-            fontSize=10,
-            leading=14,
-            alignment=TA_CENTER,
-            spaceAfter=4
-        ),
-        'CompanyName': ParagraphStyle(
-            name='CompanyName',
-            fontName='Poppins-SemiBold',
-            fontSize=14,
-            leading=16,
-            alignment=TA_CENTER,
-            spaceAfter=8,
-            textColor=colors.HexColor('#11A64A')
-        )
-    }
-
-    flowables = []
-
-    # Add logo to cover page
-    try:
-        im = Image('watermark.png', width=6*cm, height=3.8*cm)
-        im.hAlign = 'CENTER'
-        flowables.append(Spacer(1, 20))
-        flowables.append(im)
-        flowables.append(Spacer(1, 20))
-    except Exception as e:
-        print(f"Error adding logo: {str(e)}")
-
-    # Add document title
-    flowables.append(Paragraph("Business Requirements Document", custom_styles['CoverTitle']))
-    flowables.append(Spacer(1, 40))
-
-    # Add client name
-    flowables.append(Paragraph(st.session_state.form_fields['client_name'], custom_styles['CoverSubTitle']))
-    flowables.append(Spacer(1, 40))
-
-    # Add document info
-    version = validate_version_number(st.session_state.form_fields['version_number'])
-    formatted_date = st.session_state.form_fields['document_date'].strftime("%B %d, %Y")
-    prepared_by = st.session_state.form_fields['prepared_by']
-
-    flowables.append(Paragraph(f"Version: {version}", custom_styles['CoverInfo']))
-    flowables.append(Paragraph(f"Date: {formatted_date}", custom_styles['CoverInfo']))
-    flowables.append(Paragraph(f"Prepared By: {prepared_by}", custom_styles['CoverInfo']))
-    flowables.append(Spacer(1, 40))
-
-    # Add company info
-    flowables.append(Paragraph("EMB-AI", custom_styles['CompanyName']))
-    
-    company_info = [
-        "Plot No. 17, Phase-4, Maruti Udyog, Sector 18, Gurugram, HR",
-        "Phone: +91-8882102246",
-        "Email: contact@exmyb.com",
-        "Website: www.emb.global"
-    ]
-    
-    for info in company_info:
-        flowables.append(Paragraph(info, custom_styles['ContactInfo']))
-
-    # Add page break after cover
-    flowables.append(PageBreak())
-
-    # Function to convert HTML table to ReportLab Table
-    def html_table_to_reportlab(html_table):
-        soup = BeautifulSoup(html_table, 'html.parser')
-        data = []
-        for row in soup.find_all('tr'):
-            row_data = []
-            for cell in row.find_all(['td', 'th']):
-                cell_content = cell.get_text(separator='\n', strip=True)
-                row_data.append(Paragraph(cell_content, custom_styles['CustomBodyText']))
-            if row_data:
-                data.append(row_data)
-        
-        if not data:
-            return None
-
-        table = Table(data)
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#11A64A')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-            ('FONTNAME', (0, 0), (-1, 0), 'Poppins-SemiBold'),
-            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-            ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
-            ('ALIGN', (0, 1), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 1), (-1, -1), 'Poppins'),
-            ('FONTSIZE', (0, 1), (-1, -1), 9),
-            ('TOPPADDING', (0, 0), (-1, -1), 6),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        return table
-
-# Process main content (continuation of convert_markdown_to_pdf)
-    soup = BeautifulSoup(content_html, 'html.parser')
-    
-    for element in soup.find_all(['h1', 'h2', 'h3', 'h4', 'p', 'pre', 'table', 'ul', 'ol']):
-        try:
-            if element.name == 'h1':
-                flowables.append(Spacer(1, 20))
-                flowables.append(Paragraph(element.text.strip(), custom_styles['CustomHeading1']))
-            elif element.name == 'h2':
-                flowables.append(Spacer(1, 16))
-                flowables.append(Paragraph(element.text.strip(), custom_styles['CustomHeading2']))
-            elif element.name == 'h3':
-                flowables.append(Spacer(1, 14))
-                flowables.append(Paragraph(element.text.strip(), custom_styles['CustomHeading3']))
-            elif element.name == 'h4':
-                flowables.append(Spacer(1, 12))
-                flowables.append(Paragraph(element.text.strip(), custom_styles['CustomHeading4']))
-            elif element.name == 'p':
-                text = element.text.strip()
-                # Check if this paragraph looks like a heading (numbered or bulleted)
-                if re.match(r'^\d+\.\s+', text) or re.match(r'^[•\-\*]\s+', text):
-                    flowables.append(Spacer(1, 10))
-                    flowables.append(Paragraph(text, custom_styles['CustomHeading4']))
-                else:
-                    flowables.append(Paragraph(text, custom_styles['CustomBodyText']))
-            elif element.name == 'pre':
-                code_lines = element.text.split('\n')
-                for line in code_lines:
-                    flowables.append(Paragraph(line, custom_styles['CustomBodyText']))
-            elif element.name == 'table':
-                table = html_table_to_reportlab(str(element))
-                if table:
-                    flowables.append(table)
-            elif element.name in ['ul', 'ol']:
-                for li in element.find_all('li'):
-                    bullet = '•' if element.name == 'ul' else f"{li.find_previous_siblings('li').__len__() + 1}."
-                    text = f"{bullet} {li.text}"
-                    flowables.append(Paragraph(text, custom_styles['CustomBodyText']))
-
-            flowables.append(Spacer(1, 6))
-
-        except Exception as e:
-            print(f"Error processing element: {element}. Error: {str(e)}")
-            flowables.append(Paragraph(str(element), custom_styles['CustomBodyText']))
-
-    # Function to add watermark, page number, and border
-    def add_watermark_and_page_number(canvas, doc):
-        canvas.saveState()
-        
-        if canvas.getPageNumber() == 1:
-            # Draw green border on first page
-            canvas.setStrokeColor(colors.HexColor('#11A64A'))
-            canvas.setLineWidth(2)
-            margin = 30
-            canvas.rect(
-                margin,
-                margin,
-                doc.pagesize[0] - 2*margin,
-                doc.pagesize[1] - 2*margin,
-                stroke=1,
-                fill=0
-            )
-        elif canvas.getPageNumber() > 1:
-            # Add page number and watermark for other pages
-            canvas.setFont('Poppins', 9)
-            page_num = canvas.getPageNumber() - 1
-            text = f"Page {page_num}"
-            canvas.drawRightString(doc.width + doc.rightMargin, doc.bottomMargin, text)
-            
-            watermark = ImageReader('watermark.png')
-            canvas.drawImage(watermark, 
-                           doc.width + doc.rightMargin - 2*cm, 
-                           doc.height + doc.topMargin - 1*cm, 
-                           width=2*cm, height=2*cm, 
-                           mask='auto', 
-                           preserveAspectRatio=True)
-        
-        canvas.restoreState()
-
-    # Build the PDF
-    doc.build(flowables, onFirstPage=add_watermark_and_page_number, onLaterPages=add_watermark_and_page_number)
-    buffer.seek(0)
-    return buffer
-
-def convert_markdown_to_docx(markdown_content):
-    doc = Document()
-    
-    # Set up styles
-    styles = doc.styles
-
-    # Modify the Normal style
-    style_normal = styles['Normal']
-    style_normal.font.name = 'Poppins'
-    style_normal.font.size = Pt(10)
-    style_normal.paragraph_format.space_after = Pt(8)
-
-    # Create custom styles
-    def create_style(name, font_name, font_size, bold=False, italic=False, color=RGBColor(0, 0, 0), alignment=None):
-        style = styles.add_style(name, WD_STYLE_TYPE.PARAGRAPH)
-        font = style.font
-        font.name = font_name
-        font.size = Pt(font_size)
-        font.bold = bold
-        font.italic = italic
-        font.color.rgb = color
-        if alignment:
-            style.paragraph_format.alignment = alignment
-        return style
-
-    # Define document styles
-    style_cover_title = create_style('CoverTitle', 'Poppins', 28, bold=True, 
-                                   alignment=WD_ALIGN_PARAGRAPH.CENTER)
-    style_cover_subtitle = create_style('CoverSubTitle', 'Poppins', 24, bold=True, 
-                                      alignment=WD_ALIGN_PARAGRAPH.CENTER)
-    style_cover_info = create_style('CoverInfo', 'Poppins', 12, 
-                                  alignment=WD_ALIGN_PARAGRAPH.CENTER)
-    style_company_name = create_style('CompanyName', 'Poppins', 14, bold=True,
-                                    color=RGBColor(17, 166, 74), 
-                                    alignment=WD_ALIGN_PARAGRAPH.CENTER)
-    style_contact_info = create_style('ContactInfo', 'Poppins', 10, 
-                                    alignment=WD_ALIGN_PARAGRAPH.CENTER)
-    style_heading1 = create_style('CustomHeading1', 'Poppins', 16, bold=True)
-    style_heading2 = create_style('CustomHeading2', 'Poppins', 14, bold=True)
-    style_heading3 = create_style('CustomHeading3', 'Poppins', 12, bold=True)
-
-    # Set up page margins
-    sections = doc.sections
-    for section in sections:
-        section.top_margin = Cm(2.5)
-        section.bottom_margin = Cm(1.5)
-        section.left_margin = Cm(2)
-        section.right_margin = Cm(2)
-
-    # Add border to first section only
-    section = doc.sections[0]
-    sect_pr = section._sectPr
-    
-    # Create border element
-    border = OxmlElement('w:pgBorders')
-    border.set(qn('w:offsetFrom'), 'page')
-    # Continue from previous DOCX conversion code
-    for edge in ['top', 'left', 'bottom', 'right']:
-        edge_element = OxmlElement(f'w:{edge}')
-        edge_element.set(qn('w:val'), 'single')
-        edge_element.set(qn('w:sz'), '24')  # 3 points
-        edge_element.set(qn('w:space'), '0')
-        edge_element.set(qn('w:color'), '11A64A')  # EMB green
-        border.append(edge_element)
-    
-    sect_pr.append(border)
-
-    # Process first page content
-    first_page = create_first_page_content(
-        st.session_state.form_fields['client_name'],
-        st.session_state.form_fields['prepared_by'],
-        st.session_state.form_fields['document_date'],
-        st.session_state.form_fields['version_number']
-    )
-    
-    # Convert first page markdown to HTML
-    first_page_html = markdown2.markdown(first_page)
-    
-    # Add logo to center of cover page
-    title_paragraph = doc.add_paragraph()
-    title_paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    run = title_paragraph.add_run()
-    run.add_picture("watermark.png", width=Cm(8))
-    
-    # Process first page content
-    soup_first_page = BeautifulSoup(first_page_html, 'html.parser')
-    for element in soup_first_page.find_all(['h1', 'h2', 'p', 'hr']):
-        if element.name == 'h1':
-            doc.add_paragraph(element.text.strip(), style=style_heading1)
-        elif element.name == 'h2':
-            doc.add_paragraph(element.text.strip(), style=style_heading2)
-        elif element.name == 'p':
-            if element.text.strip().startswith('**') and element.text.strip().endswith('**'):
-                # Handle bold text (like company name)
-                p = doc.add_paragraph(element.text.strip().replace('**', ''), style=style_company_name)
-            else:
-                p = doc.add_paragraph(element.text.strip(), style=style_contact_info)
-        elif element.name == 'hr':
-            doc.add_paragraph('─' * 50, style=style_normal)
-
-    # Add page break after first page
-    doc.add_page_break()
-
-    # Add headers and footers
-    def add_header_with_watermark(section):
-        header = section.header
-        paragraph = header.paragraphs[0]
-        paragraph.alignment = WD_ALIGN_PARAGRAPH.RIGHT
-        run = paragraph.add_run()
-        run.add_picture("watermark.png", width=Cm(2))
-        return header
-
-    def add_footer_with_page_number(section):
-        footer = section.footer
-        paragraph = footer.paragraphs[0]
-        paragraph.alignment = WD_ALIGN_PARAGRAPH.RIGHT
-        run = paragraph.add_run()
-        
-        fldChar1 = OxmlElement('w:fldChar')
-        fldChar1.set(qn('w:fldCharType'), 'begin')
-        instrText = OxmlElement('w:instrText')
-        instrText.set(qn('xml:space'), 'preserve')
-        instrText.text = 'PAGE'
-        fldChar2 = OxmlElement('w:fldChar')
-        fldChar2.set(qn('w:fldCharType'), 'end')
-
-        run._element.append(fldChar1)
-        run._element.append(instrText)
-        run._element.append(fldChar2)
-        return footer
-
-    # Add headers and footers to all sections except first
-    for i, section in enumerate(doc.sections):
-        if i > 0:  # Skip first section (cover page)
-            add_header_with_watermark(section)
-            add_footer_with_page_number(section)
-
-    # Convert main content
-    html_content = markdown2.markdown(markdown_content, extras=["tables", "fenced-code-blocks"])
-    soup = BeautifulSoup(html_content, 'html.parser')
-
-    # Process main content
-    for element in soup.find_all(['h1', 'h2', 'h3', 'p', 'pre', 'table', 'ul', 'ol']):
-        try:
-            if element.name == 'h1':
-                doc.add_paragraph(element.text, style=style_heading1)
-            elif element.name == 'h2':
-                doc.add_paragraph(element.text, style=style_heading2)
-            elif element.name == 'h3':
-                doc.add_paragraph(element.text, style=style_heading3)
-            elif element.name == 'p':
-                doc.add_paragraph(element.text, style=style_normal)
-            elif element.name == 'pre':
-                for line in element.text.split('\n'):
-                    p = doc.add_paragraph(line, style=style_normal)
-                    p.paragraph_format.left_indent = Inches(0.5)
-            elif element.name == 'table':
-                table_data = []
-                for row in element.find_all('tr'):
-                    row_data = [cell.text.strip() for cell in row.find_all(['th', 'td'])]
-                    table_data.append(row_data)
-                
-                if table_data:
-                    num_rows = len(table_data)
-                    num_cols = len(table_data[0])
-                    table = doc.add_table(rows=num_rows, cols=num_cols)
-                    table.style = 'Table Grid'
-                    
-                    for i, row in enumerate(table_data):
-                        for j, cell in enumerate(row):
-                            table.cell(i, j).text = cell
-                            paragraph = table.cell(i, j).paragraphs[0]
-                            
-                            if i == 0:  # Header row
-                                run = paragraph.runs[0]
-                                run.font.bold = True
-                                run.font.name = 'Poppins'
-                                run.font.size = Pt(10)
-                                paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                                
-                                # Apply EMB green background
-                                shading_elm = parse_xml(r'<w:shd {} w:fill="11A64A"/>'.format(nsdecls('w')))
-                                table.cell(i, j)._element.get_or_add_tcPr().append(shading_elm)
-                                run.font.color.rgb = RGBColor(255, 255, 255)
-                            else:
-                                run = paragraph.runs[0]
-                                run.font.name = 'Poppins'
-                                run.font.size = Pt(9)
-                    
-                    doc.add_paragraph()  # Add space after table
-            elif element.name in ['ul', 'ol']:
-                for li in element.find_all('li'):
-                    paragraph = doc.add_paragraph(li.text, style=style_normal)
-                    paragraph.style = 'List Bullet' if element.name == 'ul' else 'List Number'
-
-        except Exception as e:
-            print(f"Error processing element: {element}. Error: {str(e)}")
-            doc.add_paragraph(str(element), style=style_normal)
-
-    # Save to BytesIO
-    docx_buffer = BytesIO()
-    doc.save(docx_buffer)
-    docx_buffer.seek(0)
-    return docx_buffer
 # Generate BRD button
+perf.block("generate")
 if st.button("Generate BRD", key="generate_brd"):
     # Validate all required fields
     validation_errors = []
@@ -1181,12 +590,17 @@ if st.button("Generate BRD", key="generate_brd"):
             # Initialize content_parts dictionary
             content_parts = {}
 
+            # Export workers convert each part as soon as it finishes streaming
+            assembler = BrdAssembler(get_export_engine())
+            st.session_state.brd_assembler = assembler
+
             # Generate Part 1
             with st.spinner('Generating Part 1: Executive Summary and Project Approach...'):
                 with part1_container:
                     model = get_model(1)
-                    response_part1 = generate_brd_part(get_prompt_part1(), st.empty(), model, temp_part1)
+                    response_part1 = generate_brd_part(get_prompt_part1(), st.empty(), model, get_temperature(1))
                     content_parts['part1'] = response_part1
+                    assembler.add_part('part1', response_part1)
             
             progress_bar.progress(0.25)
             status_text.text("Part 1 completed. Generating Part 2...")
@@ -1195,8 +609,9 @@ if st.button("Generate BRD", key="generate_brd"):
             with st.spinner('Generating Part 2: Functional Requirements and Integrations...'):
                 with part2_container:
                     model = get_model(2)
-                    response_part2 = generate_brd_part(get_prompt_part2(response_part1), st.empty(), model, temp_part2)
+                    response_part2 = generate_brd_part(get_prompt_part2(response_part1), st.empty(), model, get_temperature(2))
                     content_parts['part2'] = response_part2
+                    assembler.add_part('part2', response_part2)
 
             progress_bar.progress(0.5)
             status_text.text("Part 2 completed. Generating Part 3...")
@@ -1209,9 +624,10 @@ if st.button("Generate BRD", key="generate_brd"):
                         get_prompt_part3(response_part1, response_part2),
                         st.empty(),
                         model,
-                        temp_part3
+                        get_temperature(3)
                     )
                     content_parts['part3'] = response_part3
+                    assembler.add_part('part3', response_part3)
 
             progress_bar.progress(0.75)
             status_text.text("Part 3 completed. Generating Part 4...")
@@ -1224,9 +640,10 @@ if st.button("Generate BRD", key="generate_brd"):
                         get_prompt_part4(response_part1, response_part2, response_part3),
                         st.empty(),
                         model,
-                        temp_part4
+                        get_temperature(4)
                     )
                     content_parts['part4'] = response_part4
+                    assembler.add_part('part4', response_part4)
 
             progress_bar.progress(1.0)
             status_text.text("BRD Generation Completed!")
@@ -1239,15 +656,7 @@ if st.button("Generate BRD", key="generate_brd"):
             )
 
             # Combine all parts into final document
-            full_brd = f"""
-{response_part1}
-
-{response_part2}
-
-{response_part3}
-
-{response_part4}
-"""
+            full_brd = join_parts([response_part1, response_part2, response_part3, response_part4])
 
             # Success message and completion animation
             st.success("BRD Generated Successfully!")
@@ -1274,7 +683,78 @@ if st.button("Generate BRD", key="generate_brd"):
         except Exception as e:
             st.error(f"An error occurred during BRD generation: {str(e)}")
             st.error("Please try again or contact support if the issue persists.")
+# BRD history: re-export stored BRDs without regenerating them
+HISTORY_PAGE_SIZE = 10
+
+def history_cover(selected: dict):
+    """Cover details for a stored BRD, dated from the form it was generated from"""
+    form = get_storage().get_form(selected['client_name'], selected['version'], selected['timestamp'])
+    # Content saved without a form falls back to the day it was generated
+    stored_date = form['document_date'] if form is not None else selected['timestamp'][:10]
+    try:
+        document_date = datetime.strptime(stored_date, '%Y-%m-%d').date()
+    except ValueError:
+        document_date = date.today()
+    return {
+        'client_name': selected['client_name'],
+        'prepared_by': selected['generated_by'],
+        'document_date': document_date,
+        'version_number': selected['version']
+    }
+
+@st.fragment
+@perf.timed("brd_history")
+def brd_history():
+    """Paginated list of stored BRDs with downloads for the selected one"""
+    store = get_storage()
+    client_filter = st.selectbox("Client", ["All clients"] + store.list_clients(), key="history_client")
+    client_name = None if client_filter == "All clients" else client_filter
+
+    total = store.count_content(client_name)
+    if not total:
+        st.info("No stored BRDs yet.")
+        return
+    pages = (total + HISTORY_PAGE_SIZE - 1) // HISTORY_PAGE_SIZE
+    page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1,
+                           key="history_page")
+    rows = store.list_content((page - 1) * HISTORY_PAGE_SIZE, HISTORY_PAGE_SIZE, client_name)
+    st.dataframe(rows, hide_index=True)
+
+    # Keyed by id: a client/version saved twice is two entries
+    options = {row['id']: row for row in rows}
+    choice = st.selectbox("Stored BRD", list(options), key="history_choice",
+                          format_func=lambda content_id: (
+                              f"{options[content_id]['client_name']} {options[content_id]['version']} "
+                              f"by {options[content_id]['generated_by']} ({options[content_id]['timestamp']})"))
+    if st.button("Load BRD", key="history_load"):
+        st.session_state.history_selection = options[choice]
+
+    selected = st.session_state.get('history_selection')
+    if not selected:
+        return
+    result = get_brd_content(selected['client_name'], selected['version'], selected['id'])
+    if not result['success']:
+        st.error(result['message'])
+        return
+    content = join_parts([result['content'][key] for key in ('part1', 'part2', 'part3', 'part4')])
+    cover = history_cover(selected)
+    st.markdown(f"**{selected['client_name']} {selected['version']}**, generated by "
+                f"{selected['generated_by']} on {selected['timestamp']}")
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        markdown_download(content, selected['client_name'], selected['version'], key_prefix="history_")
+    with col2:
+        pdf_download(content, selected['client_name'], selected['version'], cover, key_prefix="history_")
+    with col3:
+        docx_download(content, selected['client_name'], selected['version'], cover, key_prefix="history_")
+
+perf.block("history")
+with st.expander("📚 BRD History"):
+    brd_history()
+
 # Footer
+perf.block("footer")
 st.markdown("---")
 st.markdown("""
 <div style='text-align: center;'>
@@ -1284,5 +764,53 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
+# First-use costs paid in the background once per process, after the
+# first render, so the first BRD after a deploy runs at steady-state speed.
+# BRD_WARM_UP=0 turns this off.
+WARM_UP_MODULES = ["anthropic", "exporters", "streamlit_lottie"]
+
+def warm_up_modules():
+    for name in WARM_UP_MODULES:
+        importlib.import_module(name)
+
+def warm_up_anthropic():
+    """Open the pooled connection to the API, paying for the TLS handshake"""
+    import anthropic
+    try:
+        get_anthropic_client().with_options(max_retries=0).get("/v1/models", cast_to=object)
+    except anthropic.APIStatusError:
+        # Any HTTP answer means the connection is open
+        pass
+
+def warm_up_sheets():
+    """Authorize with Google and build the Sheets replica"""
+    setup_google_sheets().spreadsheet()
+    store = get_storage()
+    if isinstance(store, ReplicatedStore):
+        # Resolving the replica starts the write queue and loads the download index
+        _ = store.replica
+
+def warm_up_steps():
+    steps = [
+        ("modules", warm_up_modules),
+        ("anthropic", warm_up_anthropic),
+        ("export_workers", lambda: get_export_engine().start_workers())
+    ]
+    if os.environ.get("BRD_SHEETS_REPLICA", "1") != "0" and "GOOGLE_SHEETS" in st.secrets:
+        steps.append(("sheets", warm_up_sheets))
+    return steps
+
+@st.cache_resource
+def get_warm_up():
+    """Warm-up shared by all sessions; status() reports readiness and timings"""
+    from warmup import WarmUp
+    warm_up = WarmUp(warm_up_steps())
+    if os.environ.get("BRD_WARM_UP", "1") != "0":
+        warm_up.start()
+    return warm_up
+
+get_warm_up()
+perf.block(None)
+
 if __name__ == "__main__":
     pass
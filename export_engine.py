@@ -0,0 +1,444 @@
+"""Process-pool export engine.
+
+ReportLab and python-docx layout is pure Python and CPU bound, so running it
+on the Streamlit server thread makes concurrent exports serialize on the GIL
+and stall every other session. ExportEngine hands conversions to a bounded
+ProcessPoolExecutor instead. Jobs only carry picklable inputs (markdown text
+plus the cover metadata dict) and return the finished file as bytes.
+
+Segment jobs convert one BRD part into PDF flowables or DOCX blocks as
+soon as it has streamed (see assembly.py). They return the segment
+pickled, so the server process only passes bytes from one job to the
+next and never unpickles or copies layout objects itself.
+"""
+import atexit
+import hashlib
+import multiprocessing
+import os
+import pickle
+import sys
+import threading
+import time
+import types
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from datetime import date
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+EXPORT_FORMATS = ('pdf', 'docx')
+
+# Seconds export() waits for a result. Kept above the slowest budget in
+# benchmarks/budgets.json, so a document that meets its budget never
+# times out in the app.
+EXPORT_TIMEOUT = 180
+
+# Rendered once by each warm worker: a heading, inline styles, a list and
+# an annexure table, so every layout path has run before the first job
+WARM_UP_MARKDOWN = """# Warm-up
+
+A short paragraph with **bold** and *italic* text.
+
+- First item
+- Second item
+
+| Requirement ID | Module/Feature | Description |
+|----------------|----------------|-------------|
+| UP-1 | Login | Users sign in with email |
+"""
+
+WARM_UP_COVER = {
+    'client_name': 'Warm-up',
+    'prepared_by': 'Warm-up',
+    'document_date': date(2024, 1, 1),
+    'version_number': 'v1'
+}
+
+
+class ExportQueueFull(Exception):
+    """Raised when no export slot frees up within the queue timeout"""
+
+
+def _export_job(fmt, markdown_content, cover, segments=None, profile=None):
+    """Worker entry point: convert markdown and return (bytes, run seconds)
+
+    When segments from _segment_job are given, only the cover is built
+    here and the segments are laid out behind it. profile selects a PDF
+    output profile and is ignored for DOCX.
+    """
+    # Imported here so the parent process never pays for the export stack
+    # just to submit jobs
+    from exporters import (
+        convert_markdown_to_pdf, convert_markdown_to_docx,
+        render_pdf_segments, render_docx_segments
+    )
+
+    started = time.perf_counter()
+    if segments is not None:
+        # A fresh copy per job, which layout is free to mutate
+        segments = [pickle.loads(segment) for segment in segments]
+    if fmt == 'pdf':
+        if segments is not None:
+            buffer = render_pdf_segments(segments, cover, profile)
+        else:
+            buffer = convert_markdown_to_pdf(markdown_content, cover, profile)
+    elif fmt == 'docx':
+        if segments is not None:
+            buffer = render_docx_segments(segments, cover)
+        else:
+            buffer = convert_markdown_to_docx(markdown_content, cover)
+    else:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    return buffer.getvalue(), time.perf_counter() - started
+
+
+def _segment_job(fmt, markdown_content):
+    """Worker entry point: convert one BRD part and return (pickled segment, run seconds)"""
+    from exporters import markdown_to_flowables, markdown_to_docx_blocks
+
+    started = time.perf_counter()
+    if fmt == 'pdf':
+        segment = markdown_to_flowables(markdown_content)
+    elif fmt == 'docx':
+        segment = markdown_to_docx_blocks(markdown_content)
+    else:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    return pickle.dumps(segment, pickle.HIGHEST_PROTOCOL), time.perf_counter() - started
+
+
+def _warm_worker(profile=None):
+    """Worker initializer: pay for imports, fonts and first layouts before any job"""
+    try:
+        for fmt in EXPORT_FORMATS:
+            _export_job(fmt, WARM_UP_MARKDOWN, WARM_UP_COVER, profile=profile)
+    except Exception as e:
+        # An initializer error would break the whole pool
+        print(f"Error warming up export worker: {str(e)}")
+
+
+def _worker_pid():
+    return os.getpid()
+
+
+@contextmanager
+def hidden_main_module():
+    """Start worker processes without re-running the app script in them
+
+    Streamlit installs the app script as __main__, and spawned processes
+    re-run __main__ by path before doing any work, so every export worker
+    would execute the whole script (secrets, clients, background threads).
+    Workers only need export_engine, so __main__ is swapped for an empty
+    module while they start.
+    """
+    main_module = sys.modules.get('__main__')
+    sys.modules['__main__'] = types.ModuleType('__main__')
+    try:
+        yield
+    finally:
+        sys.modules['__main__'] = main_module
+
+
+class ExportCache:
+    """LRU of finished export files, bounded by total size in bytes"""
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._items = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(fmt, markdown_content, cover, profile=None):
+        """Cache key; segments are derived from the markdown, so they are not part of it"""
+        digest = hashlib.sha1(markdown_content.encode('utf-8')).hexdigest()
+        return (fmt, profile, digest, tuple(sorted((k, str(v)) for k, v in cover.items())))
+
+    def get(self, key):
+        with self._lock:
+            data = self._items.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, key, data):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._items:
+                self._size -= len(self._items.pop(key))
+            self._items[key] = data
+            self._size += len(data)
+            while self._size > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self._size -= len(evicted)
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._items), 'bytes': self._size,
+                    'hits': self.hits, 'misses': self.misses}
+
+
+def _copy_outcome(source, target):
+    """Resolve target with the result, exception or cancellation of source"""
+    if source.cancelled():
+        target.cancel()
+    elif source.exception() is not None:
+        target.set_exception(source.exception())
+    else:
+        target.set_result(source.result())
+
+
+class ExportEngine:
+    """Run PDF/DOCX conversions in a bounded pool of worker processes
+
+    max_workers caps the CPU spent on exports, max_pending caps how many
+    jobs may be queued or running at once. Callers that cannot get a slot
+    within queue_timeout seconds get ExportQueueFull, and export() gives up
+    waiting for a result after timeout seconds. A job that times out keeps
+    running; export() of the same document while it runs waits on that job
+    instead of starting another, and its result is cached when it finishes.
+    Finished files are kept in an ExportCache of cache_bytes, so exporting
+    the same BRD again (another rerun, or a past BRD from the history view)
+    skips the worker entirely.
+    With warm_workers, each worker renders a tiny PDF (in warm_profile) and
+    DOCX as it starts; start_workers() starts them all ahead of time.
+    """
+
+    def __init__(self, max_workers=None, max_pending=None, queue_timeout=10, timeout=EXPORT_TIMEOUT,
+                 history_size=200, cache_bytes=64 * 1024 * 1024, warm_workers=False,
+                 warm_profile=None):
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.max_pending = max_pending or self.max_workers * 2
+        self.queue_timeout = queue_timeout
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pending = 0
+        self._metrics = deque(maxlen=history_size)
+        self.cache = ExportCache(cache_bytes)
+        # Cache key -> Future of the job exporting that document
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        self.warm_workers = warm_workers
+        self.warm_profile = warm_profile
+        atexit.register(self.shutdown)
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # Forking a threaded Streamlit server is unsafe, always spawn
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_warm_worker if self.warm_workers else None,
+                    initargs=(self.warm_profile,) if self.warm_workers else ()
+                )
+            return self._executor
+
+    def _reset_executor(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def start_workers(self):
+        """Start every worker now rather than on demand; returns how many answered"""
+        # Each job that finds no idle worker starts a new one, up to max_workers
+        with hidden_main_module():
+            executor = self._get_executor()
+            futures = [executor.submit(_worker_pid) for _ in range(self.max_workers)]
+        return len({future.result(timeout=self.timeout) for future in futures})
+
+    def submit(self, fmt, markdown_content, cover, segments=None, profile=None):
+        """Queue a conversion and return a Future resolving to (bytes, run seconds)"""
+        return self._submit('export', fmt, markdown_content, profile, _export_job,
+                            fmt, markdown_content, dict(cover), segments, profile)
+
+    def submit_segment(self, fmt, markdown_content):
+        """Queue a part conversion; the Future resolves to (pickled segment, run seconds)"""
+        return self._submit('segment', fmt, markdown_content, None, _segment_job,
+                            fmt, markdown_content)
+
+    def _submit(self, kind, fmt, markdown_content, profile, job, *args):
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export format: {fmt}")
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            raise ExportQueueFull(f"{self.max_pending} exports already queued or running")
+
+        submitted = time.perf_counter()
+        with self._lock:
+            self._pending += 1
+            queue_depth = self._pending
+
+        try:
+            # Workers are started on demand inside submit()
+            with hidden_main_module():
+                future = self._get_executor().submit(job, *args)
+        except BrokenProcessPool:
+            # A crashed worker poisons the whole pool; start a fresh one
+            self._reset_executor()
+            try:
+                with hidden_main_module():
+                    future = self._get_executor().submit(job, *args)
+            except Exception:
+                self._release()
+                raise
+        except Exception:
+            self._release()
+            raise
+
+        def _on_done(done):
+            total = time.perf_counter() - submitted
+            record = {
+                'kind': kind,
+                'format': fmt,
+                'profile': profile,
+                'input_chars': len(markdown_content),
+                'queue_depth': queue_depth,
+                'total_seconds': total,
+                'run_seconds': None,
+                'wait_seconds': None,
+                'output_bytes': None,
+                'status': 'ok'
+            }
+            if done.cancelled():
+                record['status'] = 'cancelled'
+            elif done.exception() is not None:
+                record['status'] = f"error: {done.exception()}"
+            else:
+                data, run_seconds = done.result()
+                record['run_seconds'] = run_seconds
+                record['wait_seconds'] = max(total - run_seconds, 0.0)
+                record['output_bytes'] = len(data)
+            self._metrics.append(record)
+            self._release()
+
+        future.add_done_callback(_on_done)
+        return future
+
+    def _release(self):
+        with self._lock:
+            self._pending -= 1
+        self._slots.release()
+
+    def export(self, fmt, markdown_content, cover, timeout=None, segments=None, profile=None):
+        """Convert markdown in a worker process and return the file bytes
+
+        segments are the pickled part segments from submit_segment(), or a
+        callable returning them (or None). A callable is only called when
+        a new job is needed, not for a cached or running export.
+        """
+        cache_key = ExportCache.key(fmt, markdown_content, cover, profile)
+        data = self.cache.get(cache_key)
+        if data is not None:
+            return data
+        # Only the lookup and registration happen under the lock: building
+        # segments and waiting for a queue slot can take seconds, and other
+        # sessions' exports must not queue behind them
+        with self._inflight_lock:
+            future = self._inflight.get(cache_key)
+            owner = future is None
+            if owner:
+                # Sessions exporting the same document meanwhile wait on this
+                future = Future()
+                self._inflight[cache_key] = future
+        if owner:
+            future.add_done_callback(lambda done: self._finish(cache_key, done))
+            try:
+                if callable(segments):
+                    segments = segments()
+                job = self.submit(fmt, markdown_content, cover, segments, profile)
+            except BaseException as e:
+                future.set_exception(e)
+                raise
+            job.add_done_callback(lambda done: _copy_outcome(done, future))
+        try:
+            data, _ = future.result(timeout=timeout or self.timeout)
+        except TimeoutError:
+            # The job keeps its worker until it finishes; _finish() caches
+            # the result, so asking again later picks it up
+            self._metrics.append({
+                'kind': 'export',
+                'format': fmt,
+                'profile': profile,
+                'input_chars': len(markdown_content),
+                'status': 'timeout'
+            })
+            raise
+        except BrokenProcessPool:
+            self._reset_executor()
+            raise
+        self.cache.put(cache_key, data)
+        return data
+
+    def _finish(self, cache_key, future):
+        """Done callback of an export() job: cache its result, even a late one
+
+        Takes _inflight_lock, so export() attaches it and completes the
+        future only with the lock released; a future that is already done
+        runs its callbacks at once, in the calling thread.
+        """
+        with self._inflight_lock:
+            if self._inflight.get(cache_key) is future:
+                del self._inflight[cache_key]
+        if not future.cancelled() and future.exception() is None:
+            self.cache.put(cache_key, future.result()[0])
+
+    def metrics(self):
+        """Recent per-job timings, oldest first"""
+        return list(self._metrics)
+
+    def stats(self):
+        """Summary of queue state and recent job timings"""
+        # Segment jobs are much shorter, so run times are those of full exports
+        finished = [m for m in self._metrics
+                    if m.get('kind') == 'export' and m.get('run_seconds') is not None]
+        run_times = sorted(m['run_seconds'] for m in finished)
+        with self._lock:
+            pending = self._pending
+        return {
+            'max_workers': self.max_workers,
+            'max_pending': self.max_pending,
+            'pending': pending,
+            'jobs': len(self._metrics),
+            'failed': sum(1 for m in self._metrics if m['status'] != 'ok'),
+            'avg_run_seconds': sum(run_times) / len(run_times) if run_times else None,
+            'p95_run_seconds': run_times[min(len(run_times) - 1, int(len(run_times) * 0.95))] if run_times else None,
+            'avg_wait_seconds': (sum(m['wait_seconds'] for m in finished) / len(finished)
+                                 if finished else None),
+            'cache': self.cache.stats()
+        }
+
+    def shutdown(self, wait=False):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait, cancel_futures=True)
+                self._executor = None
+
+
+_shared_engine = None
+_shared_engine_lock = threading.Lock()
+
+
+def get_shared_engine(**options):
+    """Process-wide engine shared by the app and its pages
+
+    options are passed to ExportEngine on the first call and ignored after.
+    """
+    global _shared_engine
+    with _shared_engine_lock:
+        if _shared_engine is None:
+            _shared_engine = ExportEngine(**options)
+        return _shared_engine
+
+
+def shared_engine():
+    """The process-wide engine, or None if nothing has exported yet"""
+    with _shared_engine_lock:
+        return _shared_engine
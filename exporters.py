@@ -0,0 +1,1019 @@
+"""PDF and DOCX exporters for generated BRDs.
+
+Kept free of Streamlit so the converters can run in worker processes
+(see export_engine.py). Cover details are passed in as a plain, picklable
+dict with the keys client_name, prepared_by, document_date and
+version_number instead of being read from st.session_state.
+"""
+import markdown2
+from io import BytesIO
+from datetime import datetime, date
+from reportlab.lib.pagesizes import letter
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Preformatted, Spacer, Table, LongTable, TableStyle, PageBreak, Image
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY
+from reportlab.lib.units import cm
+from reportlab.lib import colors
+from reportlab import rl_config
+from bs4 import BeautifulSoup
+from reportlab.pdfbase import pdfmetrics
+from docx import Document
+from docx.shared import Inches, Pt, Cm, RGBColor
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+from docx.enum.style import WD_STYLE_TYPE
+from docx.oxml.shared import OxmlElement, qn
+from docx.oxml.ns import nsdecls
+from docx.oxml import parse_xml
+from lxml import etree
+import copy
+import os
+import re
+import threading
+import zipfile
+from xml.sax.saxutils import escape as xml_escape
+from functools import lru_cache
+from asset_registry import registry
+
+# Register Poppins fonts; the registry parses each TTF once per process
+FONTS = {
+    'Poppins': 'assets/Poppins-Regular.ttf',
+    'Poppins-SemiBold': 'assets/Poppins-SemiBold.ttf'
+}
+for font_name, font_path in FONTS.items():
+    registry.font(font_name, font_path)
+
+# Version number handling functions
+def format_version_number(version_input):
+    """Format the version number to ensure it starts with 'v'"""
+    if not version_input:
+        return 'v1'
+    version = version_input.lower().strip().replace('v', '')
+    return f'v{version}' if version else 'v1'
+
+def validate_version_number(version_input):
+    """Validate the version number format"""
+    try:
+        formatted_version = format_version_number(version_input)
+        version_num = formatted_version[1:]
+        if not version_num:
+            return 'v1'
+        float(version_num)
+        return formatted_version
+    except ValueError:
+        return 'v1'
+
+# Create first page content
+def create_first_page_content(client_name, prepared_by, input_date, version_number):
+    formatted_date = input_date.strftime("%B %d, %Y") if isinstance(input_date, (date, datetime)) else date.today().strftime("%B %d, %Y")
+    formatted_version = validate_version_number(version_number)
+    
+    return f"""
+# Business Requirements Document
+
+## {client_name}
+
+**Date:** {formatted_date}
+**Prepared By:** {prepared_by}
+**Document Version:** {formatted_version}
+
+---
+
+**CONFIDENTIAL**
+
+This document contains confidential and proprietary information. It is shared under the terms of the confidentiality agreement included within this document. Unauthorized distribution or copying is prohibited.
+
+---
+
+**EMB-AI**
+
+**Address:** Plot No. 17, Phase-4, Maruti Udyog, Sector 18, Gurugram, HR
+**Phone:** +91-8882102246
+**Email:** contact@exmyb.com
+**Website:** www.emb.global
+"""
+
+def _build_pdf_styles():
+    return {
+        'CoverTitle': ParagraphStyle(
+            name='CoverTitle',
+            fontName='Poppins-SemiBold',
+            fontSize=28,
+            leading=34,
+            alignment=TA_CENTER,
+            spaceAfter=30
+        ),
+        'CoverSubTitle': ParagraphStyle(
+            name='CoverSubTitle',
+            fontName='Poppins-SemiBold',
+            fontSize=24,
+            leading=28,
+            alignment=TA_CENTER,
+            spaceAfter=40
+        ),
+        'CoverInfo': ParagraphStyle(
+            name='CoverInfo',
+            fontName='Poppins',
+            fontSize=12,
+            leading=16,
+            alignment=TA_CENTER,
+            spaceAfter=12
+        ),
+        'CustomHeading1': ParagraphStyle(
+            name='CustomHeading1',
+            fontName='Poppins-SemiBold',
+            fontSize=18,
+            leading=22,
+            spaceBefore=16,
+            spaceAfter=10,
+            textColor=colors.HexColor('#000000')
+        ),
+        'CustomHeading2': ParagraphStyle(
+            name='CustomHeading2',
+            fontName='Poppins-SemiBold',
+            fontSize=16,
+            leading=20,
+            spaceBefore=14,
+            spaceAfter=8,
+            textColor=colors.HexColor('#000000')
+        ),
+        'CustomHeading3': ParagraphStyle(
+            name='CustomHeading3',
+            fontName='Poppins-SemiBold',
+            fontSize=14,
+            leading=18,
+            spaceBefore=12,
+            spaceAfter=6,
+            textColor=colors.HexColor('#000000')
+        ),
+        'CustomHeading4': ParagraphStyle(
+            name='CustomHeading4',
+            fontName='Poppins-SemiBold',
+            fontSize=12,
+            leading=16,
+            spaceBefore=10,
+            spaceAfter=6,
+            textColor=colors.HexColor('#000000')
+        ),
+        'CustomBodyText': ParagraphStyle(
+            name='CustomBodyText',
+            fontName='Poppins',
+            fontSize=10,
+            leading=14,
+            alignment=TA_JUSTIFY,
+            spaceAfter=8
+        ),
+        'CustomCode': ParagraphStyle(
+            name='CustomCode',
+            fontName='Courier',
+            fontSize=9,
+            leading=12,
+            leftIndent=12,
+            spaceAfter=8
+        ),
+        'ContactInfo': ParagraphStyle(
+            name='ContactInfo',
+            fontName='Poppins',
+            fontSize=10,
+            leading=14,
+            alignment=TA_CENTER,
+            spaceAfter=4
+        ),
+        'CompanyName': ParagraphStyle(
+            name='CompanyName',
+            fontName='Poppins-SemiBold',
+            fontSize=14,
+            leading=16,
+            alignment=TA_CENTER,
+            spaceAfter=8,
+            textColor=colors.HexColor('#11A64A')
+        )
+    }
+
+# Styles, table style and watermark are compiled once per process and shared
+# by every export; ReportLab only reads them during layout
+PDF_STYLES = _build_pdf_styles()
+
+PDF_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#11A64A')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+    ('FONTNAME', (0, 0), (-1, 0), 'Poppins-SemiBold'),
+    ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+    ('FONTSIZE', (0, 0), (-1, 0), 10),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.white),
+    ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
+    ('ALIGN', (0, 1), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 1), (-1, -1), 'Poppins'),
+    ('FONTSIZE', (0, 1), (-1, -1), 9),
+    ('TOPPADDING', (0, 0), (-1, -1), 6),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black)
+])
+
+# Page geometry, shared by render_pdf and the table column planner
+PAGE_SIZE = letter
+TOP_MARGIN = 2.5 * cm
+BOTTOM_MARGIN = 1.5 * cm
+LEFT_MARGIN = 2 * cm
+RIGHT_MARGIN = 2 * cm
+# SimpleDocTemplate frames keep 6pt of padding on each side
+FRAME_WIDTH = PAGE_SIZE[0] - LEFT_MARGIN - RIGHT_MARGIN - 12
+
+# Tables longer than this use LongTable with precomputed column widths
+# and pre-wrapped body cells
+LARGE_TABLE_ROWS = 30
+TABLE_CELL_PADDING = 6
+# Body cells of a large table are set like CustomBodyText paragraphs
+LARGE_TABLE_BODY_STYLE = TableStyle([
+    ('FONT', (0, 1), (-1, -1), PDF_STYLES['CustomBodyText'].fontName,
+     PDF_STYLES['CustomBodyText'].fontSize, PDF_STYLES['CustomBodyText'].leading)
+])
+
+WATERMARK_PATH = 'watermark.png'
+# Printed size of each watermark use, for downsampling
+COVER_LOGO_SIZE = (6 * cm, 3.8 * cm)
+HEADER_WATERMARK_SIZE = (2 * cm, 2 * cm)
+DOCX_TEMPLATE_PATH = 'assets/brd_template.docx'
+PAGE_FURNITURE_FORM = 'brdPageFurniture'
+BORDER_COLOR = colors.HexColor('#11A64A')
+
+def get_pdf_styles():
+    """Paragraph styles used by the PDF exporter"""
+    return PDF_STYLES
+
+# PDF output profiles. TTFont already embeds only the glyphs a document
+# uses, so fonts are subset in every profile; compact additionally
+# downsamples the watermark to its printed size and skips the ASCII85
+# encoding that inflates binary streams by a quarter.
+PDF_PROFILES = {
+    'standard': {'watermark_dpi': None, 'ascii85': True},
+    'compact': {'watermark_dpi': 150, 'ascii85': False}
+}
+DEFAULT_PDF_PROFILE = 'standard'
+
+def get_pdf_profile(profile=None):
+    """Settings for a PDF output profile name"""
+    try:
+        return PDF_PROFILES[profile or DEFAULT_PDF_PROFILE]
+    except KeyError:
+        raise ValueError(f"Unknown PDF profile: {profile}")
+
+def watermark_source(size, profile=None):
+    """In-memory PNG for a watermark printed at size under a profile"""
+    dpi = get_pdf_profile(profile)['watermark_dpi']
+    if dpi is None:
+        return BytesIO(registry.data(WATERMARK_PATH))
+    return BytesIO(registry.png(WATERMARK_PATH, size[0], size[1], dpi))
+
+def get_watermark_reader(profile=None):
+    """Decoded header watermark for a profile, loaded once per process"""
+    dpi = get_pdf_profile(profile)['watermark_dpi']
+    return registry.image_reader(WATERMARK_PATH, *HEADER_WATERMARK_SIZE, dpi=dpi)
+
+@lru_cache(maxsize=16384)
+def _word_width(word, font_name, font_size):
+    return pdfmetrics.stringWidth(word, font_name, font_size)
+
+def _text_extent(text, font_name, font_size):
+    """Width of text set on one line, and of its widest word"""
+    widths = [_word_width(word, font_name, font_size) for word in text.split()]
+    if not widths:
+        return 0, 0
+    space = _word_width(' ', font_name, font_size)
+    return sum(widths) + space * (len(widths) - 1), max(widths)
+
+def plan_column_widths(rows, font_name, font_size, available_width=FRAME_WIDTH):
+    """Column widths for a table of cell texts, from cached font metrics
+
+    Columns get their natural single-line width when everything fits.
+    Otherwise each column keeps room for its widest word and the rest of
+    the width is shared out in proportion to how much text it holds, so
+    ReportLab never has to measure cells to size the columns itself.
+    """
+    num_cols = max(len(row) for row in rows)
+    padding = 2 * TABLE_CELL_PADDING
+    natural = [0] * num_cols
+    widest = [0] * num_cols
+    for row in rows:
+        for j, text in enumerate(row):
+            line, word = _text_extent(text, font_name, font_size)
+            natural[j] = max(natural[j], line)
+            widest[j] = max(widest[j], word)
+
+    wanted = [width + padding for width in natural]
+    if sum(wanted) <= available_width:
+        scale = available_width / sum(wanted) if sum(wanted) else 1
+        return [width * scale for width in wanted]
+
+    floor = [min(word + padding, available_width / num_cols) for word in widest]
+    spare = available_width - sum(floor)
+    demand = [max(w - f, 0) for w, f in zip(wanted, floor)]
+    total_demand = sum(demand) or 1
+    return [f + spare * d / total_demand for f, d in zip(floor, demand)]
+
+def wrap_cell_text(text, width, font_name, font_size):
+    """Text broken into lines that fit width, from cached font metrics
+
+    Breaks greedily between words, as Paragraph does, and keeps the cell's
+    own line breaks. A word wider than width gets a line to itself.
+    """
+    space = _word_width(' ', font_name, font_size)
+    lines = []
+    for source_line in text.split('\n'):
+        line, line_width = [], 0
+        for word in source_line.split():
+            word_width = _word_width(word, font_name, font_size)
+            if line and line_width + space + word_width > width:
+                lines.append(' '.join(line))
+                line, line_width = [word], word_width
+            else:
+                line_width += (space if line else 0) + word_width
+                line.append(word)
+        lines.append(' '.join(line))
+    return '\n'.join(lines)
+
+def build_pdf_table(rows, custom_styles=None):
+    """ReportLab table for rows of cell texts, the first row being the header"""
+    custom_styles = custom_styles or get_pdf_styles()
+    cell_style = custom_styles['CustomBodyText']
+
+    if len(rows) <= LARGE_TABLE_ROWS:
+        table = Table([[Paragraph(text, cell_style) for text in row] for row in rows])
+        table.setStyle(PDF_TABLE_STYLE)
+        return table
+
+    # Large-table mode: fixed column widths, the header repeated on every
+    # page and splitting between rows. Wrapping a Paragraph per cell, once
+    # to size the row and again on every page split, is most of the time
+    # a long table takes, so body cells are broken into lines here and
+    # drawn as plain text in the body font.
+    num_cols = max(len(row) for row in rows)
+    rows = [list(row) + [''] * (num_cols - len(row)) for row in rows]
+    font_name, font_size = cell_style.fontName, cell_style.fontSize
+    col_widths = plan_column_widths(rows, font_name, font_size)
+    text_widths = [width - 2 * TABLE_CELL_PADDING for width in col_widths]
+    data = [[Paragraph(text, cell_style) for text in rows[0]]]
+    data.extend([wrap_cell_text(text, width, font_name, font_size)
+                 for text, width in zip(row, text_widths)] for row in rows[1:])
+    table = LongTable(data, colWidths=col_widths, repeatRows=1, splitByRow=1)
+    table.setStyle(PDF_TABLE_STYLE)
+    table.setStyle(LARGE_TABLE_BODY_STYLE)
+    return table
+
+def build_pdf_cover(cover, custom_styles=None, profile=None):
+    """Flowables for the PDF cover page, ending with a page break"""
+    custom_styles = custom_styles or get_pdf_styles()
+    flowables = []
+
+    # Add logo to cover page
+    try:
+        im = Image(watermark_source(COVER_LOGO_SIZE, profile),
+                   width=COVER_LOGO_SIZE[0], height=COVER_LOGO_SIZE[1])
+        im.hAlign = 'CENTER'
+        flowables.append(Spacer(1, 20))
+        flowables.append(im)
+        flowables.append(Spacer(1, 20))
+    except Exception as e:
+        print(f"Error adding logo: {str(e)}")
+
+    # Add document title
+    flowables.append(Paragraph("Business Requirements Document", custom_styles['CoverTitle']))
+    flowables.append(Spacer(1, 40))
+
+    # Add client name
+    flowables.append(Paragraph(cover['client_name'], custom_styles['CoverSubTitle']))
+    flowables.append(Spacer(1, 40))
+
+    # Add document info
+    version = validate_version_number(cover['version_number'])
+    formatted_date = cover['document_date'].strftime("%B %d, %Y")
+    prepared_by = cover['prepared_by']
+
+    flowables.append(Paragraph(f"Version: {version}", custom_styles['CoverInfo']))
+    flowables.append(Paragraph(f"Date: {formatted_date}", custom_styles['CoverInfo']))
+    flowables.append(Paragraph(f"Prepared By: {prepared_by}", custom_styles['CoverInfo']))
+    flowables.append(Spacer(1, 40))
+
+    # Add company info
+    flowables.append(Paragraph("EMB-AI", custom_styles['CompanyName']))
+    
+    company_info = [
+        "Plot No. 17, Phase-4, Maruti Udyog, Sector 18, Gurugram, HR",
+        "Phone: +91-8882102246",
+        "Email: contact@exmyb.com",
+        "Website: www.emb.global"
+    ]
+    
+    for info in company_info:
+        flowables.append(Paragraph(info, custom_styles['ContactInfo']))
+
+    # Add page break after cover
+    flowables.append(PageBreak())
+    return flowables
+
+# Block-level tags the exporters render, and containers whose children are
+# walked as if they were top-level blocks
+BLOCK_TAGS = ('h1', 'h2', 'h3', 'h4', 'p', 'pre', 'table', 'ul', 'ol')
+CONTAINER_TAGS = ('blockquote', 'div')
+
+def walk_blocks(root):
+    """Yield block elements in document order, visiting each exactly once
+
+    Only top-level children are walked (descending into plain containers),
+    so a p inside an li or a list inside a list is never emitted on its own.
+    Lists are yielded whole; use iter_list_items to flatten them.
+    """
+    for child in root.children:
+        name = getattr(child, 'name', None)
+        if name in BLOCK_TAGS:
+            yield child
+        elif name in CONTAINER_TAGS:
+            yield from walk_blocks(child)
+
+def list_item_text(li):
+    """Text of a list item, leaving out any nested lists"""
+    parts = []
+    for child in li.children:
+        name = getattr(child, 'name', None)
+        if name in ('ul', 'ol'):
+            continue
+        parts.append(child.get_text() if name else str(child))
+    return ' '.join(''.join(parts).split())
+
+def iter_list_items(list_element, depth=0):
+    """Yield (ordered, marker, depth, text) for a list and its nested lists
+
+    Items are numbered with a running counter instead of counting previous
+    siblings, so a list of n items costs O(n).
+    """
+    ordered = list_element.name == 'ol'
+    try:
+        number = int(list_element.get('start', 1))
+    except ValueError:
+        number = 1
+    for li in list_element.find_all('li', recursive=False):
+        marker = f"{number}." if ordered else '•'
+        yield ordered, marker, depth, list_item_text(li)
+        number += 1
+        for nested in li.find_all(['ul', 'ol'], recursive=False):
+            yield from iter_list_items(nested, depth + 1)
+
+def table_rows(table_element):
+    """Cell texts of an HTML table, one list per non-empty row"""
+    rows = []
+    for row in table_element.find_all('tr'):
+        row_data = [cell.get_text(separator='\n', strip=True) for cell in row.find_all(['td', 'th'])]
+        if row_data:
+            rows.append(row_data)
+    return rows
+
+@lru_cache(maxsize=8)
+def _pdf_list_style(depth):
+    # Nested list levels indent under their parent item
+    return ParagraphStyle(
+        name=f'CustomListText{depth}',
+        parent=PDF_STYLES['CustomBodyText'],
+        leftIndent=depth * 18
+    )
+
+def markdown_to_flowables(markdown_content, custom_styles=None):
+    """Convert BRD markdown into body flowables for the PDF exporter"""
+    custom_styles = custom_styles or get_pdf_styles()
+
+    # First, explicitly process markdown headers
+    def process_markdown_headers(content):
+        # Replace markdown headers with HTML headers
+        content = re.sub(r'^# (.*?)$', r'<h1>\1</h1>', content, flags=re.MULTILINE)
+        content = re.sub(r'^## (.*?)$', r'<h2>\1</h2>', content, flags=re.MULTILINE)
+        content = re.sub(r'^### (.*?)$', r'<h3>\1</h3>', content, flags=re.MULTILINE)
+        content = re.sub(r'^#### (.*?)$', r'<h4>\1</h4>', content, flags=re.MULTILINE)
+        return content
+
+    # Process headers before converting to HTML
+    processed_content = process_markdown_headers(markdown_content)
+    content_html = markdown2.markdown(processed_content, extras=["tables", "fenced-code-blocks"])
+
+    flowables = []
+
+    # Process main content
+    soup = BeautifulSoup(content_html, 'html.parser')
+    
+    for element in walk_blocks(soup):
+        try:
+            if element.name == 'h1':
+                flowables.append(Spacer(1, 20))
+                flowables.append(Paragraph(element.text.strip(), custom_styles['CustomHeading1']))
+            elif element.name == 'h2':
+                flowables.append(Spacer(1, 16))
+                flowables.append(Paragraph(element.text.strip(), custom_styles['CustomHeading2']))
+            elif element.name == 'h3':
+                flowables.append(Spacer(1, 14))
+                flowables.append(Paragraph(element.text.strip(), custom_styles['CustomHeading3']))
+            elif element.name == 'h4':
+                flowables.append(Spacer(1, 12))
+                flowables.append(Paragraph(element.text.strip(), custom_styles['CustomHeading4']))
+            elif element.name == 'p':
+                text = element.text.strip()
+                # Check if this paragraph looks like a heading (numbered or bulleted)
+                if re.match(r'^\d+\.\s+', text) or re.match(r'^[•\-\*]\s+', text):
+                    flowables.append(Spacer(1, 10))
+                    flowables.append(Paragraph(text, custom_styles['CustomHeading4']))
+                else:
+                    flowables.append(Paragraph(text, custom_styles['CustomBodyText']))
+            elif element.name == 'pre':
+                flowables.append(Preformatted(element.text.rstrip('\n'), custom_styles['CustomCode']))
+            elif element.name == 'table':
+                rows = table_rows(element)
+                if rows:
+                    flowables.append(build_pdf_table(rows, custom_styles))
+            elif element.name in ['ul', 'ol']:
+                for _, marker, depth, text in iter_list_items(element):
+                    flowables.append(Paragraph(f"{marker} {text}", _pdf_list_style(depth)))
+
+            flowables.append(Spacer(1, 6))
+
+        except Exception as e:
+            print(f"Error processing element: {element}. Error: {str(e)}")
+            flowables.append(Paragraph(str(element), custom_styles['CustomBodyText']))
+
+    return flowables
+
+def draw_page_furniture(canvas, doc):
+    """Add watermark, page number, and border to each page
+
+    The watermark goes into a Form XObject defined on the first body page,
+    so the PNG is decoded and embedded once per document and every later
+    page only references the form.
+    """
+    canvas.saveState()
+    
+    if canvas.getPageNumber() == 1:
+        # Draw green border on first page
+        canvas.setStrokeColor(BORDER_COLOR)
+        canvas.setLineWidth(2)
+        margin = 30
+        canvas.rect(
+            margin,
+            margin,
+            doc.pagesize[0] - 2*margin,
+            doc.pagesize[1] - 2*margin,
+            stroke=1,
+            fill=0
+        )
+    elif canvas.getPageNumber() > 1:
+        # Add page number and watermark for other pages
+        canvas.setFont('Poppins', 9)
+        page_num = canvas.getPageNumber() - 1
+        text = f"Page {page_num}"
+        canvas.drawRightString(doc.width + doc.rightMargin, doc.bottomMargin, text)
+        
+        if not canvas.hasForm(PAGE_FURNITURE_FORM):
+            canvas.beginForm(PAGE_FURNITURE_FORM)
+            canvas.drawImage(get_watermark_reader(getattr(doc, 'brd_profile', None)), 
+                           doc.width + doc.rightMargin - 2*cm, 
+                           doc.height + doc.topMargin - 1*cm, 
+                           width=HEADER_WATERMARK_SIZE[0], height=HEADER_WATERMARK_SIZE[1], 
+                           mask='auto', 
+                           preserveAspectRatio=True)
+            canvas.endForm()
+        canvas.doForm(PAGE_FURNITURE_FORM)
+    
+    canvas.restoreState()
+
+# rl_config is process global, so builds that change it take turns
+_rl_config_lock = threading.Lock()
+
+def render_pdf(flowables, profile=None):
+    """Lay out cover and body flowables into a PDF with page furniture"""
+    settings = get_pdf_profile(profile)
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=PAGE_SIZE, 
+                          topMargin=TOP_MARGIN, bottomMargin=BOTTOM_MARGIN, 
+                          leftMargin=LEFT_MARGIN, rightMargin=RIGHT_MARGIN,
+                          pageCompression=1)
+    doc.brd_profile = profile
+
+    # Build the PDF
+    with _rl_config_lock:
+        use_a85 = rl_config.useA85
+        rl_config.useA85 = 1 if settings['ascii85'] else 0
+        try:
+            doc.build(list(flowables), onFirstPage=draw_page_furniture, onLaterPages=draw_page_furniture)
+        finally:
+            rl_config.useA85 = use_a85
+    buffer.seek(0)
+    return buffer
+
+def convert_markdown_to_pdf(markdown_content, cover, profile=None):
+    custom_styles = get_pdf_styles()
+    flowables = build_pdf_cover(cover, custom_styles, profile)
+    flowables.extend(markdown_to_flowables(markdown_content, custom_styles))
+    return render_pdf(flowables, profile)
+
+def new_docx_document():
+    """Blank BRD document with custom styles, margins and the cover border"""
+    doc = Document()
+    
+    # Set up styles
+    styles = doc.styles
+
+    # Modify the Normal style
+    style_normal = styles['Normal']
+    style_normal.font.name = 'Poppins'
+    style_normal.font.size = Pt(10)
+    style_normal.paragraph_format.space_after = Pt(8)
+
+    # Create custom styles
+    def create_style(name, font_name, font_size, bold=False, italic=False, color=RGBColor(0, 0, 0), alignment=None):
+        style = styles.add_style(name, WD_STYLE_TYPE.PARAGRAPH)
+        font = style.font
+        font.name = font_name
+        font.size = Pt(font_size)
+        font.bold = bold
+        font.italic = italic
+        font.color.rgb = color
+        if alignment:
+            style.paragraph_format.alignment = alignment
+        return style
+
+    # Define document styles
+    create_style('CoverTitle', 'Poppins', 28, bold=True, 
+                 alignment=WD_ALIGN_PARAGRAPH.CENTER)
+    create_style('CoverSubTitle', 'Poppins', 24, bold=True, 
+                 alignment=WD_ALIGN_PARAGRAPH.CENTER)
+    create_style('CoverInfo', 'Poppins', 12, 
+                 alignment=WD_ALIGN_PARAGRAPH.CENTER)
+    create_style('CompanyName', 'Poppins', 14, bold=True,
+                 color=RGBColor(17, 166, 74), 
+                 alignment=WD_ALIGN_PARAGRAPH.CENTER)
+    create_style('ContactInfo', 'Poppins', 10, 
+                 alignment=WD_ALIGN_PARAGRAPH.CENTER)
+    create_style('CustomHeading1', 'Poppins', 16, bold=True)
+    create_style('CustomHeading2', 'Poppins', 14, bold=True)
+    create_style('CustomHeading3', 'Poppins', 12, bold=True)
+
+    # Set up page margins
+    sections = doc.sections
+    for section in sections:
+        section.top_margin = Cm(2.5)
+        section.bottom_margin = Cm(1.5)
+        section.left_margin = Cm(2)
+        section.right_margin = Cm(2)
+
+    # Add border to first section only
+    section = doc.sections[0]
+    sect_pr = section._sectPr
+    
+    # Create border element
+    border = OxmlElement('w:pgBorders')
+    border.set(qn('w:offsetFrom'), 'page')
+    for edge in ['top', 'left', 'bottom', 'right']:
+        edge_element = OxmlElement(f'w:{edge}')
+        edge_element.set(qn('w:val'), 'single')
+        edge_element.set(qn('w:sz'), '24')  # 3 points
+        edge_element.set(qn('w:space'), '0')
+        edge_element.set(qn('w:color'), '11A64A')  # EMB green
+        border.append(edge_element)
+    
+    sect_pr.append(border)
+    return doc
+
+def add_docx_logo(doc):
+    # Add logo to center of cover page
+    title_paragraph = doc.add_paragraph()
+    title_paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    run = title_paragraph.add_run()
+    run.add_picture(BytesIO(registry.data(WATERMARK_PATH)), width=Cm(8))
+
+@lru_cache(maxsize=64)
+def _docx_cover_paragraphs(client_name, prepared_by, document_date, version_number):
+    """(style name, text) pairs for the cover, parsed once per set of cover details"""
+    # Process first page content
+    first_page = create_first_page_content(client_name, prepared_by, document_date, version_number)
+    
+    # Convert first page markdown to HTML
+    first_page_html = markdown2.markdown(first_page)
+    
+    # Process first page content
+    paragraphs = []
+    soup_first_page = BeautifulSoup(first_page_html, 'html.parser')
+    for element in soup_first_page.find_all(['h1', 'h2', 'p', 'hr']):
+        if element.name == 'h1':
+            paragraphs.append(('CustomHeading1', element.text.strip()))
+        elif element.name == 'h2':
+            paragraphs.append(('CustomHeading2', element.text.strip()))
+        elif element.name == 'p':
+            if element.text.strip().startswith('**') and element.text.strip().endswith('**'):
+                # Handle bold text (like company name)
+                paragraphs.append(('CompanyName', element.text.strip().replace('**', '')))
+            else:
+                paragraphs.append(('ContactInfo', element.text.strip()))
+        elif element.name == 'hr':
+            paragraphs.append(('Normal', '─' * 50))
+    return tuple(paragraphs)
+
+def add_styled_paragraph(doc, text, style_name, style_ids):
+    """doc.add_paragraph(text, style=...) without python-docx's style lookup
+
+    Assigning a style through python-docx scans every style in the document
+    for each paragraph. style_ids maps style names to ids and is filled in
+    on first use of each name, so a document pays for one lookup per style.
+    """
+    style_id = style_ids.get(style_name)
+    if style_id is None:
+        style_id = style_ids[style_name] = doc.styles[style_name].style_id
+    paragraph = doc.add_paragraph(text)
+    paragraph._p.style = style_id
+    return paragraph
+
+def fill_docx_cover(doc, cover, style_ids=None):
+    """Add the client-specific cover text and the page break after the cover"""
+    style_ids = {} if style_ids is None else style_ids
+    for style_name, text in _docx_cover_paragraphs(
+        cover['client_name'],
+        cover['prepared_by'],
+        cover['document_date'],
+        cover['version_number']
+    ):
+        add_styled_paragraph(doc, text, style_name, style_ids)
+
+    # Add page break after first page
+    doc.add_page_break()
+
+def add_header_with_watermark(section):
+    header = section.header
+    paragraph = header.paragraphs[0]
+    paragraph.alignment = WD_ALIGN_PARAGRAPH.RIGHT
+    run = paragraph.add_run()
+    run.add_picture(BytesIO(registry.data(WATERMARK_PATH)), width=Cm(2))
+    return header
+
+def add_footer_with_page_number(section):
+    footer = section.footer
+    paragraph = footer.paragraphs[0]
+    paragraph.alignment = WD_ALIGN_PARAGRAPH.RIGHT
+    run = paragraph.add_run()
+    
+    fldChar1 = OxmlElement('w:fldChar')
+    fldChar1.set(qn('w:fldCharType'), 'begin')
+    instrText = OxmlElement('w:instrText')
+    instrText.set(qn('xml:space'), 'preserve')
+    instrText.text = 'PAGE'
+    fldChar2 = OxmlElement('w:fldChar')
+    fldChar2.set(qn('w:fldCharType'), 'end')
+
+    run._element.append(fldChar1)
+    run._element.append(instrText)
+    run._element.append(fldChar2)
+    return footer
+
+def add_docx_cover(doc, cover):
+    """Add the cover page, headers and footers to a document from new_docx_document"""
+    add_docx_logo(doc)
+    fill_docx_cover(doc, cover)
+
+    # Add headers and footers to all sections except first
+    for i, section in enumerate(doc.sections):
+        if i > 0:  # Skip first section (cover page)
+            add_header_with_watermark(section)
+            add_footer_with_page_number(section)
+
+def build_docx_template():
+    """Base BRD document as .docx bytes
+
+    Holds everything that does not depend on the BRD itself: styles,
+    margins, the page border, the cover logo, the header watermark and the
+    footer page number. The cover gets its own first-page header and footer,
+    so the watermark and page number start on the first body page.
+    """
+    doc = new_docx_document()
+    add_docx_logo(doc)
+    section = doc.sections[0]
+    section.different_first_page_header_footer = True
+    add_header_with_watermark(section)
+    add_footer_with_page_number(section)
+    return save_docx(doc).getvalue()
+
+def _read_docx_template(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    if not path.lower().endswith('.dotx'):
+        return data
+
+    # python-docx only opens documents, so relabel a Word template's main
+    # part as a document in memory
+    source = zipfile.ZipFile(BytesIO(data))
+    output = BytesIO()
+    with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as target:
+        for item in source.infolist():
+            content = source.read(item.filename)
+            if item.filename == '[Content_Types].xml':
+                content = content.replace(
+                    b'wordprocessingml.template.main+xml',
+                    b'wordprocessingml.document.main+xml'
+                )
+            target.writestr(item, content)
+    return output.getvalue()
+
+_docx_template = None
+_docx_template_document = None
+
+def get_docx_template():
+    """Base document bytes, loaded or built once per process
+
+    A prepared .docx/.dotx at BRD_DOCX_TEMPLATE (default DOCX_TEMPLATE_PATH)
+    is used when present; it must define the same custom styles and have an
+    empty body apart from the cover logo. Otherwise the template is built
+    with build_docx_template.
+    """
+    global _docx_template
+    if _docx_template is None:
+        path = os.environ.get('BRD_DOCX_TEMPLATE', DOCX_TEMPLATE_PATH)
+        if os.path.exists(path):
+            _docx_template = _read_docx_template(path)
+        else:
+            _docx_template = build_docx_template()
+    return _docx_template
+
+def new_docx_from_template():
+    """Fresh in-memory copy of the base document
+
+    The template is parsed once per process; each export deep-copies the
+    parsed document, which is about half the cost of re-reading the package.
+    """
+    global _docx_template_document
+    if _docx_template_document is None:
+        _docx_template_document = Document(BytesIO(get_docx_template()))
+    return copy.deepcopy(_docx_template_document)
+
+def write_docx_template(path=DOCX_TEMPLATE_PATH):
+    """Save the built-in base document so it can be adjusted in Word"""
+    with open(path, 'wb') as f:
+        f.write(build_docx_template())
+    return path
+
+# Prebuilt OOXML fragments for bulk_docx_table. Each cell is stamped out
+# from these templates, so a whole table is one string and one parse
+# instead of a python-docx grid walk and a parse_xml per header cell.
+_DOCX_TABLE_OPEN = (
+    '<w:tbl %s><w:tblPr><w:tblStyle w:val="TableGrid"/><w:tblW w:type="auto" w:w="0"/>'
+    '<w:tblLook w:firstColumn="1" w:firstRow="1" w:lastColumn="0" w:lastRow="0" '
+    'w:noHBand="0" w:noVBand="1" w:val="04A0"/></w:tblPr>' % nsdecls('w')
+)
+_DOCX_HEADER_CELL = (
+    '<w:tc><w:tcPr><w:tcW w:type="dxa" w:w="{width}"/>'
+    '<w:shd w:val="clear" w:color="auto" w:fill="11A64A"/></w:tcPr>'
+    '<w:p><w:pPr><w:jc w:val="center"/></w:pPr><w:r><w:rPr>'
+    '<w:rFonts w:ascii="Poppins" w:hAnsi="Poppins"/><w:b/><w:color w:val="FFFFFF"/>'
+    '<w:sz w:val="20"/></w:rPr>{text}</w:r></w:p></w:tc>'
+)
+_DOCX_BODY_CELL = (
+    '<w:tc><w:tcPr><w:tcW w:type="dxa" w:w="{width}"/></w:tcPr>'
+    '<w:p><w:r><w:rPr><w:rFonts w:ascii="Poppins" w:hAnsi="Poppins"/>'
+    '<w:sz w:val="18"/></w:rPr>{text}</w:r></w:p></w:tc>'
+)
+# Characters XML 1.0 does not allow, occasionally present in model output
+_XML_INVALID_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+def _docx_run_text(text):
+    """w:t elements for a cell's text, with line breaks between lines"""
+    text = xml_escape(_XML_INVALID_CHARS.sub('', text))
+    return ('<w:t xml:space="preserve">'
+            + '</w:t><w:br/><w:t xml:space="preserve">'.join(text.split('\n'))
+            + '</w:t>')
+
+def bulk_docx_table(doc, rows):
+    """Append a styled table built from rows of cell texts in one pass
+
+    The first row is the header. The table XML is generated directly from
+    the row data with the same look add_table/cell() produced: Table Grid,
+    green centred bold header, 9pt Poppins body cells.
+    """
+    num_cols = max(len(row) for row in rows)
+    col_width = int(doc._block_width.twips / num_cols)
+    header_open, header_close = _DOCX_HEADER_CELL.replace('{width}', str(col_width)).split('{text}')
+    body_open, body_close = _DOCX_BODY_CELL.replace('{width}', str(col_width)).split('{text}')
+
+    parts = [_DOCX_TABLE_OPEN, '<w:tblGrid>', f'<w:gridCol w:w="{col_width}"/>' * num_cols, '</w:tblGrid>']
+    for i, row in enumerate(rows):
+        cell_open, cell_close = (header_open, header_close) if i == 0 else (body_open, body_close)
+        parts.append('<w:tr>')
+        for text in row:
+            parts.append(cell_open)
+            parts.append(_docx_run_text(text))
+            parts.append(cell_close)
+        # Pad ragged rows so every row has the full grid
+        parts.append((cell_open + cell_close) * (num_cols - len(row)))
+        parts.append('</w:tr>')
+    parts.append('</w:tbl>')
+
+    table = parse_xml(''.join(parts))
+    doc.element.body.sectPr.addprevious(table)
+    return table
+
+def append_markdown_to_docx(doc, markdown_content):
+    """Convert BRD markdown and append it to the document body"""
+    style_ids = {}
+
+    # Convert main content
+    html_content = markdown2.markdown(markdown_content, extras=["tables", "fenced-code-blocks"])
+    soup = BeautifulSoup(html_content, 'html.parser')
+
+    # Process main content
+    for element in walk_blocks(soup):
+        try:
+            if element.name == 'h1':
+                add_styled_paragraph(doc, element.text, 'CustomHeading1', style_ids)
+            elif element.name == 'h2':
+                add_styled_paragraph(doc, element.text, 'CustomHeading2', style_ids)
+            elif element.name in ('h3', 'h4'):
+                add_styled_paragraph(doc, element.text, 'CustomHeading3', style_ids)
+            elif element.name == 'p':
+                add_styled_paragraph(doc, element.text, 'Normal', style_ids)
+            elif element.name == 'pre':
+                # One preformatted paragraph with line breaks, not one per line
+                p = add_styled_paragraph(doc, '', 'Normal', style_ids)
+                p.paragraph_format.left_indent = Inches(0.5)
+                run = p.add_run()
+                run.font.name = 'Courier New'
+                for i, line in enumerate(element.text.rstrip('\n').split('\n')):
+                    if i:
+                        run.add_break()
+                    run.add_text(line)
+            elif element.name == 'table':
+                rows = table_rows(element)
+                if rows:
+                    bulk_docx_table(doc, rows)
+                    doc.add_paragraph()  # Add space after table
+            elif element.name in ['ul', 'ol']:
+                for ordered, _, depth, text in iter_list_items(element):
+                    list_style = 'List Number' if ordered else 'List Bullet'
+                    if depth:
+                        # The default template defines levels 2 and 3
+                        list_style = f"{list_style} {min(depth + 1, 3)}"
+                    add_styled_paragraph(doc, text, list_style, style_ids)
+
+        except Exception as e:
+            print(f"Error processing element: {element}. Error: {str(e)}")
+            add_styled_paragraph(doc, str(element), 'Normal', style_ids)
+
+def markdown_to_docx_blocks(markdown_content):
+    """Convert BRD markdown into serialized body XML blocks
+
+    The blocks are plain strings so they can be cached per part and sent to
+    worker processes, then spliced into any document with the BRD styles.
+    """
+    scratch = new_docx_from_template()
+    body = scratch.element.body
+    # Everything appended lands between the template's own body content
+    # and the closing sectPr
+    first_new = len(body) - 1
+    append_markdown_to_docx(scratch, markdown_content)
+    return [etree.tostring(child, encoding='unicode') for child in body[first_new:-1]]
+
+def append_docx_blocks(doc, blocks):
+    """Splice blocks from markdown_to_docx_blocks into the document body"""
+    sect_pr = doc.element.body.sectPr
+    for block in blocks:
+        sect_pr.addprevious(parse_xml(block))
+
+def save_docx(doc):
+    # Save to BytesIO
+    docx_buffer = BytesIO()
+    doc.save(docx_buffer)
+    docx_buffer.seek(0)
+    return docx_buffer
+
+def new_docx_with_cover(cover, use_template=True):
+    """Document with styles and cover in place, ready for body content"""
+    if use_template:
+        doc = new_docx_from_template()
+        fill_docx_cover(doc, cover)
+    else:
+        doc = new_docx_document()
+        add_docx_cover(doc, cover)
+    return doc
+
+def convert_markdown_to_docx(markdown_content, cover, use_template=True):
+    doc = new_docx_with_cover(cover, use_template)
+    append_markdown_to_docx(doc, markdown_content)
+    return save_docx(doc)
+
+def render_pdf_segments(segments, cover, profile=None):
+    """Render pre-built body segments (lists of flowables) behind a fresh cover
+
+    Layout mutates flowables, so callers must pass copies of cached segments.
+    """
+    flowables = build_pdf_cover(cover, profile=profile)
+    for segment in segments:
+        flowables.extend(segment)
+    return render_pdf(flowables, profile)
+
+def render_docx_segments(segments, cover):
+    """Render pre-built body segments (lists of XML blocks) behind a fresh cover"""
+    doc = new_docx_with_cover(cover)
+    for segment in segments:
+        append_docx_blocks(doc, segment)
+    return save_docx(doc)
+
+if __name__ == "__main__":
+    print(f"Wrote {write_docx_template()}")
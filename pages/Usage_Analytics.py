@@ -0,0 +1,95 @@
+import os
+
+import streamlit as st
+
+from analytics import get_analytics
+from asset_registry import registry
+from export_engine import shared_engine
+from warmup import shared_warm_up
+
+# Server internals for operators rather than BRD users, shown with
+# BRD_DIAGNOSTICS=1
+SHOW_DIAGNOSTICS = os.environ.get("BRD_DIAGNOSTICS", "0") == "1"
+
+st.set_page_config(page_title="EMB-AI BRD Analytics", layout="wide", initial_sidebar_state="collapsed")
+
+st.title("📊 BRD Usage Analytics")
+
+# Only the pre-aggregated tables are read here, never the raw events
+tables = get_analytics().aggregates()
+per_day = tables['brds_per_day']
+per_preparer = tables['brds_per_preparer']
+per_format = tables['downloads_per_format']
+downloads_per_day = tables['downloads_per_day']
+
+col1, col2, col3 = st.columns(3)
+col1.metric("BRDs generated", int(per_day['brds'].sum()))
+col2.metric("Downloads", int(per_format['downloads'].sum()))
+col3.metric("Preparers", len(per_preparer))
+
+if per_day.empty and per_format.empty:
+    st.info("No BRDs have been generated or downloaded yet.")
+else:
+    st.subheader("BRDs per day")
+    st.bar_chart(per_day.set_index('date')['brds'])
+
+    st.subheader("Downloads per day")
+    st.line_chart(downloads_per_day.pivot(index='date', columns='format', values='downloads').fillna(0))
+
+    left, right = st.columns(2)
+    with left:
+        st.subheader("BRDs per preparer")
+        st.dataframe(per_preparer.sort_values('brds', ascending=False), hide_index=True)
+    with right:
+        st.subheader("Downloads per format")
+        st.dataframe(per_format.sort_values('downloads', ascending=False), hide_index=True)
+
+def show_warm_up():
+    """Background warm-up of this server process, see warmup.py"""
+    st.subheader("Warm-up")
+    warm_up = shared_warm_up()
+    if warm_up is None:
+        st.info("The warm-up has not started in this server process (it is off with BRD_WARM_UP=0).")
+        return
+    status = warm_up.status()
+    if status['ready']:
+        st.success(f"Ready: warmed up in {status['seconds']:.2f} s")
+    else:
+        st.warning("Warming up; the first BRD may be slower until this finishes.")
+    st.dataframe([dict(step=name, **step) for name, step in status['steps'].items()], hide_index=True)
+
+def show_export_engine():
+    """Export workers of this server process, see export_engine.py"""
+    st.subheader("Export engine")
+    engine = shared_engine()
+    if engine is None:
+        st.info("No exports have run in this server process yet.")
+        return
+    stats = engine.stats()
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Jobs", stats['jobs'], f"{stats['failed']} failed", delta_color="off")
+    col2.metric("Queued or running", f"{stats['pending']}/{stats['max_pending']}")
+    col3.metric("Avg run (s)", f"{stats['avg_run_seconds']:.2f}" if stats['avg_run_seconds'] is not None else "-")
+    col4.metric("p95 run (s)", f"{stats['p95_run_seconds']:.2f}" if stats['p95_run_seconds'] is not None else "-")
+    cache = stats['cache']
+    st.caption(f"Cache: {cache['entries']} files, {cache['bytes'] / (1024 * 1024):.1f} MB, "
+               f"{cache['hits']} hits, {cache['misses']} misses")
+    jobs = engine.metrics()
+    if jobs:
+        st.dataframe(list(reversed(jobs)), hide_index=True)
+
+def show_assets():
+    """Fonts and images loaded by this server process, see asset_registry.py"""
+    st.subheader("Assets")
+    assets = registry.timings()
+    if assets:
+        st.dataframe(assets, column_order=['kind', 'name', 'seconds', 'bytes', 'hits'], hide_index=True)
+    else:
+        st.info("No assets have been loaded in this server process yet.")
+
+if SHOW_DIAGNOSTICS:
+    st.divider()
+    st.header("Diagnostics")
+    show_warm_up()
+    show_export_engine()
+    show_assets()
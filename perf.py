@@ -0,0 +1,87 @@
+"""Process-wide counters and timers for the work done by app reruns.
+
+embgpt.py marks the start of each top-level block of the script with
+block(), which also closes the block before it. Fragments and exports
+are wrapped with timed() or region(). Every execution adds one to the
+name's count and its wall time to the name's seconds. A block's time
+includes any fragment or export that runs inside it.
+
+benchmarks/bench_reruns.py and benchmarks/profile_app.py read these
+around simulated interactions to show which blocks every interaction
+re-executes and where the time goes. Recording is a locked dict update
+and is cheap enough to leave on.
+"""
+import functools
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+_counts = Counter()
+_seconds = Counter()
+_lock = threading.Lock()
+# Open block per script thread: (name, start)
+_local = threading.local()
+
+
+def record(name, seconds=0.0, n=1):
+    with _lock:
+        _counts[name] += n
+        _seconds[name] += seconds
+
+
+def count(name, n=1):
+    record(name, 0.0, n)
+
+
+@contextmanager
+def region(name):
+    """Count and time the enclosed code under name"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - started)
+
+
+def timed(name):
+    """Decorator form of region()"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with region(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def block(name=None):
+    """End the current top-level block of this thread and start name; None just ends it"""
+    now = time.perf_counter()
+    current = getattr(_local, 'block', None)
+    if current is not None:
+        record(current[0], now - current[1])
+    _local.block = (name, now) if name is not None else None
+
+
+def snapshot():
+    """Current {name: (count, seconds)}"""
+    with _lock:
+        return {name: (_counts[name], _seconds[name]) for name in _counts}
+
+
+def delta(before, after=None):
+    """{name: (count, seconds)} added since a snapshot"""
+    after = snapshot() if after is None else after
+    changes = {}
+    for name, (n, seconds) in after.items():
+        old_n, old_seconds = before.get(name, (0, 0.0))
+        if n != old_n:
+            changes[name] = (n - old_n, seconds - old_seconds)
+    return changes
+
+
+def reset():
+    with _lock:
+        _counts.clear()
+        _seconds.clear()
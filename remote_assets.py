@@ -0,0 +1,153 @@
+"""Lottie animations served from local files, refreshed in the background.
+
+The app used to fetch its animations from LottieFiles at module level on
+every rerun, with no timeout. Now each animation is bundled under
+assets/lottie and read from disk once per process. A daemon thread
+re-downloads the remote originals with a short timeout into the cache
+directory, at most once per refresh_interval. A good copy replaces the
+in-memory one for later reruns. get() never touches the network, and a
+failed or slow fetch just leaves the current copy in place.
+
+The LottieFiles URLs in LOTTIE_SOURCES are the source of truth. The
+files under assets/lottie are small stand-ins drawn for the app, because
+the originals could not be downloaded when they were added; running
+this module (python remote_assets.py) with network access replaces them
+with the originals. Until then, the first good refresh caches the
+originals and they win over the bundled stand-ins.
+"""
+import json
+import os
+import threading
+import time
+
+ASSET_DIR = os.path.join('assets', 'lottie')
+CACHE_DIR = os.environ.get('BRD_ASSET_CACHE', 'asset_cache')
+
+# Name -> remote original, also the refresh source; the bundled copy is
+# <ASSET_DIR>/<name>.json
+LOTTIE_SOURCES = {
+    'writing': 'https://assets5.lottiefiles.com/packages/lf20_41X1Rp.json',
+    'completed': 'https://assets4.lottiefiles.com/packages/lf20_j3yeurta.json'
+}
+
+FETCH_TIMEOUT = 3
+REFRESH_INTERVAL = 24 * 3600
+# Wait before retrying after a failed fetch
+RETRY_INTERVAL = 600
+
+
+def read_json(path):
+    """Parsed JSON file, or None if it is missing or unreadable"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def is_lottie(data):
+    """Loose check that a document is a Lottie animation"""
+    return isinstance(data, dict) and 'layers' in data and 'op' in data
+
+
+class RemoteAssets:
+    """Process-wide Lottie cache with a background refresh thread"""
+
+    def __init__(self, sources=LOTTIE_SOURCES, asset_dir=ASSET_DIR, cache_dir=CACHE_DIR,
+                 timeout=FETCH_TIMEOUT, refresh_interval=REFRESH_INTERVAL, refresh=True):
+        self.sources = dict(sources)
+        self.asset_dir = asset_dir
+        self.cache_dir = cache_dir
+        self.timeout = timeout
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._data = {}
+        self._stats = {'fetched': 0, 'failed': 0}
+        for name in self.sources:
+            # A refreshed copy wins over the bundled one
+            data = read_json(self._cache_path(name))
+            if not is_lottie(data):
+                data = read_json(os.path.join(self.asset_dir, f"{name}.json"))
+            self._data[name] = data if is_lottie(data) else None
+        self._stop = threading.Event()
+        self._thread = None
+        if refresh:
+            self._thread = threading.Thread(target=self._run, name='asset-refresh', daemon=True)
+            self._thread.start()
+
+    def _cache_path(self, name):
+        return os.path.join(self.cache_dir, f"{name}.json")
+
+    def get(self, name):
+        """Animation data for name, or None; never blocks on the network"""
+        with self._lock:
+            return self._data.get(name)
+
+    def is_stale(self, name):
+        try:
+            age = time.time() - os.path.getmtime(self._cache_path(name))
+        except OSError:
+            return True
+        return age >= self.refresh_interval
+
+    def fetch(self, name):
+        """Download one animation into the cache; returns True on success"""
+        # Only the refresh thread needs requests, so startup does not load it
+        import requests
+
+        try:
+            r = requests.get(self.sources[name], timeout=self.timeout)
+            r.raise_for_status()
+            data = r.json()
+            if not is_lottie(data):
+                raise ValueError("not a Lottie animation")
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._cache_path(name)
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, separators=(',', ':'))
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"Error refreshing asset {name}: {str(e)}")
+            with self._lock:
+                self._stats['failed'] += 1
+            return False
+        with self._lock:
+            self._data[name] = data
+            self._stats['fetched'] += 1
+        return True
+
+    def refresh(self, force=False):
+        """Fetch every animation whose cached copy is missing or stale;
+        returns False if any fetch failed"""
+        ok = True
+        for name in self.sources:
+            if self._stop.is_set():
+                break
+            if force or self.is_stale(name):
+                ok = self.fetch(name) and ok
+        return ok
+
+    def _run(self):
+        while True:
+            wait = self.refresh_interval if self.refresh() else min(RETRY_INTERVAL, self.refresh_interval)
+            if self._stop.wait(wait):
+                break
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, loaded=sorted(n for n, d in self._data.items() if d))
+
+    def close(self):
+        self._stop.set()
+
+
+def vendor_originals(asset_dir=ASSET_DIR):
+    """Download the originals over the bundled copies; returns the names that failed"""
+    assets = RemoteAssets(cache_dir=asset_dir, refresh=False)
+    return [name for name in assets.sources if not assets.fetch(name)]
+
+
+if __name__ == "__main__":
+    failed = vendor_originals()
+    print(f"Failed: {', '.join(failed)}" if failed else f"Wrote the originals to {ASSET_DIR}")
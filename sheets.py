@@ -0,0 +1,106 @@
+"""Shared Google Sheets connection.
+
+Building service-account credentials, authorizing gspread and opening the
+spreadsheet by name (a Drive search) used to happen on every read and
+write. SheetsClient does that once per process and keeps the spreadsheet
+and worksheet handles. The underlying AuthorizedSession refreshes expired
+access tokens on its own; if the session is rejected anyway (revoked key,
+clock skew), the connection is rebuilt and the call retried once.
+"""
+import threading
+
+import gspread
+from google.auth.exceptions import RefreshError
+from google.oauth2.service_account import Credentials
+
+SCOPES = [
+    'https://www.googleapis.com/auth/spreadsheets',
+    'https://www.googleapis.com/auth/drive'
+]
+SPREADSHEET_NAME = 'EMBGPT'
+
+# API status codes that mean the session itself is no longer valid
+AUTH_ERROR_CODES = (401,)
+
+
+def is_auth_error(error):
+    """Whether an exception means the connection needs rebuilding"""
+    if isinstance(error, RefreshError):
+        return True
+    return isinstance(error, gspread.exceptions.APIError) and error.code in AUTH_ERROR_CODES
+
+
+class SheetsClient:
+    """One authorized gspread client and its worksheet handles
+
+    worksheet_headers maps worksheet titles to header rows; those worksheets
+    are created with the headers the first time they are missing.
+    """
+
+    def __init__(self, credentials_info, spreadsheet_name=SPREADSHEET_NAME, worksheet_headers=None):
+        self.credentials_info = dict(credentials_info)
+        self.spreadsheet_name = spreadsheet_name
+        self.worksheet_headers = dict(worksheet_headers or {})
+        self._lock = threading.RLock()
+        self._client = None
+        self._spreadsheet = None
+        self._spreadsheet_id = None
+        self._worksheets = {}
+        self.connects = 0
+
+    def _connect(self):
+        creds = Credentials.from_service_account_info(self.credentials_info, scopes=SCOPES)
+        self._client = gspread.authorize(creds)
+        self.connects += 1
+
+    def client(self):
+        """Authorized gspread client, created on first use"""
+        with self._lock:
+            if self._client is None:
+                self._connect()
+            return self._client
+
+    def spreadsheet(self):
+        """The spreadsheet, looked up by name once and then reopened by key"""
+        with self._lock:
+            if self._spreadsheet is None:
+                if self._spreadsheet_id is None:
+                    self._spreadsheet = self.client().open(self.spreadsheet_name)
+                    self._spreadsheet_id = self._spreadsheet.id
+                else:
+                    self._spreadsheet = self.client().open_by_key(self._spreadsheet_id)
+            return self._spreadsheet
+
+    def worksheet(self, title):
+        """Cached worksheet handle, creating registered worksheets if missing"""
+        with self._lock:
+            if title not in self._worksheets:
+                try:
+                    worksheet = self.spreadsheet().worksheet(title)
+                except gspread.WorksheetNotFound:
+                    headers = self.worksheet_headers.get(title)
+                    if headers is None:
+                        raise
+                    worksheet = self.spreadsheet().add_worksheet(title=title, rows=1000,
+                                                                 cols=len(headers))
+                    worksheet.append_row(headers)
+                self._worksheets[title] = worksheet
+            return self._worksheets[title]
+
+    def reset(self):
+        """Drop the client and handles so the next call reconnects"""
+        with self._lock:
+            self._client = None
+            self._spreadsheet = None
+            self._worksheets = {}
+
+    def call(self, title, method, *args, **kwargs):
+        """Call a gspread Worksheet method, reconnecting once on auth errors"""
+        try:
+            return getattr(self.worksheet(title), method)(*args, **kwargs)
+        except Exception as e:
+            if not is_auth_error(e):
+                raise
+            print(f"Google Sheets session rejected, reconnecting: {str(e)}")
+            self.reset()
+            return getattr(self.worksheet(title), method)(*args, **kwargs)
@@ -0,0 +1,556 @@
+"""Storage backends for BRD records.
+
+The app saves two kinds of records, the form submitted for a BRD and the
+generated content, and it counts downloads per BRD and file type. BrdStore
+is the interface for this. Three implementations are provided:
+
+    MemoryStore     dicts, for tests and offline load testing
+    SqliteStore     local SQLite file, the hot path in production
+    ReplicatedStore a primary store mirrored to Google Sheets in the
+                    background through SheetsReplica
+
+Records are plain dicts, built with form_record() and content_record().
+"""
+import threading
+from collections import Counter
+from datetime import datetime
+
+from brd_replica import connect
+from content_codec import encode_parts, decode_part
+
+FILE_TYPES = ('MD', 'PDF', 'DOCX')
+
+FORM_FIELDS = ('timestamp', 'client_name', 'project_description', 'user_types', 'deliverables',
+               'prepared_by', 'document_date', 'version_number')
+CONTENT_FIELDS = ('timestamp', 'client_name', 'version', 'generated_by',
+                  'part1', 'part2', 'part3', 'part4')
+PART_KEYS = ('part1', 'part2', 'part3', 'part4')
+# id identifies one save; a client/version saved twice is listed twice
+LISTING_FIELDS = ('id', 'timestamp', 'client_name', 'version', 'generated_by')
+# Fields that identify the same save in two stores
+BACKFILL_KEY = ('timestamp', 'client_name', 'version', 'generated_by')
+
+
+def now_timestamp():
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+def form_record(form_data):
+    """Form record from the app's form fields"""
+    document_date = form_data['document_date']
+    return {
+        'timestamp': now_timestamp(),
+        'client_name': form_data['client_name'],
+        'project_description': form_data['project_description'],
+        'user_types': form_data['user_types'],
+        'deliverables': form_data['deliverables'],
+        'prepared_by': form_data['prepared_by'],
+        'document_date': (document_date.strftime('%Y-%m-%d')
+                          if hasattr(document_date, 'strftime') else document_date),
+        'version_number': form_data['version_number']
+    }
+
+
+def content_record(client_name, version, generated_by, content_parts):
+    """Content record for the four generated BRD parts"""
+    return {
+        'timestamp': now_timestamp(),
+        'client_name': client_name,
+        'version': version,
+        'generated_by': generated_by,
+        'part1': content_parts.get('part1', ''),
+        'part2': content_parts.get('part2', ''),
+        'part3': content_parts.get('part3', ''),
+        'part4': content_parts.get('part4', '')
+    }
+
+
+class BrdStore:
+    """Interface shared by the storage backends
+
+    When a client/version pair was saved more than once, lookups and
+    download counts use the first record, as the Sheets scans always did.
+    """
+
+    def save_form(self, record):
+        raise NotImplementedError
+
+    def save_content(self, record):
+        raise NotImplementedError
+
+    def get_content(self, client_name, version):
+        """Content record for a client/version, or None"""
+        raise NotImplementedError
+
+    def get_content_by_id(self, content_id):
+        """Content record of one save, by the id in its listing, or None"""
+        raise NotImplementedError
+
+    def get_form(self, client_name, version, before=None):
+        """Form record for a client/version, or None
+
+        With a before timestamp, the last form saved at or before it (the
+        form a content save was generated from), else the first form.
+        """
+        raise NotImplementedError
+
+    def increment_download(self, client_name, version, file_type):
+        raise NotImplementedError
+
+    def download_counts(self, client_name, version):
+        """{'MD': n, 'PDF': n, 'DOCX': n}, or None for an unknown BRD"""
+        raise NotImplementedError
+
+    def has_content(self, record):
+        """True if a save with the record's BACKFILL_KEY fields is stored"""
+        raise NotImplementedError
+
+    def list_content(self, offset=0, limit=20, client_name=None):
+        """Metadata (no parts) of stored BRDs, newest timestamp first"""
+        raise NotImplementedError
+
+    def count_content(self, client_name=None):
+        raise NotImplementedError
+
+    def list_clients(self):
+        """Sorted client names with stored content"""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class MemoryStore(BrdStore):
+    """Process-local store backed by dicts"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._forms = {}
+        self._content = {}
+        # Every save, in order; a record's id is its position plus one
+        self._content_log = []
+        self._downloads = {}
+
+    def save_form(self, record):
+        key = (record['client_name'], record['version_number'])
+        with self._lock:
+            self._forms.setdefault(key, []).append(dict(record))
+            self._downloads.setdefault(key, Counter())
+
+    def save_content(self, record):
+        with self._lock:
+            record = dict(record, id=len(self._content_log) + 1)
+            self._content.setdefault((record['client_name'], record['version']), record)
+            self._content_log.append(record)
+
+    def _content_record(self, record):
+        return {field: record[field] for field in CONTENT_FIELDS}
+
+    def get_content(self, client_name, version):
+        with self._lock:
+            record = self._content.get((client_name, version))
+        return self._content_record(record) if record is not None else None
+
+    def get_content_by_id(self, content_id):
+        with self._lock:
+            if not 0 < content_id <= len(self._content_log):
+                return None
+            return self._content_record(self._content_log[content_id - 1])
+
+    def get_form(self, client_name, version, before=None):
+        with self._lock:
+            forms = self._forms.get((client_name, version))
+            if not forms:
+                return None
+            earlier = [form for form in forms if before is not None and form['timestamp'] <= before]
+            return dict(earlier[-1] if earlier else forms[0])
+
+    def increment_download(self, client_name, version, file_type):
+        with self._lock:
+            downloads = self._downloads.get((client_name, version))
+            if downloads is not None:
+                downloads[file_type.upper()] += 1
+
+    def download_counts(self, client_name, version):
+        with self._lock:
+            downloads = self._downloads.get((client_name, version))
+            if downloads is None:
+                return None
+            return {file_type: downloads[file_type] for file_type in FILE_TYPES}
+
+    def has_content(self, record):
+        key = tuple(record[field] for field in BACKFILL_KEY)
+        with self._lock:
+            return any(tuple(entry[field] for field in BACKFILL_KEY) == key
+                       for entry in self._content_log)
+
+    def _listing(self, client_name):
+        entries = [entry for entry in self._content_log
+                   if client_name is None or entry['client_name'] == client_name]
+        return sorted(entries, key=lambda entry: (entry['timestamp'], entry['id']), reverse=True)
+
+    def list_content(self, offset=0, limit=20, client_name=None):
+        with self._lock:
+            return [{field: entry[field] for field in LISTING_FIELDS}
+                    for entry in self._listing(client_name)[offset:offset + limit]]
+
+    def count_content(self, client_name=None):
+        with self._lock:
+            return len(self._listing(client_name))
+
+    def list_clients(self):
+        with self._lock:
+            return sorted({entry['client_name'] for entry in self._content_log})
+
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS brd_forms (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT,
+    client_name TEXT,
+    project_description TEXT,
+    user_types TEXT,
+    deliverables TEXT,
+    prepared_by TEXT,
+    document_date TEXT,
+    version_number TEXT,
+    downloads_md INTEGER NOT NULL DEFAULT 0,
+    downloads_pdf INTEGER NOT NULL DEFAULT 0,
+    downloads_docx INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS brd_forms_client_version
+    ON brd_forms (client_name, version_number);
+CREATE TABLE IF NOT EXISTS brd_store_content (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT,
+    client_name TEXT,
+    version TEXT,
+    generated_by TEXT,
+    part1 TEXT,
+    part2 TEXT,
+    part3 TEXT,
+    part4 TEXT
+);
+CREATE INDEX IF NOT EXISTS brd_store_content_client_version
+    ON brd_store_content (client_name, version);
+CREATE INDEX IF NOT EXISTS brd_store_content_timestamp
+    ON brd_store_content (timestamp, id);
+CREATE INDEX IF NOT EXISTS brd_store_content_client_timestamp
+    ON brd_store_content (client_name, timestamp, id);
+"""
+
+
+class SqliteStore(BrdStore):
+    """Store backed by a local SQLite database
+
+    With a blob_store.BlobStore, content rows only keep the metadata and
+    the parts go to the blob store, deduplicated and delta-encoded
+    against the client's previous version.
+    """
+
+    def __init__(self, db_path, blob_store=None):
+        self.blob_store = blob_store
+        self._lock = threading.Lock()
+        self._conn = connect(db_path)
+        # Commits on a local file are the hot path; WAL makes NORMAL safe
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SQLITE_SCHEMA)
+
+    def _insert(self, table, fields, record):
+        """Insert a row; returns its id"""
+        with self._lock, self._conn:
+            return self._conn.execute(
+                f"INSERT INTO {table} ({', '.join(fields)}) VALUES ({', '.join('?' * len(fields))})",
+                [record.get(field, '') for field in fields]
+            ).lastrowid
+
+    def save_form(self, record):
+        self._insert('brd_forms', FORM_FIELDS, record)
+
+    def save_content(self, record):
+        if self.blob_store is None:
+            self._insert('brd_store_content', CONTENT_FIELDS, record)
+            return None
+        # Every save keeps its own parts, keyed by its row id
+        metadata = {field: record[field] for field in CONTENT_FIELDS if field not in PART_KEYS}
+        content_id = self._insert('brd_store_content', CONTENT_FIELDS, metadata)
+        try:
+            return self.blob_store.put_version(record['client_name'], record['version'], record,
+                                               content_id=content_id)
+        except Exception:
+            # A row without parts would load as an empty BRD
+            with self._lock, self._conn:
+                self._conn.execute('DELETE FROM brd_store_content WHERE id = ?', (content_id,))
+            raise
+
+    def _content_row(self, where, params):
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT id, {', '.join(CONTENT_FIELDS)} FROM brd_store_content "
+                f"WHERE {where} ORDER BY id LIMIT 1",
+                params
+            ).fetchone()
+        if row is None:
+            return None
+        record = dict(row)
+        content_id = record.pop('id')
+        # Rows saved with a blob store keep their parts there
+        if self.blob_store is not None and not any(record[key] for key in PART_KEYS):
+            parts = self.blob_store.get_version(record['client_name'], record['version'],
+                                                content_id=content_id)
+            if parts is not None:
+                record.update(parts)
+        return record
+
+    def get_content(self, client_name, version):
+        return self._content_row('client_name = ? AND version = ?', (client_name, version))
+
+    def get_content_by_id(self, content_id):
+        return self._content_row('id = ?', (content_id,))
+
+    def get_form(self, client_name, version, before=None):
+        query = (f"SELECT {', '.join(FORM_FIELDS)} FROM brd_forms "
+                 "WHERE client_name = ? AND version_number = ? ")
+        with self._lock:
+            row = None
+            if before is not None:
+                row = self._conn.execute(query + "AND timestamp <= ? ORDER BY id DESC LIMIT 1",
+                                         (client_name, version, before)).fetchone()
+            if row is None:
+                row = self._conn.execute(query + "ORDER BY id LIMIT 1", (client_name, version)).fetchone()
+        return dict(row) if row is not None else None
+
+    def increment_download(self, client_name, version, file_type):
+        file_type = file_type.upper()
+        if file_type not in FILE_TYPES:
+            raise ValueError(f"Unknown file type: {file_type}")
+        column = f"downloads_{file_type.lower()}"
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"UPDATE brd_forms SET {column} = {column} + 1 WHERE id = ("
+                "SELECT id FROM brd_forms WHERE client_name = ? AND version_number = ? "
+                "ORDER BY id LIMIT 1)",
+                (client_name, version)
+            )
+
+    def download_counts(self, client_name, version):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT downloads_md, downloads_pdf, downloads_docx FROM brd_forms "
+                "WHERE client_name = ? AND version_number = ? ORDER BY id LIMIT 1",
+                (client_name, version)
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(FILE_TYPES, row))
+
+    def has_content(self, record):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM brd_store_content WHERE client_name = ? AND version = ? "
+                "AND timestamp = ? AND generated_by = ? LIMIT 1",
+                (record['client_name'], record['version'], record['timestamp'], record['generated_by'])
+            ).fetchone() is not None
+
+    def list_content(self, offset=0, limit=20, client_name=None):
+        # Newest first along the timestamp index, or the client one when
+        # filtered; backfilled records get new ids but keep their timestamp
+        where, params = ('WHERE client_name = ? ', [client_name]) if client_name is not None else ('', [])
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(LISTING_FIELDS)} FROM brd_store_content {where}"
+                "ORDER BY timestamp DESC, id DESC LIMIT ? OFFSET ?",
+                params + [limit, offset]
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def count_content(self, client_name=None):
+        where, params = ('WHERE client_name = ?', [client_name]) if client_name is not None else ('', [])
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT COUNT(*) FROM brd_store_content {where}", params
+            ).fetchone()[0]
+
+    def list_clients(self):
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT DISTINCT client_name FROM brd_store_content ORDER BY client_name'
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+        if self.blob_store is not None:
+            self.blob_store.close()
+
+
+class SheetsReplica:
+    """Mirror store writes to Google Sheets without blocking the caller
+
+    Rows go through a write_behind.WriteBehindQueue, download counts
+    through download_counters.DownloadCounters, and lookups that miss
+    locally can fall back to a brd_replica.BrdReplica of BRD_Content.
+    Parts are stored compressed and, when too big for a cell, chunked
+    into BRD_Chunks (content_codec.py).
+    """
+
+    def __init__(self, write_queue, counters, content_replica=None):
+        self.write_queue = write_queue
+        self.counters = counters
+        self.content_replica = content_replica
+        self.raw_bytes = 0
+        self.stored_bytes = 0
+
+    def save_form(self, record):
+        row = [record[field] for field in FORM_FIELDS]
+        # Download Count MD, PDF, DOCX
+        self.write_queue.append('Sheet1', row + ['0', '0', '0'])
+        self.counters.row_appended(record['client_name'], record['version_number'])
+
+    def save_content(self, record):
+        cells, chunk_rows, report = encode_parts(record)
+        # Chunks are queued first so a visible content row never points at
+        # chunks that have not been written yet
+        for row in chunk_rows:
+            self.write_queue.append('BRD_Chunks', row)
+        self.write_queue.append('BRD_Content', [cells.get(field, record[field])
+                                                for field in CONTENT_FIELDS])
+        self.raw_bytes += report['raw_bytes']
+        self.stored_bytes += report['stored_bytes']
+        return report
+
+    def storage_report(self):
+        """Stored against raw bytes for all content saved by this process
+
+        save_content() returns the same figures for a single save.
+        """
+        return {
+            'raw_bytes': self.raw_bytes,
+            'stored_bytes': self.stored_bytes,
+            'ratio': self.stored_bytes / self.raw_bytes if self.raw_bytes else 1.0
+        }
+
+    def increment_download(self, client_name, version, file_type):
+        self.counters.increment(client_name, version, file_type)
+
+    def _content_record(self, row):
+        record = {field: row[field] for field in CONTENT_FIELDS}
+        for key in PART_KEYS:
+            record[key] = decode_part(record[key], self.content_replica.chunks)
+        return record
+
+    def get_content(self, client_name, version):
+        if self.content_replica is None:
+            return None
+        row = self.content_replica.lookup(client_name, version)
+        if row is None:
+            return None
+        return self._content_record(row)
+
+    def all_content(self):
+        """Every content record in BRD_Content, oldest first, after a sync"""
+        if self.content_replica is None:
+            return
+        self.content_replica.sync()
+        self.content_replica.sync_chunks()
+        for row in self.content_replica.rows():
+            try:
+                yield self._content_record(row)
+            except ValueError as e:
+                # Chunks not written yet; the row is picked up by a later backfill
+                print(f"Skipping BRD content row {row['row_number']}: {str(e)}")
+
+
+class ReplicatedStore(BrdStore):
+    """Primary store for reads and writes, mirrored to a replica in the background
+
+    Content the primary has never seen (saved before the primary existed,
+    or by another server) is fetched from the replica and kept locally,
+    one record on a get_content() miss or all of it with backfill().
+    replica may also be a zero-argument callable; the replica is then only
+    built on first use, so listing BRDs never loads the Sheets stack.
+    """
+
+    def __init__(self, primary, replica):
+        self.primary = primary
+        self._replica = replica
+        self._replica_lock = threading.Lock()
+
+    @property
+    def replica(self):
+        if callable(self._replica):
+            with self._replica_lock:
+                if callable(self._replica):
+                    self._replica = self._replica()
+        return self._replica
+
+    def _mirror(self, action, *args):
+        try:
+            getattr(self.replica, action)(*args)
+        except Exception as e:
+            print(f"Error queuing {action} for Google Sheets: {str(e)}")
+
+    def save_form(self, record):
+        self.primary.save_form(record)
+        self._mirror('save_form', record)
+
+    def save_content(self, record):
+        self.primary.save_content(record)
+        self._mirror('save_content', record)
+
+    def get_content(self, client_name, version):
+        record = self.primary.get_content(client_name, version)
+        if record is None:
+            record = self.replica.get_content(client_name, version)
+            if record is not None:
+                self.primary.save_content(record)
+        return record
+
+    def get_content_by_id(self, content_id):
+        # Ids come from listings, which are the primary's
+        return self.primary.get_content_by_id(content_id)
+
+    def get_form(self, client_name, version, before=None):
+        return self.primary.get_form(client_name, version, before)
+
+    def increment_download(self, client_name, version, file_type):
+        self.primary.increment_download(client_name, version, file_type)
+        self._mirror('increment_download', client_name, version, file_type)
+
+    def download_counts(self, client_name, version):
+        return self.primary.download_counts(client_name, version)
+
+    def backfill(self):
+        """Copy content the replica has and the primary lacks; returns records copied
+
+        Listings come from the primary, so a fresh primary (an empty disk
+        after a redeploy) would list none of the BRDs already in Sheets.
+        Records are matched on timestamp, client, version and author, and
+        each one is checked just before it is copied: a save made while the
+        backfill runs reaches the primary before it reaches the replica.
+        Copies keep their timestamp, so listings place them by date.
+        """
+        copied = 0
+        for record in self.replica.all_content():
+            if self.primary.has_content(record):
+                continue
+            self.primary.save_content(record)
+            copied += 1
+        return copied
+
+    def has_content(self, record):
+        return self.primary.has_content(record)
+
+    # Listings come from the primary, filled from the replica by backfill()
+    def list_content(self, offset=0, limit=20, client_name=None):
+        return self.primary.list_content(offset, limit, client_name)
+
+    def count_content(self, client_name=None):
+        return self.primary.count_content(client_name)
+
+    def list_clients(self):
+        return self.primary.list_clients()
+
+    def close(self):
+        self.primary.close()
@@ -0,0 +1,37 @@
+"""pytest setup for the app's unit tests.
+
+    python -m pytest tests -q
+
+The app modules live at the repo root, so it is put on sys.path, and so
+is benchmarks/ for the sample data shared with the benchmarks.
+"""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (ROOT, os.path.join(ROOT, 'benchmarks')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from synthetic import cover_metadata  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def repo_root():
+    """Repo root; fonts and images are loaded from paths relative to it"""
+    return ROOT
+
+
+@pytest.fixture
+def in_repo_root(monkeypatch, repo_root):
+    """Run the test from the repo root"""
+    monkeypatch.chdir(repo_root)
+    return repo_root
+
+
+@pytest.fixture
+def cover():
+    """Cover details in the shape the exporters expect"""
+    return cover_metadata()
@@ -0,0 +1,58 @@
+"""AnalyticsStore event files and incremental aggregates."""
+import os
+
+import pytest
+
+from analytics import AnalyticsStore
+
+
+@pytest.fixture
+def analytics(tmp_path):
+    store = AnalyticsStore(str(tmp_path), flush_every=1000, flush_interval=3600)
+    yield store
+    store.close()
+
+
+def counts(table, key, value):
+    return dict(zip(table[key], table[value]))
+
+
+def test_pending_events_are_counted_before_a_flush(analytics):
+    analytics.record_generation('ACME', 'v1', 'Ann')
+    analytics.record_download('ACME', 'v1', 'pdf')
+    tables = analytics.aggregates()
+    assert counts(tables['brds_per_preparer'], 'prepared_by', 'brds') == {'Ann': 1}
+    assert counts(tables['downloads_per_format'], 'format', 'downloads') == {'PDF': 1}
+    assert analytics.aggregates(include_pending=False)['brds_per_day'].empty
+
+
+def test_flushes_add_up_and_survive_a_restart(analytics, tmp_path):
+    analytics.record_generation('ACME', 'v1', 'Ann')
+    assert analytics.flush() == 1
+    analytics.record_generation('ACME', 'v2', 'Ann')
+    analytics.record_generation('Globex', 'v1', 'Bob')
+    assert analytics.flush() == 2
+    assert len(os.listdir(tmp_path / 'events')) == 2
+
+    reopened = AnalyticsStore(str(tmp_path), flush_interval=3600)
+    try:
+        tables = reopened.aggregates()
+        assert counts(tables['brds_per_preparer'], 'prepared_by', 'brds') == {'Ann': 2, 'Bob': 1}
+        assert int(tables['brds_per_day']['brds'].sum()) == 3
+    finally:
+        reopened.close()
+
+
+def test_missing_aggregates_are_rebuilt_from_events(analytics, tmp_path):
+    analytics.record_download('ACME', 'v1', 'docx')
+    analytics.record_download('ACME', 'v1', 'md')
+    analytics.flush()
+    for name in os.listdir(tmp_path / 'aggregates'):
+        os.remove(tmp_path / 'aggregates' / name)
+
+    reopened = AnalyticsStore(str(tmp_path), flush_interval=3600)
+    try:
+        per_format = reopened.aggregates()['downloads_per_format']
+        assert counts(per_format, 'format', 'downloads') == {'DOCX': 1, 'MD': 1}
+    finally:
+        reopened.close()
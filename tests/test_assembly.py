@@ -0,0 +1,56 @@
+"""BrdAssembler per-part segment jobs."""
+from concurrent.futures import Future
+
+from assembly import BrdAssembler, join_parts
+from export_engine import ExportEngine, ExportQueueFull
+
+
+class RecordingEngine:
+    """ExportEngine stand-in whose segment jobs finish at once"""
+
+    def __init__(self, full=False):
+        self.full = full
+        self.jobs = []
+
+    def submit_segment(self, fmt, markdown_content):
+        if self.full:
+            raise ExportQueueFull('full')
+        self.jobs.append((fmt, markdown_content))
+        future = Future()
+        future.set_result((f"{fmt}:{markdown_content}".encode('utf-8'), 0.0))
+        return future
+
+
+def test_segments_follow_part_order_and_rebuild_only_changed_parts():
+    engine = RecordingEngine()
+    assembler = BrdAssembler(engine)
+    assembler.add_part('part1', '# One')
+    assembler.add_part('part2', '# Two')
+    assembler.add_part('part1', '# One')
+    assert assembler.builds == 4
+    assembler.add_part('part1', '# One again')
+    assert assembler.builds == 6
+    assert assembler.segments('pdf') == [b'pdf:# One again', b'pdf:# Two']
+    assert assembler.matches(join_parts(['# One again', '# Two']))
+    assert not assembler.matches(join_parts(['# One', '# Two']))
+
+
+def test_a_full_queue_falls_back_to_a_full_conversion():
+    assembler = BrdAssembler(RecordingEngine(full=True))
+    assembler.add_part('part1', '# One')
+    assert assembler.segments('docx') is None
+
+
+def test_export_from_segments_built_in_a_worker(in_repo_root, cover):
+    engine = ExportEngine(max_workers=1)
+    try:
+        assembler = BrdAssembler(engine)
+        assembler.add_part('part1', '# Part 1\n\nOverview.\n')
+        assembler.add_part('part2', '## Part 2\n\n- Login\n- Search\n')
+        content = join_parts(assembler.parts.values())
+        for fmt, magic in (('pdf', b'%PDF'), ('docx', b'PK')):
+            data = engine.export(fmt, content, cover, segments=lambda: assembler.segments(fmt, timeout=60))
+            assert data.startswith(magic)
+        assert [m['kind'] for m in engine.metrics()].count('segment') == 4
+    finally:
+        engine.shutdown(wait=True)
@@ -0,0 +1,73 @@
+"""BlobStore section deduplication and delta encoding."""
+import pytest
+
+from blob_store import BlobStore, apply_delta, make_delta, split_sections
+
+
+@pytest.fixture
+def blobs(tmp_path):
+    store = BlobStore(str(tmp_path / 'blobs.sqlite3'))
+    yield store
+    store.close()
+
+
+def brd(sections, edited=None):
+    text = ''
+    for i in range(sections):
+        body = f"Requirement {i} covers search, filters and reports.\n" * 20
+        if i == edited:
+            body += "An extra line added in this version.\n"
+        text += f"## Section {i}\n\n{body}\n"
+    return {'part1': text, 'part2': '# Part 2\n\nShort.\n', 'part3': '', 'part4': 'No heading\n'}
+
+
+def test_split_sections_keeps_the_text():
+    text = 'Intro\n# One\nbody\n## Two\nmore\n'
+    assert split_sections(text) == ['Intro\n', '# One\nbody\n', '## Two\nmore\n']
+    assert ''.join(split_sections(text)) == text
+
+
+def test_delta_round_trip():
+    base = 'a\nb\nc\nd\n'
+    text = 'a\nB\nc\nd\ne\n'
+    assert apply_delta(base, make_delta(base, text)) == text
+
+
+def test_version_round_trip(blobs):
+    parts = brd(10)
+    report = blobs.put_version('ACME', 'v1', parts)
+    assert report['raw_bytes'] == sum(len(text) for text in parts.values())
+    assert blobs.get_version('ACME', 'v1') == parts
+    assert blobs.has_version('ACME', 'v1')
+    assert blobs.get_version('ACME', 'v2') is None
+    assert not blobs.has_version('ACME', 'v2')
+
+
+def test_an_edited_version_stores_only_the_change(blobs):
+    first = blobs.put_version('ACME', 'v1', brd(10))
+    second = blobs.put_version('ACME', 'v2', brd(10, edited=3))
+    assert second['new_blobs'] == 1
+    assert second['stored_bytes'] < first['stored_bytes'] / 5
+    assert blobs.get_version('ACME', 'v2') == brd(10, edited=3)
+    assert blobs.get_version('ACME', 'v1') == brd(10)
+
+
+def test_long_delta_chains_read_back(blobs):
+    versions = {}
+    for version in range(12):
+        parts = brd(3)
+        parts['part1'] += ''.join(f"Change {n}\n" for n in range(version))
+        versions[f"v{version}"] = parts
+        blobs.put_version('ACME', f"v{version}", parts)
+    for version, parts in versions.items():
+        assert blobs.get_version('ACME', version) == parts
+
+
+def test_each_save_of_a_version_keeps_its_own_parts(blobs):
+    blobs.put_version('ACME', 'v1', brd(3), content_id=1)
+    blobs.put_version('ACME', 'v1', brd(3, edited=1), content_id=2)
+    assert blobs.get_version('ACME', 'v1', content_id=1) == brd(3)
+    assert blobs.get_version('ACME', 'v1', content_id=2) == brd(3, edited=1)
+    # Without a content id, the first save
+    assert blobs.get_version('ACME', 'v1') == brd(3)
+
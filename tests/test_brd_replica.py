@@ -0,0 +1,68 @@
+"""BrdReplica incremental mirroring of BRD_Content and BRD_Chunks."""
+import re
+
+import pytest
+
+from brd_replica import BrdReplica
+
+HEADERS = ['Timestamp', 'Client_Name', 'Version', 'Generated_By',
+           'Part_1_Content', 'Part_2_Content', 'Part_3_Content', 'Part_4_Content']
+
+
+class ListSheets:
+    """Sheets client stand-in serving worksheets from lists of rows"""
+
+    def __init__(self):
+        self.rows = {'BRD_Content': [HEADERS], 'BRD_Chunks': [['Chunk_Key', 'Sequence', 'Data']]}
+        self.reads = []
+
+    def call(self, title, method, *args, **kwargs):
+        rows = self.rows[title]
+        if method == 'row_values':
+            return list(rows[args[0] - 1])
+        if method == 'get_values':
+            start = int(re.match(r'A(\d+):', args[0]).group(1))
+            self.reads.append((title, start))
+            return [list(row) for row in rows[start - 1:]]
+        raise AssertionError(f"Unexpected call {method}")
+
+
+def row(client_name, version, part1='p1'):
+    return ['2024-03-01 10:00:00', client_name, version, 'Ann', part1, 'p2', 'p3', 'p4']
+
+
+@pytest.fixture
+def sheets():
+    return ListSheets()
+
+
+@pytest.fixture
+def replica(sheets, tmp_path):
+    replica = BrdReplica(sheets, str(tmp_path / 'replica.sqlite3'), refresh_interval=3600)
+    yield replica
+    replica.close()
+
+
+def test_sync_only_reads_new_rows(sheets, replica):
+    sheets.rows['BRD_Content'].append(row('ACME', 'v1'))
+    replica.sync()
+    sheets.rows['BRD_Content'].append(row('Globex', 'v1'))
+    assert replica.sync() == 1
+    assert replica.last_row() == 3
+    assert sheets.reads[-1] == ('BRD_Content', 3)
+    assert [r['client_name'] for r in replica.rows()] == ['ACME', 'Globex']
+
+
+def test_lookup_syncs_once_on_a_miss(sheets, replica):
+    replica.sync()
+    assert replica.lookup('ACME', 'v1') is None
+    sheets.rows['BRD_Content'].append(row('ACME', 'v1', part1='first'))
+    sheets.rows['BRD_Content'].append(row('ACME', 'v1', part1='second'))
+    # The first row of a client/version wins, as the Sheets scans did
+    assert replica.lookup('ACME', 'v1')['part1'] == 'first'
+
+
+def test_chunks_come_back_in_order(sheets, replica):
+    sheets.rows['BRD_Chunks'].extend([['key', '1', 'b'], ['key', '0', 'a']])
+    assert replica.chunks('key', 2) == ['a', 'b']
+    assert replica.chunks('key', 3) is None
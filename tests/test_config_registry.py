@@ -0,0 +1,77 @@
+"""ConfigRegistry templates and reloads."""
+import os
+
+import pytest
+
+from config_registry import ConfigRegistry, compile_template
+
+CONFIG = """model: model-a
+max_tokens: 100
+confidentiality_agreement: agreement.yaml
+parts:
+  part1:
+    template: part1.txt
+    temperature: 0.2
+"""
+
+
+@pytest.fixture
+def config_dir(tmp_path):
+    (tmp_path / 'brd_config.yaml').write_text(CONFIG)
+    (tmp_path / 'agreement.yaml').write_text(
+        "Confidentiality Agreement:\n  content: Keep it secret\n")
+    (tmp_path / 'part1.txt').write_text("BRD for {client_name}. {confidentiality_agreement}")
+    return tmp_path
+
+
+def touch_later(path, text):
+    """Rewrite a file with an mtime that is certainly newer"""
+    mtime = os.stat(path).st_mtime_ns
+    path.write_text(text)
+    os.utime(path, ns=(mtime + 10 ** 9, mtime + 10 ** 9))
+
+
+def test_compile_template_fills_constants_once():
+    render = compile_template("{client_name} / {confidentiality_agreement} / {client_name}",
+                              {'confidentiality_agreement': 'NDA'})
+    assert render({'client_name': 'ACME'}) == "ACME / NDA / ACME"
+
+
+def test_compile_template_rejects_unknown_placeholders():
+    with pytest.raises(ValueError):
+        compile_template("{budget}", {})
+
+
+def test_parts_render_with_their_settings(config_dir):
+    registry = ConfigRegistry(str(config_dir / 'brd_config.yaml'), check_interval=0)
+    part = registry.part('part1')
+    assert (part['model'], part['temperature']) == ('model-a', 0.2)
+    assert registry.render('part1', {'client_name': 'ACME'}) == "BRD for ACME. Keep it secret"
+    assert registry.get()['max_tokens'] == 100
+
+
+def test_edits_are_picked_up_when_the_mtime_changes(config_dir):
+    registry = ConfigRegistry(str(config_dir / 'brd_config.yaml'), check_interval=0)
+    touch_later(config_dir / 'part1.txt', "Updated for {client_name}")
+    assert registry.render('part1', {'client_name': 'ACME'}) == "Updated for ACME"
+    touch_later(config_dir / 'brd_config.yaml', CONFIG.replace('0.2', '0.7'))
+    assert registry.part('part1')['temperature'] == 0.7
+    assert registry.stats()['loads'] == 3
+
+
+def test_a_broken_edit_keeps_the_previous_settings(config_dir):
+    registry = ConfigRegistry(str(config_dir / 'brd_config.yaml'), check_interval=0)
+    touch_later(config_dir / 'part1.txt', "Now with {unknown_field}")
+    assert registry.render('part1', {'client_name': 'ACME'}) == "BRD for ACME. Keep it secret"
+    assert registry.stats()['errors'] == 1
+    # Not retried until a file changes again
+    registry.get()
+    assert registry.stats()['errors'] == 1
+    touch_later(config_dir / 'part1.txt', "Fixed for {client_name}")
+    assert registry.render('part1', {'client_name': 'ACME'}) == "Fixed for ACME"
+
+
+def test_the_first_load_must_succeed(tmp_path):
+    (tmp_path / 'brd_config.yaml').write_text("model: [unclosed")
+    with pytest.raises(Exception):
+        ConfigRegistry(str(tmp_path / 'brd_config.yaml'))
@@ -0,0 +1,54 @@
+"""Compressed and chunked Sheets encoding of BRD parts."""
+import random
+
+import pytest
+
+from content_codec import (CELL_LIMIT, CHUNK_HEADERS, decode_part, encode_part, encode_parts)
+
+
+def incompressible(size, seed=0):
+    rng = random.Random(seed)
+    return ''.join(rng.choice('abcdefghijklmnopqrstuvwxyz0123456789 \n#|') for _ in range(size))
+
+
+def test_small_part_round_trips_in_one_cell():
+    text = '# Executive Summary\n\n' + 'The platform lets vendors list products. ' * 200
+    cell, rows = encode_part(text)
+    assert rows == []
+    assert cell.startswith('z1:') and len(cell) < len(text)
+    assert decode_part(cell) == text
+
+
+def test_large_part_round_trips_through_chunk_rows():
+    text = incompressible(150000)
+    cell, rows = encode_part(text)
+    assert len(rows) > 1
+    assert all(len(row) == len(CHUNK_HEADERS) and len(row[2]) <= CELL_LIMIT for row in rows)
+    assert [row[1] for row in rows] == [str(i) for i in range(len(rows))]
+    chunks = {(row[0], int(row[1])): row[2] for row in rows}
+
+    def load_chunks(key, count):
+        return [chunks[(key, sequence)] for sequence in range(count)]
+
+    assert decode_part(cell, load_chunks) == text
+
+
+def test_missing_chunks_raise():
+    cell, _ = encode_part(incompressible(150000))
+    with pytest.raises(ValueError):
+        decode_part(cell, lambda key, count: None)
+
+
+def test_plain_and_empty_cells_read_as_text():
+    assert decode_part('Rows saved before compression') == 'Rows saved before compression'
+    assert decode_part('') == ''
+    assert decode_part(None) == ''
+    assert encode_part('') == ('', [])
+
+
+def test_encode_parts_reports_sizes():
+    parts = {'part1': '# One\n' * 500, 'part2': incompressible(150000), 'part3': '', 'part4': 'x'}
+    cells, rows, report = encode_parts(parts)
+    assert set(cells) == set(parts)
+    assert report['raw_bytes'] == sum(len(text) for text in parts.values())
+    assert report['chunk_rows'] == len(rows) > 0
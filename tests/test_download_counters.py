@@ -0,0 +1,109 @@
+"""DownloadCounters index and batched count updates."""
+import pytest
+
+from download_counters import DownloadCounters
+
+HEADERS = ['Timestamp', 'Client_Name', 'Project_Description', 'User_Types', 'Deliverables',
+           'Prepared_By', 'Document_Date', 'Version_Number', 'Download_Count_MD',
+           'Download_Count_PDF', 'Download_Count_DOCX']
+
+
+def sheet_row(client_name, version, md='0', pdf='0', docx='0'):
+    return ['2024-03-01 10:00:00', client_name, '', '', '', 'Ann', '2024-03-01', version, md, pdf, docx]
+
+
+class Sheet:
+    """Sheet1 stand-in for index reads"""
+
+    def __init__(self, rows):
+        self.rows = [HEADERS] + rows
+        self.reads = 0
+
+    def call(self, title, method, *args, **kwargs):
+        assert (title, method) == ('Sheet1', 'get_all_values')
+        self.reads += 1
+        return [list(row) for row in self.rows]
+
+
+class RecordingQueue:
+    def __init__(self):
+        self.updates = []
+
+    def update(self, worksheet, updates):
+        self.updates.append((worksheet, updates))
+
+
+@pytest.fixture
+def make_counters():
+    created = []
+
+    def make(rows, **kwargs):
+        sheet = Sheet(rows)
+        queue = RecordingQueue()
+        counters = DownloadCounters(sheet, queue, flush_interval=3600, **kwargs)
+        counters.load_index()
+        created.append(counters)
+        return counters, sheet, queue
+
+    yield make
+    for counters in created:
+        counters.close()
+
+
+def test_increments_become_one_batch_of_cell_updates(make_counters):
+    counters, _, queue = make_counters([sheet_row('ACME', 'v1', pdf='4'), sheet_row('Globex', 'v2')])
+    counters.increment('ACME', 'v1', 'pdf')
+    counters.increment('ACME', 'v1', 'PDF')
+    counters.increment('Globex', 'v2', 'md')
+    assert counters.pending() == 3
+    assert counters.flush() == 2
+    assert queue.updates == [('Sheet1', [{'range': 'J2', 'values': [[6]]},
+                                         {'range': 'I3', 'values': [[1]]}])]
+    assert counters.pending() == 0
+
+
+def test_first_row_wins_for_a_resaved_brd(make_counters):
+    counters, _, queue = make_counters([sheet_row('ACME', 'v1', md='1'), sheet_row('ACME', 'v1', md='7')])
+    counters.increment('ACME', 'v1', 'MD')
+    counters.flush()
+    assert queue.updates == [('Sheet1', [{'range': 'I2', 'values': [[2]]}])]
+
+
+def test_counts_survive_a_reload_that_has_not_seen_them_yet(make_counters):
+    counters, sheet, queue = make_counters([sheet_row('ACME', 'v1')])
+    counters.increment('ACME', 'v1', 'MD')
+    counters.flush()
+    # The update is still in the write queue, the sheet says 0
+    counters.load_index()
+    counters.increment('ACME', 'v1', 'MD')
+    counters.flush()
+    assert queue.updates[-1] == ('Sheet1', [{'range': 'I2', 'values': [[2]]}])
+
+
+def test_increments_for_unknown_rows_are_kept(make_counters):
+    counters, sheet, queue = make_counters([sheet_row('ACME', 'v1')], min_reload_interval=0)
+    counters.increment('Initech', 'v1', 'DOCX')
+    assert counters.flush() == 0
+    assert counters.pending() == 1
+    sheet.rows.append(sheet_row('Initech', 'v1'))
+    assert counters.flush() == 1
+    assert queue.updates == [('Sheet1', [{'range': 'K3', 'values': [[1]]}])]
+
+
+def test_a_row_appended_here_reloads_despite_the_interval(make_counters):
+    counters, sheet, queue = make_counters([sheet_row('ACME', 'v1')], min_reload_interval=3600)
+    counters.row_appended('Initech', 'v1')
+    counters.increment('Initech', 'v1', 'MD')
+    # The append is still in the write queue
+    assert counters.flush() == 0
+    sheet.rows.append(sheet_row('Initech', 'v1'))
+    assert counters.flush() == 1
+    assert queue.updates == [('Sheet1', [{'range': 'I3', 'values': [[1]]}])]
+
+
+def test_unannounced_rows_wait_for_the_interval(make_counters):
+    counters, sheet, _ = make_counters([sheet_row('ACME', 'v1')], min_reload_interval=3600)
+    counters.increment('Initech', 'v1', 'MD')
+    sheet.rows.append(sheet_row('Initech', 'v1'))
+    assert counters.flush() == 0
+    assert counters.pending() == 1
@@ -0,0 +1,115 @@
+"""ExportEngine jobs, caching and timeouts against a real worker process."""
+import json
+import os
+import threading
+from concurrent.futures import Future, TimeoutError
+
+import pytest
+
+from export_engine import EXPORT_TIMEOUT, ExportCache, ExportEngine
+
+def brd(tag, requirements=5):
+    rows = '\n'.join(f"| REQ-{i} | Feature {i} | {tag} requirement {i} |" for i in range(requirements))
+    return (f"# {tag}\n\nA short overview with **bold** text.\n\n- One\n- Two\n\n"
+            f"| ID | Feature | Description |\n|----|---------|-------------|\n{rows}\n")
+
+
+@pytest.fixture(scope='module')
+def engine(repo_root):
+    # Workers resolve fonts and images relative to the repo root
+    cwd = os.getcwd()
+    os.chdir(repo_root)
+    engine = ExportEngine(max_workers=1)
+    yield engine
+    engine.shutdown(wait=True)
+    os.chdir(cwd)
+
+
+def count_submits(engine, monkeypatch):
+    submits = []
+    submit = engine.submit
+
+    def counting(*args, **kwargs):
+        submits.append(args[0])
+        return submit(*args, **kwargs)
+    monkeypatch.setattr(engine, 'submit', counting)
+    return submits
+
+
+def test_budgets_fit_in_the_export_timeout(repo_root):
+    with open(os.path.join(repo_root, 'benchmarks', 'budgets.json')) as f:
+        budgets = json.load(f)
+    slowest = max(budget['seconds'] for case in budgets.values() for budget in case.values())
+    assert slowest < EXPORT_TIMEOUT
+
+
+def test_export_returns_files_and_caches_them(engine, monkeypatch, cover):
+    submits = count_submits(engine, monkeypatch)
+    pdf = engine.export('pdf', brd('Cached'), cover)
+    docx = engine.export('docx', brd('Cached'), cover)
+    assert pdf.startswith(b'%PDF')
+    assert docx.startswith(b'PK')
+    assert engine.export('pdf', brd('Cached'), cover) == pdf
+    assert submits == ['pdf', 'docx']
+
+
+def test_timed_out_job_is_reused_and_cached(engine, monkeypatch, cover):
+    submits = count_submits(engine, monkeypatch)
+    content = brd('Slow', requirements=200)
+    with pytest.raises(TimeoutError):
+        engine.export('pdf', content, cover, timeout=0.001)
+    # Asking again waits on the running job rather than starting another
+    data = engine.export('pdf', content, cover)
+    assert data.startswith(b'%PDF')
+    assert submits == ['pdf']
+    assert engine.stats()['failed'] >= 1
+
+
+def test_unknown_format_is_rejected(engine, cover):
+    with pytest.raises(ValueError):
+        engine.export('odt', brd('Odt'), cover)
+
+
+def finished_submit(fmt, markdown_content, *args):
+    """ExportEngine.submit stand-in returning an already completed job"""
+    future = Future()
+    future.set_result((markdown_content.encode('utf-8'), 0.0))
+    return future
+
+
+def test_a_job_that_is_already_done_does_not_deadlock(cover):
+    engine = ExportEngine(max_workers=1)
+    engine.submit = finished_submit
+    exported = []
+    thread = threading.Thread(target=lambda: exported.append(engine.export('pdf', 'done', cover)),
+                              daemon=True)
+    thread.start()
+    # The done callbacks run in the exporting thread as they are attached
+    thread.join(10)
+    assert exported == [b'done']
+    assert engine._inflight == {}
+    assert engine.cache.get(ExportCache.key('pdf', 'done', cover, None)) == b'done'
+
+
+def test_slow_segments_do_not_hold_up_other_exports(cover):
+    engine = ExportEngine(max_workers=1)
+    engine.submit = finished_submit
+    release = threading.Event()
+
+    def slow_segments():
+        release.wait(10)
+        return None
+
+    first = threading.Thread(target=engine.export, args=('pdf', 'first', cover),
+                             kwargs={'segments': slow_segments}, daemon=True)
+    first.start()
+    exported = []
+    second = threading.Thread(target=lambda: exported.append(engine.export('pdf', 'second', cover)),
+                              daemon=True)
+    second.start()
+    # Would wait for slow_segments if building them held the in-flight lock
+    second.join(5)
+    release.set()
+    first.join(10)
+    assert exported == [b'second']
+    assert engine.export('pdf', 'first', cover) == b'first'
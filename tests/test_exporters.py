@@ -0,0 +1,98 @@
+"""PDF and DOCX exporter building blocks."""
+from io import BytesIO
+
+import markdown2
+import pytest
+from bs4 import BeautifulSoup
+from docx import Document
+from reportlab.platypus import LongTable, Paragraph, Table
+
+import exporters
+
+pytestmark = pytest.mark.usefixtures('in_repo_root')
+
+
+def annexure(rows):
+    return [['Requirement ID', 'Module/Feature', 'Description']] + [
+        [f"REQ-{i}", 'Search & Filters', f"Users <b>filter</b> results by date, price and rating {i}."]
+        for i in range(rows)]
+
+
+def test_wrap_cell_text_fits_the_width():
+    font, size = 'Poppins', 10
+    text = 'alpha beta gamma delta epsilon zeta eta theta\nsecond line'
+    wrapped = exporters.wrap_cell_text(text, 80, font, size)
+    lines = wrapped.split('\n')
+    assert ' '.join(wrapped.split()) == ' '.join(text.split())
+    assert 'second line' in lines
+    assert all(exporters._text_extent(line, font, size)[0] <= 80 for line in lines if ' ' in line)
+
+
+def test_small_tables_keep_paragraph_cells():
+    table = exporters.build_pdf_table(annexure(3))
+    assert type(table) is Table
+    assert all(isinstance(cell, Paragraph) for row in table._cellvalues for cell in row)
+
+
+def test_large_tables_draw_body_cells_as_text():
+    table = exporters.build_pdf_table(annexure(exporters.LARGE_TABLE_ROWS + 1))
+    assert isinstance(table, LongTable)
+    assert table.repeatRows == 1
+    assert all(isinstance(cell, Paragraph) for cell in table._cellvalues[0])
+    assert all(isinstance(cell, str) for row in table._cellvalues[1:] for cell in row)
+    # Cell text is drawn as is, markup characters included
+    assert '<b>filter</b>' in table._cellvalues[1][2].replace('\n', ' ')
+    pdf = exporters.render_pdf([table]).getvalue()
+    assert pdf.startswith(b'%PDF')
+
+
+def test_watermark_is_embedded_once_for_every_page(cover):
+    assert exporters.get_pdf_styles() is exporters.get_pdf_styles()
+    body = '\n\n'.join(f"## Section {i}\n\n" + 'Requirement text. ' * 200 for i in range(8))
+    pdf = exporters.convert_markdown_to_pdf(body, cover).getvalue()
+    assert pdf.count(b'/Type /Page\n') > 4
+    # The cover logo and the header watermark, whatever the page count
+    assert pdf.count(b'/Subtype /Image') == 2
+
+
+def test_nested_blocks_are_walked_once():
+    html = markdown2.markdown(
+        "Intro\n\n> Quoted\n\n1. First\n2. Second\n    - Nested\n\n- Last\n",
+        extras=["tables", "fenced-code-blocks"])
+    blocks = list(exporters.walk_blocks(BeautifulSoup(html, 'html.parser')))
+    assert [block.name for block in blocks] == ['p', 'p', 'ol', 'ul']
+    assert list(exporters.iter_list_items(blocks[2])) == [
+        (True, '1.', 0, 'First'),
+        (True, '2.', 0, 'Second'),
+        (False, '•', 1, 'Nested')
+    ]
+
+
+def test_bulk_docx_table_pads_rows_and_escapes_text():
+    doc = exporters.new_docx_document()
+    exporters.bulk_docx_table(doc, [['ID', 'Description'], ['REQ-1', 'A & B\nnext\x0bline'], ['REQ-2']])
+    table = doc.tables[-1]
+    assert [[cell.text for cell in row.cells] for row in table.rows] == [
+        ['ID', 'Description'],
+        ['REQ-1', 'A & B\nnextline'],
+        ['REQ-2', '']
+    ]
+
+
+def test_template_and_built_documents_have_the_same_body(cover):
+    def body_texts(use_template):
+        data = exporters.convert_markdown_to_docx('# Scope\n\nLogin.\n', cover, use_template).getvalue()
+        return [p.text for p in Document(BytesIO(data)).paragraphs if p.text]
+
+    assert body_texts(True) == body_texts(False)
+    assert exporters.get_docx_template() is exporters.get_docx_template()
+
+
+def test_compact_profile_is_smaller(cover):
+    body = '## Scope\n\n' + 'Requirement text. ' * 400
+    standard = exporters.convert_markdown_to_pdf(body, cover).getvalue()
+    compact = exporters.convert_markdown_to_pdf(body, cover, profile='compact').getvalue()
+    assert compact.startswith(b'%PDF')
+    assert len(compact) < len(standard)
+    with pytest.raises(ValueError):
+        exporters.get_pdf_profile('tiny')
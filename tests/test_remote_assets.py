@@ -0,0 +1,86 @@
+"""RemoteAssets bundled copies, refresh cache and failed fetches."""
+import json
+import os
+
+import pytest
+import requests
+
+from remote_assets import RemoteAssets
+
+SOURCES = {'writing': 'https://example.invalid/writing.json'}
+
+
+def lottie(tag):
+    return {'v': '5.7.4', 'op': 60, 'layers': [], 'nm': tag}
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(data if isinstance(data, str) else json.dumps(data))
+
+
+class Response:
+    def __init__(self, data):
+        self.data = data
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.data
+
+
+@pytest.fixture
+def dirs(tmp_path):
+    asset_dir, cache_dir = str(tmp_path / 'bundled'), str(tmp_path / 'cache')
+    write(os.path.join(asset_dir, 'writing.json'), lottie('bundled'))
+    return asset_dir, cache_dir
+
+
+def assets(dirs):
+    asset_dir, cache_dir = dirs
+    return RemoteAssets(SOURCES, asset_dir=asset_dir, cache_dir=cache_dir, refresh=False)
+
+
+def test_a_fresh_cached_copy_wins_without_a_fetch(dirs, monkeypatch):
+    write(os.path.join(dirs[1], 'writing.json'), lottie('cached'))
+    monkeypatch.setattr(requests, 'get', lambda *args, **kwargs: pytest.fail('fetched'))
+    remote = assets(dirs)
+    assert remote.get('writing')['nm'] == 'cached'
+    assert not remote.is_stale('writing')
+    assert remote.refresh()
+    assert remote.stats() == {'fetched': 0, 'failed': 0, 'loaded': ['writing']}
+
+
+def test_a_failed_refresh_keeps_the_current_copy(dirs, monkeypatch):
+    def unreachable(*args, **kwargs):
+        raise requests.ConnectionError('no network')
+    monkeypatch.setattr(requests, 'get', unreachable)
+    remote = assets(dirs)
+    assert not remote.refresh()
+    assert remote.get('writing')['nm'] == 'bundled'
+    assert remote.stats()['failed'] == 1
+    assert not os.path.exists(os.path.join(dirs[1], 'writing.json'))
+
+
+def test_a_fetch_that_is_not_lottie_is_rejected(dirs, monkeypatch):
+    monkeypatch.setattr(requests, 'get', lambda *args, **kwargs: Response({'error': 'not found'}))
+    remote = assets(dirs)
+    assert not remote.fetch('writing')
+    assert remote.get('writing')['nm'] == 'bundled'
+
+
+def test_a_good_fetch_replaces_and_caches_the_copy(dirs, monkeypatch):
+    monkeypatch.setattr(requests, 'get', lambda *args, **kwargs: Response(lottie('original')))
+    remote = assets(dirs)
+    assert remote.refresh()
+    assert remote.get('writing')['nm'] == 'original'
+    assert assets(dirs).get('writing')['nm'] == 'original'
+
+
+def test_a_corrupt_cache_falls_back_to_the_bundled_copy(dirs):
+    write(os.path.join(dirs[1], 'writing.json'), '{"op": 60, "lay')
+    assert assets(dirs).get('writing')['nm'] == 'bundled'
+    os.remove(os.path.join(dirs[0], 'writing.json'))
+    assert assets(dirs).get('writing') is None
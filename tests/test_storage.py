@@ -0,0 +1,238 @@
+"""Behaviour shared by the BrdStore backends."""
+import pytest
+
+import storage
+from blob_store import BlobStore
+
+
+def form_data(client_name='ACME', version='v1', prepared_by='Ann'):
+    return {
+        'client_name': client_name,
+        'project_description': 'A marketplace',
+        'user_types': 'Customer\nAdmin',
+        'deliverables': 'Web app',
+        'prepared_by': prepared_by,
+        'document_date': '2024-03-01',
+        'version_number': version
+    }
+
+
+def parts(tag):
+    return {key: f"# {key} {tag}\n\nBody of {key} for {tag}.\n" for key in storage.PART_KEYS}
+
+
+class RecordingReplica:
+    """Replica stand-in that records writes and serves lookups from a dict"""
+
+    def __init__(self, content=None):
+        self.calls = []
+        self.content = dict(content or {})
+
+    def save_form(self, record):
+        self.calls.append(('save_form', record['client_name'], record['version_number']))
+
+    def save_content(self, record):
+        self.calls.append(('save_content', record['client_name'], record['version']))
+
+    def increment_download(self, client_name, version, file_type):
+        self.calls.append(('increment_download', client_name, version, file_type))
+
+    def get_content(self, client_name, version):
+        return self.content.get((client_name, version))
+
+    def all_content(self):
+        return iter(self.content.values())
+
+
+@pytest.fixture(params=['memory', 'sqlite', 'sqlite+blobs', 'replicated'])
+def store(request, tmp_path):
+    db_path = str(tmp_path / 'store.sqlite3')
+    if request.param == 'memory':
+        backend = storage.MemoryStore()
+    elif request.param == 'sqlite':
+        backend = storage.SqliteStore(db_path)
+    elif request.param == 'sqlite+blobs':
+        backend = storage.SqliteStore(db_path, blob_store=BlobStore(db_path))
+    else:
+        backend = storage.ReplicatedStore(storage.MemoryStore(), RecordingReplica())
+    yield backend
+    backend.close()
+
+
+def test_content_round_trip(store):
+    store.save_content(storage.content_record('ACME', 'v1', 'Ann', parts('first')))
+    record = store.get_content('ACME', 'v1')
+    assert record['generated_by'] == 'Ann'
+    assert {key: record[key] for key in storage.PART_KEYS} == parts('first')
+    assert store.get_content('ACME', 'v2') is None
+
+
+def test_download_counts(store):
+    store.save_form(storage.form_record(form_data()))
+    store.increment_download('ACME', 'v1', 'pdf')
+    store.increment_download('ACME', 'v1', 'PDF')
+    store.increment_download('ACME', 'v1', 'docx')
+    assert store.download_counts('ACME', 'v1') == {'MD': 0, 'PDF': 2, 'DOCX': 1}
+    assert store.download_counts('ACME', 'v9') is None
+
+
+def test_resaved_form_counts_downloads_once(store):
+    store.save_form(storage.form_record(form_data(prepared_by='Ann')))
+    store.save_form(storage.form_record(form_data(prepared_by='Bob')))
+    store.increment_download('ACME', 'v1', 'MD')
+    assert store.download_counts('ACME', 'v1') == {'MD': 1, 'PDF': 0, 'DOCX': 0}
+
+
+def test_each_listed_save_loads_its_own_content(store):
+    store.save_content(storage.content_record('ACME', 'v1', 'Ann', parts('Ann')))
+    store.save_content(storage.content_record('ACME', 'v1', 'Bob', parts('Bob')))
+    bob, ann = store.list_content()
+    assert (ann['generated_by'], bob['generated_by']) == ('Ann', 'Bob')
+    assert ann['id'] != bob['id']
+    for entry in (ann, bob):
+        record = store.get_content_by_id(entry['id'])
+        assert record['generated_by'] == entry['generated_by']
+        assert {key: record[key] for key in storage.PART_KEYS} == parts(entry['generated_by'])
+    # Lookups by client/version still return the first save
+    assert store.get_content('ACME', 'v1')['generated_by'] == 'Ann'
+    assert store.get_content_by_id(bob['id'] + 1) is None
+
+
+def test_form_lookup_picks_the_form_a_save_was_generated_from(store):
+    first = dict(storage.form_record(form_data(prepared_by='Ann')), timestamp='2024-03-01 09:00:00')
+    second = dict(storage.form_record(form_data(prepared_by='Bob')), timestamp='2024-03-02 09:00:00',
+                  document_date='2024-03-02')
+    store.save_form(first)
+    store.save_form(second)
+    assert store.get_form('ACME', 'v1')['prepared_by'] == 'Ann'
+    assert store.get_form('ACME', 'v1', '2024-03-02 09:00:05')['document_date'] == '2024-03-02'
+    assert store.get_form('ACME', 'v1', '2024-03-01 12:00:00')['prepared_by'] == 'Ann'
+    # Content older than every form still gets the first one
+    assert store.get_form('ACME', 'v1', '2024-02-01 00:00:00')['prepared_by'] == 'Ann'
+    assert store.get_form('ACME', 'v9') is None
+
+
+def test_listing_newest_first_with_filter(store):
+    for client_name, version in [('ACME', 'v1'), ('Globex', 'v1'), ('ACME', 'v2')]:
+        store.save_content(storage.content_record(client_name, version, 'Ann', parts(version)))
+    listing = store.list_content()
+    assert [(row['client_name'], row['version']) for row in listing] == [
+        ('ACME', 'v2'), ('Globex', 'v1'), ('ACME', 'v1')]
+    assert not any(key in listing[0] for key in storage.PART_KEYS)
+    assert [row['version'] for row in store.list_content(client_name='ACME')] == ['v2', 'v1']
+    assert [row['client_name'] for row in store.list_content(offset=1, limit=1)] == ['Globex']
+    assert store.count_content() == 3
+    assert store.count_content('ACME') == 2
+    assert store.list_clients() == ['ACME', 'Globex']
+
+
+def test_listing_orders_by_timestamp_not_save_order(store):
+    recent = dict(storage.content_record('ACME', 'v2', 'Ann', parts('v2')), timestamp='2024-03-02 09:00:00')
+    older = dict(storage.content_record('ACME', 'v1', 'Ann', parts('v1')), timestamp='2024-03-01 09:00:00')
+    store.save_content(recent)
+    store.save_content(older)
+    assert [row['version'] for row in store.list_content()] == ['v2', 'v1']
+    assert [row['version'] for row in store.list_content(client_name='ACME')] == ['v2', 'v1']
+    assert store.has_content(older)
+    assert not store.has_content(dict(older, generated_by='Bob'))
+
+
+def test_replicated_store_mirrors_writes():
+    replica = RecordingReplica()
+    store = storage.ReplicatedStore(storage.MemoryStore(), replica)
+    store.save_form(storage.form_record(form_data()))
+    store.save_content(storage.content_record('ACME', 'v1', 'Ann', parts('first')))
+    store.increment_download('ACME', 'v1', 'MD')
+    assert replica.calls == [('save_form', 'ACME', 'v1'), ('save_content', 'ACME', 'v1'),
+                             ('increment_download', 'ACME', 'v1', 'MD')]
+
+
+def test_replicated_store_falls_back_to_replica_and_keeps_the_record():
+    record = storage.content_record('ACME', 'v1', 'Ann', parts('sheets'))
+    primary = storage.MemoryStore()
+    store = storage.ReplicatedStore(primary, RecordingReplica({('ACME', 'v1'): record}))
+    assert store.get_content('ACME', 'v1')['part1'] == record['part1']
+    assert primary.get_content('ACME', 'v1')['part1'] == record['part1']
+
+
+def test_backfill_copies_only_what_the_primary_lacks():
+    mine = storage.content_record('ACME', 'v1', 'Ann', parts('mine'))
+    theirs = dict(storage.content_record('Globex', 'v2', 'Bob', parts('theirs')),
+                  timestamp='2024-01-01 09:00:00')
+    primary = storage.MemoryStore()
+    store = storage.ReplicatedStore(primary, RecordingReplica({('ACME', 'v1'): mine,
+                                                              ('Globex', 'v2'): theirs}))
+    primary.save_content(mine)
+    assert store.backfill() == 1
+    assert store.backfill() == 0
+    # The older copy is listed by its own timestamp, below the recent save
+    listing = store.list_content()
+    assert [entry['client_name'] for entry in listing] == ['ACME', 'Globex']
+    assert store.get_content_by_id(listing[1]['id'])['part1'] == theirs['part1']
+    # Copies are not mirrored back to the replica
+    assert store.replica.calls == []
+
+
+def test_backfill_skips_a_save_made_while_it_runs():
+    old = dict(storage.content_record('Globex', 'v1', 'Bob', parts('old')), timestamp='2024-01-01 09:00:00')
+    new = storage.content_record('ACME', 'v1', 'Ann', parts('new'))
+
+    class GrowingReplica(RecordingReplica):
+        def all_content(self):
+            yield old
+            # A save during the backfill, reaching Sheets before the scan ends
+            store.save_content(new)
+            yield new
+
+    store = storage.ReplicatedStore(storage.MemoryStore(), GrowingReplica())
+    assert store.backfill() == 1
+    assert store.count_content() == 2
+
+
+def test_replicated_store_builds_a_lazy_replica_on_first_write():
+    built = []
+
+    def factory():
+        built.append(True)
+        return RecordingReplica()
+
+    store = storage.ReplicatedStore(storage.MemoryStore(), factory)
+    store.list_content()
+    assert not built
+    store.save_form(storage.form_record(form_data()))
+    assert built == [True]
+
+
+def test_replica_errors_do_not_fail_the_write():
+    class BrokenReplica(RecordingReplica):
+        def save_content(self, record):
+            raise RuntimeError('Sheets is down')
+
+    store = storage.ReplicatedStore(storage.MemoryStore(), BrokenReplica())
+    store.save_content(storage.content_record('ACME', 'v1', 'Ann', parts('first')))
+    assert store.get_content('ACME', 'v1') is not None
+
+
+def test_resaved_content_keeps_the_parts_of_every_save(tmp_path):
+    db_path = str(tmp_path / 'store.sqlite3')
+    blobs = BlobStore(db_path)
+    store = storage.SqliteStore(db_path, blob_store=blobs)
+    store.save_content(storage.content_record('ACME', 'v1', 'Ann', parts('Ann')))
+    store.save_content(storage.content_record('ACME', 'v1', 'Bob', parts('Bob')))
+    assert blobs.get_version('ACME', 'v1', content_id=2)['part1'] == parts('Bob')['part1']
+    # Lookups by client/version still return the first save
+    assert store.get_content('ACME', 'v1')['part1'] == parts('Ann')['part1']
+    store.close()
+
+
+def test_a_failed_parts_write_leaves_no_row(tmp_path):
+    class FailingBlobs(BlobStore):
+        def put_version(self, *args, **kwargs):
+            raise RuntimeError('disk full')
+
+    db_path = str(tmp_path / 'store.sqlite3')
+    store = storage.SqliteStore(db_path, blob_store=FailingBlobs(db_path))
+    with pytest.raises(RuntimeError):
+        store.save_content(storage.content_record('ACME', 'v1', 'Ann', parts('Ann')))
+    assert store.count_content() == 0
+    store.close()
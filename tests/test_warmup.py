@@ -0,0 +1,47 @@
+"""WarmUp background steps and their status."""
+import threading
+
+import perf
+from warmup import WarmUp, shared_warm_up
+
+
+def test_steps_run_in_order_and_a_failure_does_not_stop_the_rest():
+    ran = []
+
+    def fail():
+        ran.append('fail')
+        raise RuntimeError('no network')
+
+    warm_up = WarmUp([('first', lambda: ran.append('first')), ('fail', fail),
+                      ('last', lambda: ran.append('last'))])
+    assert not warm_up.status()['ready']
+    assert warm_up.start() is shared_warm_up()
+    assert warm_up.wait(10)
+
+    assert ran == ['first', 'fail', 'last']
+    status = warm_up.status()
+    assert status['ready'] and status['seconds'] is not None
+    assert {name: step['status'] for name, step in status['steps'].items()} == {
+        'first': 'ok', 'fail': 'error', 'last': 'ok'}
+    assert status['steps']['fail']['error'] == 'no network'
+    assert 'warm_up_last' in perf.snapshot()
+
+
+def test_start_runs_the_steps_once():
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def step():
+        calls.append(1)
+        started.set()
+        release.wait(10)
+
+    warm_up = WarmUp([('slow', step)])
+    warm_up.start()
+    warm_up.start()
+    assert started.wait(10)
+    assert not warm_up.ready()
+    assert warm_up.status()['steps']['slow']['status'] == 'running'
+    release.set()
+    assert warm_up.wait(10)
+    assert calls == [1]
@@ -0,0 +1,105 @@
+"""WriteBehindQueue batching, retries and the on-disk spool."""
+import json
+import threading
+
+import pytest
+import requests
+
+import write_behind
+from write_behind import WriteBehindQueue, group_writes
+
+
+class RecordingSheets:
+    """Sheets client stand-in; fails the first `failures` calls with `error`"""
+
+    def __init__(self, failures=0, error=None):
+        self.failures = failures
+        self.error = error or requests.exceptions.ConnectionError('connection reset')
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def call(self, title, method, *args, **kwargs):
+        with self._lock:
+            if self.failures:
+                self.failures -= 1
+                raise self.error
+            self.calls.append((title, method, args[0]))
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(write_behind, 'backoff_delay', lambda attempt: 0.01)
+
+
+def make_queue(sheets, tmp_path):
+    return WriteBehindQueue(sheets, str(tmp_path / 'spool.jsonl'), writes_per_minute=10 ** 6,
+                            flush_interval=0.05)
+
+
+def test_group_writes_merges_consecutive_writes_only():
+    writes = [{'worksheet': 'A', 'kind': 'append'}, {'worksheet': 'A', 'kind': 'append'},
+              {'worksheet': 'B', 'kind': 'append'}, {'worksheet': 'A', 'kind': 'append'}]
+    assert [(key, len(group)) for key, group in group_writes(writes)] == [
+        (('A', 'append'), 2), (('B', 'append'), 1), (('A', 'append'), 1)]
+
+
+def test_writes_are_sent_in_order_as_batches(tmp_path):
+    sheets = RecordingSheets()
+    queue = make_queue(sheets, tmp_path)
+    queue.append('Sheet1', ['a'])
+    queue.append('Sheet1', ['b'])
+    queue.update('Sheet1', [{'range': 'I2', 'values': [[1]]}])
+    assert queue.flush(timeout=5)
+    queue.close()
+    assert sheets.calls == [('Sheet1', 'append_rows', [['a'], ['b']]),
+                            ('Sheet1', 'batch_update', [{'range': 'I2', 'values': [[1]]}])]
+    assert queue.stats()['sent'] == 3
+    assert open(tmp_path / 'spool.jsonl').read() == ''
+
+
+def test_failed_writes_are_retried(tmp_path):
+    sheets = RecordingSheets(failures=2)
+    queue = make_queue(sheets, tmp_path)
+    queue.append('Sheet1', ['a'])
+    assert queue.flush(timeout=5)
+    queue.close()
+    assert sheets.calls == [('Sheet1', 'append_rows', [['a']])]
+    assert queue.stats()['calls'] == 3
+
+
+def test_rejected_writes_go_to_the_failed_file(tmp_path):
+    sheets = RecordingSheets(failures=10 ** 6, error=ValueError('bad row'))
+    queue = make_queue(sheets, tmp_path)
+    queue.append('Sheet1', ['a'])
+    assert queue.flush(timeout=5)
+    queue.close()
+    failed = [json.loads(line) for line in open(tmp_path / 'spool.jsonl.failed')]
+    assert [(w['payload'], w['error']) for w in failed] == [(['a'], 'bad row')]
+    assert queue.pending() == 0
+
+
+def test_unsent_writes_are_restored_from_the_spool(tmp_path):
+    down = RecordingSheets(failures=10 ** 6)
+    queue = make_queue(down, tmp_path)
+    queue.append('Sheet1', ['a'])
+    queue.append('BRD_Content', ['b'])
+    queue.close(timeout=0.2)
+    assert queue.pending() == 2
+
+    sheets = RecordingSheets()
+    restored = make_queue(sheets, tmp_path)
+    assert restored.flush(timeout=5)
+    restored.close()
+    assert sheets.calls == [('Sheet1', 'append_rows', [['a']]),
+                            ('BRD_Content', 'append_rows', [['b']])]
+
+
+def test_a_torn_spool_line_is_skipped(tmp_path):
+    spool = tmp_path / 'spool.jsonl'
+    write = {'id': '1', 'worksheet': 'Sheet1', 'kind': 'append', 'payload': ['a'], 'attempts': 0}
+    spool.write_text(json.dumps(write) + '\n{"id": "2", "work')
+    sheets = RecordingSheets()
+    queue = make_queue(sheets, tmp_path)
+    assert queue.flush(timeout=5)
+    queue.close()
+    assert sheets.calls == [('Sheet1', 'append_rows', [['a']])]
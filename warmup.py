@@ -0,0 +1,93 @@
+"""Once-per-process warm-up of the first-use costs behind a BRD.
+
+The first user after a deploy would otherwise pay, all at once, for
+importing the LLM and export stacks, parsing fonts, the TLS handshake
+to Anthropic, Sheets OAuth and the first ReportLab and python-docx
+layouts. WarmUp runs named steps in order on a daemon thread and times
+each one. A failing step is printed and recorded, and the remaining
+steps still run. Steps only fill caches and pools the app would fill on
+first use anyway, so a request that arrives before the warm-up has
+finished simply does the remaining work itself.
+
+status() reports readiness and per-step timings, and each step is also
+recorded in perf as warm_up_<name>. The warm-up started last in the
+process is returned by shared_warm_up(), which the Usage Analytics page
+shows when BRD_DIAGNOSTICS=1.
+"""
+import threading
+import time
+
+import perf
+
+_shared_warm_up = None
+_shared_warm_up_lock = threading.Lock()
+
+
+class WarmUp:
+    """Runs (name, callable) steps once in the background"""
+
+    def __init__(self, steps):
+        self.steps = list(steps)
+        self._lock = threading.Lock()
+        self._steps = {name: {'status': 'pending', 'seconds': None, 'error': None}
+                       for name, _ in self.steps}
+        self._seconds = None
+        self._done = threading.Event()
+        self._thread = None
+
+    def start(self):
+        global _shared_warm_up
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='warm-up', daemon=True)
+                self._thread.start()
+        with _shared_warm_up_lock:
+            _shared_warm_up = self
+        return self
+
+    def _update(self, name, **changes):
+        with self._lock:
+            self._steps[name].update(changes)
+
+    def _run(self):
+        started = time.perf_counter()
+        for name, step in self.steps:
+            self._update(name, status='running')
+            step_started = time.perf_counter()
+            try:
+                step()
+                result = {'status': 'ok'}
+            except Exception as e:
+                print(f"Error warming up {name}: {str(e)}")
+                result = {'status': 'error', 'error': str(e)}
+            seconds = time.perf_counter() - step_started
+            perf.record(f"warm_up_{name}", seconds)
+            self._update(name, seconds=seconds, **result)
+        self._seconds = time.perf_counter() - started
+        perf.record('warm_up', self._seconds)
+        self._done.set()
+        print(f"Warm-up finished in {self._seconds:.2f} s: " + ', '.join(
+            f"{name} {step['seconds']:.2f} s" + ('' if step['status'] == 'ok' else f" ({step['status']})")
+            for name, step in self.status()['steps'].items()))
+
+    def ready(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        """Block until every step has run; False on timeout"""
+        return self._done.wait(timeout)
+
+    def status(self):
+        """ready, total seconds and {name: status, seconds, error} per step"""
+        with self._lock:
+            return {
+                'ready': self._done.is_set(),
+                'seconds': self._seconds,
+                'steps': {name: dict(step) for name, step in self._steps.items()}
+            }
+
+
+def shared_warm_up():
+    """The warm-up started last in this process, or None if none has started"""
+    with _shared_warm_up_lock:
+        return _shared_warm_up
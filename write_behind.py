@@ -0,0 +1,265 @@
+"""Write-behind queue for Google Sheets persistence.
+
+Saving a BRD used to block the page on a Sheets append_row before and
+after generation. WriteBehindQueue takes the rows instead and a background
+thread sends them: consecutive writes to the same worksheet go out as one
+append_rows or batch_update call. Calls are paced by a token bucket sized
+to the Sheets per-minute write quota, and failed calls are retried with
+exponential backoff.
+
+Every queued write is also appended to a local spool file (JSON lines)
+and only dropped from it once Sheets has accepted it, so writes that were
+still pending when the server stopped are sent after the next start.
+"""
+import atexit
+import json
+import os
+import random
+import threading
+import time
+import uuid
+
+import gspread
+import requests
+
+# Sheets allows 60 write requests per minute per user
+SHEETS_WRITES_PER_MINUTE = 60
+# Status codes worth retrying; anything else fails after MAX_ATTEMPTS
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+MAX_ATTEMPTS = 5
+MAX_BACKOFF_SECONDS = 60
+
+
+class TokenBucket:
+    """Allow `rate` acquisitions per `per` seconds, with bursts up to capacity"""
+
+    def __init__(self, rate, per=60.0, capacity=None):
+        self.rate = rate / per
+        self.capacity = capacity or rate
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, stop=None):
+        """Block until a token is available; returns False if stop is set first"""
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = (1 - self.tokens) / self.rate
+            if stop is not None:
+                if stop.wait(wait):
+                    return False
+            else:
+                time.sleep(wait)
+
+
+def is_retryable(error):
+    """Whether a failed Sheets call is worth retrying"""
+    if isinstance(error, gspread.exceptions.APIError):
+        return error.code in RETRY_STATUS_CODES
+    return isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+
+
+def backoff_delay(attempt):
+    """Exponential backoff with full jitter, capped at MAX_BACKOFF_SECONDS"""
+    return random.uniform(0, min(MAX_BACKOFF_SECONDS, 2 ** attempt))
+
+
+def group_writes(writes):
+    """Merge consecutive writes to the same worksheet and of the same kind"""
+    groups = []
+    for write in writes:
+        key = (write['worksheet'], write['kind'])
+        if groups and groups[-1][0] == key:
+            groups[-1][1].append(write)
+        else:
+            groups.append((key, [write]))
+    return groups
+
+
+class WriteBehindQueue:
+    """Queue Sheets writes and send them in batches from a background thread
+
+    sheets is a sheets.SheetsClient. append() queues a row for append_rows,
+    update() queues ranges for batch_update. Writes Sheets rejects outright
+    are moved to `<spool_path>.failed` instead of being retried forever.
+    """
+
+    def __init__(self, sheets, spool_path, writes_per_minute=SHEETS_WRITES_PER_MINUTE,
+                 batch_size=100, flush_interval=2.0):
+        self.sheets = sheets
+        self.spool_path = spool_path
+        self.failed_path = spool_path + '.failed'
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.bucket = TokenBucket(writes_per_minute)
+        self._pending = self._load_spool()
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._sending = False
+        self.sent = 0
+        self.calls = 0
+        self.failed = 0
+        self.last_error = None
+        self._thread = threading.Thread(target=self._run, name='sheets-write-behind', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def _load_spool(self):
+        if not os.path.exists(self.spool_path):
+            return []
+        writes = []
+        with open(self.spool_path) as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    writes.append(json.loads(line))
+                except ValueError:
+                    # A torn last line from a crash mid-write
+                    print(f"Skipping unreadable spool entry in {self.spool_path}")
+        return writes
+
+    def _rewrite_spool(self):
+        tmp_path = self.spool_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            for write in self._pending:
+                f.write(json.dumps(write) + '\n')
+        os.replace(tmp_path, self.spool_path)
+
+    def _enqueue(self, worksheet, kind, payload):
+        write = {
+            'id': uuid.uuid4().hex,
+            'worksheet': worksheet,
+            'kind': kind,
+            'payload': payload,
+            'attempts': 0
+        }
+        with self._cond:
+            with open(self.spool_path, 'a') as f:
+                f.write(json.dumps(write) + '\n')
+            self._pending.append(write)
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify()
+        return write['id']
+
+    def append(self, worksheet, row):
+        """Queue a row to be appended to a worksheet"""
+        return self._enqueue(worksheet, 'append', list(row))
+
+    def update(self, worksheet, updates):
+        """Queue batch_update ranges, a list of {'range': ..., 'values': ...}"""
+        return self._enqueue(worksheet, 'update', list(updates))
+
+    def _send(self, worksheet, kind, writes):
+        if kind == 'append':
+            self.sheets.call(worksheet, 'append_rows', [w['payload'] for w in writes],
+                             value_input_option='RAW')
+        else:
+            self.sheets.call(worksheet, 'batch_update',
+                             [u for w in writes for u in w['payload']])
+
+    def _dead_letter(self, writes, error):
+        with open(self.failed_path, 'a') as f:
+            for write in writes:
+                f.write(json.dumps(dict(write, error=str(error))) + '\n')
+        self.failed += len(writes)
+
+    def _flush_once(self):
+        """Send the pending head of the queue; returns a backoff delay or None"""
+        with self._cond:
+            batch = list(self._pending[:self.batch_size])
+            self._sending = bool(batch)
+        try:
+            for (worksheet, kind), writes in group_writes(batch):
+                if not self.bucket.acquire(self._stop):
+                    return None
+                self.calls += 1
+                try:
+                    self._send(worksheet, kind, writes)
+                except Exception as e:
+                    self.last_error = str(e)
+                    attempts = max(w['attempts'] for w in writes) + 1
+                    retryable = is_retryable(e)
+                    with self._cond:
+                        if retryable or attempts < MAX_ATTEMPTS:
+                            for w in writes:
+                                w['attempts'] = attempts
+                            self._rewrite_spool()
+                            print(f"Sheets write failed (attempt {attempts}), retrying: {str(e)}")
+                            return backoff_delay(attempts)
+                        print(f"Sheets write failed permanently: {str(e)}")
+                        self._dead_letter(writes, e)
+                        sent_ids = {w['id'] for w in writes}
+                        self._pending = [w for w in self._pending if w['id'] not in sent_ids]
+                        self._rewrite_spool()
+                    continue
+                with self._cond:
+                    sent_ids = {w['id'] for w in writes}
+                    self._pending = [w for w in self._pending if w['id'] not in sent_ids]
+                    self._rewrite_spool()
+                    self.sent += len(writes)
+            return None
+        finally:
+            with self._cond:
+                self._sending = False
+                self._cond.notify_all()
+
+    def _run(self):
+        while not self._stop.is_set():
+            with self._cond:
+                if not self._pending:
+                    self._cond.wait(self.flush_interval)
+                    if not self._pending:
+                        continue
+            # Give writes made in the same burst a moment to join the batch
+            if self._stop.wait(self.flush_interval / 4):
+                break
+            delay = self._flush_once()
+            if delay:
+                self._stop.wait(delay)
+
+    def flush(self, timeout=None):
+        """Wait until everything queued so far is sent; returns False on timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._cond.notify()
+            while self._pending or self._sending:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining if remaining is not None else 1.0)
+        return True
+
+    def pending(self):
+        with self._cond:
+            return len(self._pending)
+
+    def stats(self):
+        """Counters for monitoring the queue"""
+        return {
+            'pending': self.pending(),
+            'sent': self.sent,
+            'calls': self.calls,
+            'failed': self.failed,
+            'last_error': self.last_error
+        }
+
+    def close(self, timeout=5.0):
+        """Try to drain the queue, then stop; unsent writes stay in the spool"""
+        if self._stop.is_set():
+            return
+        self.flush(timeout)
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        self._thread.join(timeout)